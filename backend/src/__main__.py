@@ -5,7 +5,7 @@ import sys
 import uvicorn
 
 from src.app import app
-from src.cli import check_database_command, help_command, run_algorithm_command
+from src.cli import check_database_command, convert_input_command, help_command, run_algorithm_command
 
 
 def main() -> None:
@@ -25,6 +25,10 @@ def main() -> None:
         run_algorithm_command()
         return
 
+    if sys.argv[1] == "convert-input":
+        convert_input_command()
+        return
+
     print("Unknown command, use 'help' to see available commands.")
 
 
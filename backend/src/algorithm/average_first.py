@@ -3,39 +3,38 @@ An algorithm that runs the Average mechanism, funds all projects whose average i
    and then runs another algorithm (e.g. MES) on the remaining budget and projects.
 """
 
-import copy
 import logging
+from dataclasses import replace
 
-from src.algorithm.equal_shares import equal_shares
-from src.algorithm.utils import (
-    calculate_average_bids,
-    check_allocations,
-    get_project_min_costs,
-    plot_bid_data,
-    remove_zero_bids,
-)
-from src.algorithm.equal_shares import CONTINUOUS_COST
+import numpy as np
+
+from src.algorithm.catalog import CostMinMax, ProjectCatalog
+from src.algorithm.equal_shares import CONTINUOUS_COST, equal_shares
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.utils import calculate_average_bids, plot_bid_data
 
 logger = logging.getLogger(__name__)
 
 
 def average_first(
     voters: list[int],
-    cost_min_max: list[dict[int, tuple[int, int]]],
+    cost_min_max: ProjectCatalog | CostMinMax,
     budget: float,
     bids: dict[int, dict[int, int]],
-    use_plt: bool = True,
+    use_plt: bool = False,
 ) -> tuple[dict[int, int], dict[int, dict[int, float]]]:
     """
     The purpose of this function is to convert the input in the received format
     to a format suitable for the equal_shares function (Selects the minimum value)
         Args:
             voters (list): A list of voter names.
-            cost_min_max (dict): A dictionary mapping project IDs to their min and max costs.
+            cost_min_max (ProjectCatalog | list): The project catalog, or a list of dicts mapping
+                                                  project IDs to their min and max costs.
             bids (dict): A dictionary mapping project IDs to the list of voters who approve
                         them and the cost the voters chose.
             budget (int): The total budget available
-            use_plt (bool): if it is True, the function will use matplotlib
+            use_plt (bool): if it is True, the function shows the results in a matplotlib window (blocking).
+                            To render the plots to files, use plotting.BidPlotRenderer on the results
 
     >>> import numpy as np
     >>> voters = [1, 2]
@@ -49,43 +48,67 @@ def average_first(
     >>> {k: int(np.round(v)) for k, v in winners_allocations.items()}  # {11: 500, 12: 300, 13: 100}
     {11: 500, 12: 300, 13: 100}
     """
-    projects_min_costs = get_project_min_costs(cost_min_max)
-    bids_not_zero = remove_zero_bids(bids)
-    averages = calculate_average_bids(bids_not_zero, voters)
-    logger.debug("averages: %s", averages)
+    catalog = ProjectCatalog.of(cost_min_max)
+    instance = PreparedInstance.from_input(voters, catalog, budget, bids)
+    winners_allocations, candidates_payments_per_voter = average_first_prepared(instance)
+
+    # Bids above the max cost of a project are not capped, so the allocation may exceed the max cost
+    if not catalog.check_allocations(winners_allocations):
+        logger.warning("the budget allocation is not within the cost ranges of the projects")
+
+    if use_plt:
+        averages = dict(zip(instance.project_ids.tolist(), instance.average_bids().tolist()))
+        plot_bid_data(instance.bids(), catalog, averages, winners_allocations)
+    return winners_allocations, candidates_payments_per_voter
+
+
+def average_first_prepared(instance: PreparedInstance) -> tuple[dict[int, int], dict[int, dict[int, float]]]:
+    """
+    Run average_first on a prepared instance.
+    The average phase is computed on the arrays of the instance, and the residual instance
+    (the remaining bids, costs and budget) is passed to equal_shares without cleaning the bids again.
+
+    >>> instance = PreparedInstance.from_input(
+    ...     voters=[1, 2],
+    ...     cost_min_max=[{11: (200, 500)}, {12: (300, 300)}, {13: (100, 150)}],
+    ...     budget=900,
+    ...     bids={11: {1: 500, 2: 200}, 12: {1: 300, 2: 300}, 13: {2: 100}},
+    ... )
+    >>> residual = average_first_residual(instance)[1]
+    >>> residual.bids(), residual.projects_min_costs(), residual.budget
+    ({11: {1: 150}, 12: {}, 13: {2: 100}}, {11: 1, 12: 1, 13: 100}, 250)
+    """
+    allocations, residual = average_first_residual(instance)
 
-    projects_min_costs = {}
-    for item in copy.deepcopy(cost_min_max):
-        project_id, (min_value, _) = item.popitem()
-        projects_min_costs[project_id] = min_value
-
-    winners_allocations = {}
-    for project_id, min_cost in projects_min_costs.items():
-        if averages[project_id] >= min_cost:
-            allocation = int(averages[project_id])
-            winners_allocations[project_id] = allocation
-            projects_min_costs[project_id] = CONTINUOUS_COST
-
-            # Update bids:
-            bids_not_zero[project_id] = {
-                voter: (bid - allocation) for voter, bid in bids_not_zero[project_id].items() if bid > allocation
-            }
-            budget -= allocation
-        else:
-            winners_allocations[project_id] = 0
-            projects_min_costs[project_id] = min_cost
-    # print("projects_min_costs", projects_min_costs)
-    # print("bids_not_zero", bids_not_zero)
     winners_additional_allocations, candidates_payments_per_voter = equal_shares(
-        voters, projects_min_costs, budget, bids_not_zero
+        residual.voters(), residual.projects_min_costs(), residual.budget, residual.bids(), validate_bids=False
     )
 
-    for project_id, average in averages.items():
-        winners_allocations[project_id] += winners_additional_allocations[project_id]
+    winners_allocations = {
+        project_id: allocation + winners_additional_allocations[project_id]
+        for project_id, allocation in zip(instance.project_ids.tolist(), allocations.tolist())
+    }
+    return winners_allocations, candidates_payments_per_voter
 
-    if not check_allocations(cost_min_max, winners_allocations):
-        raise ValueError("the budget allocation is not valid")
 
-    if use_plt:
-        plot_bid_data(bids_not_zero, cost_min_max, averages, winners_allocations)
-    return winners_allocations, candidates_payments_per_voter
+def average_first_residual(instance: PreparedInstance) -> tuple[np.ndarray, PreparedInstance]:
+    """
+    The average phase: fund every project whose average bid is at least its minimum cost.
+    Returns the allocations (in the order of `project_ids`) and the residual instance:
+    the funded projects move to their continuous phase, their allocation is taken off every bid
+    (bids that do not exceed it are removed), and off the budget.
+    """
+    averages = instance.average_bids()
+    logger.debug("averages: %s", averages)
+
+    funded = averages >= instance.min_costs
+    allocations = np.where(funded, averages, 0).astype(np.int64)
+
+    bid_allocations = allocations[instance.bid_projects()]
+    residual = instance.select_bids(instance.bid_amounts > bid_allocations, instance.bid_amounts - bid_allocations)
+    residual = replace(
+        residual,
+        min_costs=np.where(funded, CONTINUOUS_COST, instance.min_costs),
+        budget=instance.budget - int(allocations.sum()),
+    )
+    return allocations, residual
@@ -0,0 +1,139 @@
+"""
+An indexed catalog of the projects and their cost ranges.
+
+The input of the algorithm gives the cost ranges as `cost_min_max`, a list of single-key dicts
+(`[{project_id: (min_cost, max_cost)}, ...]`). The catalog is built from it once, in one pass,
+and gives O(1) lookups by project id and array views of the min and max costs.
+"""
+
+from typing import Iterator, Union
+
+import numpy as np
+
+from src.logger import LoggerName, get_logger
+
+logger = get_logger(LoggerName.ALGORITHM)
+
+CostMinMax = list[dict[int, tuple[int, int]]]
+
+
+class ProjectCatalog:
+    """
+    The projects in their input order, with their min and max costs.
+    The arrays should be treated as read-only, they may be shared.
+
+    >>> catalog = ProjectCatalog.from_cost_min_max([{11: (200, 300)}, {12: (300, 400)}, {13: (100, 150)}])
+    >>> catalog.cost_range(12)
+    (300, 400)
+    >>> catalog.projects_min_costs()
+    {11: 200, 12: 300, 13: 100}
+    >>> catalog.max_costs.tolist()
+    [300, 400, 150]
+    >>> catalog.check_allocations({11: 250, 12: 0, 13: 200})
+    False
+    """
+
+    __slots__ = ("project_ids", "min_costs", "max_costs", "_positions")
+
+    def __init__(self, project_ids: np.ndarray, min_costs: np.ndarray, max_costs: np.ndarray) -> None:
+        self.project_ids = project_ids
+        self.min_costs = min_costs
+        self.max_costs = max_costs
+        self._positions = {project_id: position for position, project_id in enumerate(project_ids.tolist())}
+        if len(self._positions) != len(project_ids):
+            raise ValueError("Project ids in cost_min_max must be unique")
+
+    @classmethod
+    def from_cost_min_max(cls, cost_min_max: CostMinMax) -> "ProjectCatalog":
+        project_ids: list[int] = []
+        min_costs: list[int] = []
+        max_costs: list[int] = []
+        for entry in cost_min_max:
+            for project_id, (min_cost, max_cost) in entry.items():
+                project_ids.append(project_id)
+                min_costs.append(min_cost)
+                max_costs.append(max_cost)
+
+        return cls(
+            project_ids=np.asarray(project_ids, dtype=np.int64),
+            min_costs=np.asarray(min_costs, dtype=np.int64),
+            max_costs=np.asarray(max_costs, dtype=np.int64),
+        )
+
+    @classmethod
+    def of(cls, projects: Union["ProjectCatalog", CostMinMax]) -> "ProjectCatalog":
+        """Return the catalog as is, or build it from `cost_min_max`."""
+        if isinstance(projects, ProjectCatalog):
+            return projects
+        return cls.from_cost_min_max(projects)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, project_id: object) -> bool:
+        return project_id in self._positions
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._positions)
+
+    def position(self, project_id: int) -> int:
+        """The position of the project in the arrays, raises KeyError for an unknown project."""
+        return self._positions[project_id]
+
+    def positions(self, project_ids: np.ndarray) -> np.ndarray:
+        """The positions of many projects in the arrays, -1 for unknown projects."""
+        project_ids = np.asarray(project_ids, dtype=np.int64)
+        if len(self.project_ids) == 0:
+            return np.full(len(project_ids), -1, dtype=np.int64)
+
+        order = np.argsort(self.project_ids, kind="stable")
+        sorted_ids = self.project_ids[order]
+        found = np.minimum(np.searchsorted(sorted_ids, project_ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[found] == project_ids, order[found], -1).astype(np.int64)
+
+    def cost_range(self, project_id: int) -> tuple[int, int]:
+        position = self._positions[project_id]
+        return int(self.min_costs[position]), int(self.max_costs[position])
+
+    def min_cost(self, project_id: int) -> int:
+        return int(self.min_costs[self._positions[project_id]])
+
+    def max_cost(self, project_id: int) -> int:
+        return int(self.max_costs[self._positions[project_id]])
+
+    def projects_min_costs(self) -> dict[int, int]:
+        return dict(zip(self.project_ids.tolist(), self.min_costs.tolist()))
+
+    def projects_max_costs(self) -> dict[int, int]:
+        return dict(zip(self.project_ids.tolist(), self.max_costs.tolist()))
+
+    def cost_min_max(self) -> CostMinMax:
+        return [
+            {project_id: (min_cost, max_cost)}
+            for project_id, min_cost, max_cost in zip(
+                self.project_ids.tolist(), self.min_costs.tolist(), self.max_costs.tolist()
+            )
+        ]
+
+    def check_allocations(self, winners_allocations: dict[int, int]) -> bool:
+        """
+        Check that every non-zero allocation is within the cost range of its project.
+        Allocations of projects that are not in the catalog are ignored.
+        """
+        valid = True
+        for project_id, project_cost in winners_allocations.items():
+            if project_cost == 0:
+                continue
+
+            position = self._positions.get(project_id)
+            if position is None:
+                continue
+
+            min_cost, max_cost = self.min_costs[position], self.max_costs[position]
+            if not min_cost <= project_cost <= max_cost:
+                valid = False
+                logger.info(
+                    f"project_cost {project_cost} for project_id {project_id} "
+                    f"is NOT within the range {min_cost}-{max_cost}."
+                )
+        return valid
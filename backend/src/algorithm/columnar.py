@@ -0,0 +1,150 @@
+"""
+A binary columnar file format for the input of the algorithm.
+
+The file is an uncompressed `.npz` archive with the arrays of a `PreparedInstance`:
+
+    voter_ids     int64[V]    the voters
+    project_ids   int64[P]    the projects, in the order of cost_min_max
+    min_costs     int64[P]    the min cost of each project
+    max_costs     int64[P]    the max cost of each project
+    bid_offsets   int64[P+1]  the bids of project p are bid_offsets[p]:bid_offsets[p + 1]
+    bid_voters    int64[B]    the position (in voter_ids) of the voter of each bid
+    bid_amounts   int64[B]    the amount of each bid, positive
+    budget        scalar      the total budget
+    format_version scalar
+
+Since the archive is not compressed, the arrays are memory-mapped directly from the file
+when it is loaded, and are validated in bulk by `PreparedInstance.validate`.
+"""
+
+import io
+import os
+import struct
+import zipfile
+from typing import IO
+
+import numpy as np
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.json_stream import load_instance_json
+
+NPZ_FORMAT_VERSION = 1
+
+INSTANCE_ARRAYS = ("voter_ids", "project_ids", "min_costs", "max_costs", "bid_offsets", "bid_voters", "bid_amounts")
+
+# Size of the fixed part of a zip local file header, followed by the file name and the extra field
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def save_instance_npz(instance: PreparedInstance, path: str) -> None:
+    """Save the instance to an uncompressed .npz file."""
+    arrays = {name: np.ascontiguousarray(getattr(instance, name), dtype=np.int64) for name in INSTANCE_ARRAYS}
+    arrays["format_version"] = np.asarray(NPZ_FORMAT_VERSION)
+    arrays["budget"] = np.asarray(instance.budget)
+    with open(path, "wb") as f:
+        # The stubs of savez type its allow_pickle keyword too, so a dict of arrays does not type-check
+        np.savez(f, **arrays)  # type: ignore[arg-type]
+
+
+def load_instance_npz(path: str, mmap: bool = True, validate: bool = True) -> PreparedInstance:
+    """
+    Load an instance saved by `save_instance_npz`.
+
+    Args:
+        path: the .npz file
+        mmap: memory-map the arrays from the file instead of reading them,
+              the file must not be changed while the instance is in use
+        validate: check the arrays with `PreparedInstance.validate`
+    """
+    arrays = _mmap_npz(path) if mmap else _read_npz(path)
+    return _instance_from_arrays(arrays, f"'{path}'", validate)
+
+
+def load_instance_npz_bytes(content: bytes, validate: bool = True) -> PreparedInstance:
+    """
+    Load an instance from the content of a file saved by `save_instance_npz`, e.g. the body of a request.
+    Compressed members are rejected, so the arrays are never larger than the content.
+    """
+    try:
+        _check_stored_members(io.BytesIO(content))
+        arrays = _read_npz(io.BytesIO(content))
+    except (OSError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Invalid .npz content: {e}") from e
+    return _instance_from_arrays(arrays, "the .npz content", validate)
+
+
+def _instance_from_arrays(arrays: dict[str, np.ndarray], source: str, validate: bool) -> PreparedInstance:
+    missing = {"format_version", "budget", *INSTANCE_ARRAYS} - set(arrays.keys())
+    if missing:
+        raise ValueError(f"Missing arrays in {source}: {sorted(missing)}")
+    if int(arrays["format_version"]) != NPZ_FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version {int(arrays['format_version'])} in {source}")
+
+    instance = PreparedInstance(budget=arrays["budget"].item(), **{name: arrays[name] for name in INSTANCE_ARRAYS})
+    if validate:
+        instance.validate()
+    return instance
+
+
+def convert_json_to_npz(json_path: str, npz_path: str) -> PreparedInstance:
+    """Convert an input JSON file of the run-algorithm command to the columnar format."""
+    # The JSON file is streamed, so files larger than the memory of Python objects can be converted
+    instance = load_instance_json(json_path)
+    instance.validate()
+    save_instance_npz(instance, npz_path)
+    return instance
+
+
+def _read_npz(file: str | IO[bytes]) -> dict[str, np.ndarray]:
+    with np.load(file, allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def _check_stored_members(file: IO[bytes]) -> None:
+    """Reject the compressed members of a .npz archive, a small compressed member may expand to gigabytes."""
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Compressed arrays are not supported: '{info.filename}'")
+
+
+def _mmap_npz(path: str) -> dict[str, np.ndarray]:
+    """
+    Memory-map the arrays of an uncompressed .npz file.
+    Compressed members cannot be mapped, they are read into memory.
+    """
+    arrays: dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename.removesuffix(".npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+
+            # The member data starts after its local header, which may differ from the central directory entry
+            f.seek(info.header_offset)
+            local_header = f.read(_ZIP_LOCAL_HEADER_SIZE)
+            name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+            f.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"Object arrays are not supported: '{name}' in '{path}'")
+
+            if shape == () or 0 in shape:
+                # Empty and scalar arrays are too small to map
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+            else:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortran_order else "C"
+                )
+    return arrays
+
+
+def is_npz_path(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() == ".npz"
@@ -1,34 +1,31 @@
 import logging
 
+from src.algorithm.catalog import CostMinMax, ProjectCatalog
 from src.algorithm.equal_shares import equal_shares
-from src.algorithm.utils import (
-    calculate_average_bids,
-    check_allocations,
-    get_project_min_costs,
-    plot_bid_data,
-    remove_zero_bids,
-)
+from src.algorithm.utils import calculate_average_bids, plot_bid_data, remove_zero_bids
 
 logger = logging.getLogger("min_max_equal_shares_logger")
 
 
 def min_max_equal_shares(
     voters: list[int],
-    cost_min_max: list[dict[int, tuple[int, int]]],
+    cost_min_max: ProjectCatalog | CostMinMax,
     budget: float,
     bids: dict[int, dict[int, int]],
-    use_plt: bool = True,
+    use_plt: bool = False,
 ) -> tuple[dict[int, int], dict[int, dict[int, float]]]:
     """
     The purpose of min_max_equal_shares function is to convert the input in the received format
     to a format suitable for the equal_shares function (Selects the minimum value)
         Args:
             voters (list): A list of voter names.
-            cost_min_max (dict): A dictionary mapping project IDs to their min and max costs.
+            cost_min_max (ProjectCatalog | list): The project catalog, or a list of dicts mapping
+                                                  project IDs to their min and max costs.
             bids (dict): A dictionary mapping project IDs to the list of voters
                          who approve them and the cost the voters chose.
             budget (int): The total budget available
-            use_plt (bool): if it is True, the function will use matplotlib
+            use_plt (bool): if it is True, the function shows the results in a matplotlib window (blocking).
+                            To render the plots to files, use plotting.BidPlotRenderer on the results
 
     >>> import numpy as np
     >>> voters = [1, 2]
@@ -40,18 +37,20 @@ def min_max_equal_shares(
     >>> {k: int(np.round(v)) for k, v in winners_allocations.items()}
     {11: 500, 12: 300, 13: 100}
     """
-    projects_min_costs = get_project_min_costs(cost_min_max)
+    catalog = ProjectCatalog.of(cost_min_max)
+    projects_min_costs = catalog.projects_min_costs()
     bids_not_zero = remove_zero_bids(bids)
     winners_allocations, candidates_payments_per_voter = equal_shares(voters, projects_min_costs, budget, bids_not_zero)
 
     averages = calculate_average_bids(bids_not_zero, voters)
     logger.debug("averages: %s", averages)
 
-    if not check_allocations(cost_min_max, winners_allocations):
-        raise ValueError("the budget allocation is not valid")
+    # Bids above the max cost of a project are not capped, so the allocation may exceed the max cost
+    if not catalog.check_allocations(winners_allocations):
+        logger.warning("the budget allocation is not within the cost ranges of the projects")
 
     if use_plt:
-        plot_bid_data(bids_not_zero, cost_min_max, averages, winners_allocations)
+        plot_bid_data(bids_not_zero, catalog, averages, winners_allocations)
 
     rounded_winners_allocations = {
         project_id: int(allocation) for project_id, allocation in winners_allocations.items()
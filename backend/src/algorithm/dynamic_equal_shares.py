@@ -0,0 +1,367 @@
+"""
+Dynamic Method of Equal Shares - recompute the outcome after a single voter changes their bids.
+
+`DynamicEqualShares` keeps the last solution of `equal_shares` together with the purchase trace
+of every fixed-budget run (every call of `equal_shares_fixed_budget`).
+When a voter changes their bids, each fixed-budget run replays its recorded purchases
+while they are not affected by the change, and simulates again only from the first
+purchase that may differ.
+
+A recorded purchase is not affected if the chosen project is not one of the changed projects,
+and no changed project reaches the effective vote count of the chosen project at that point.
+All the other projects are in exactly the same state as in the recorded run,
+so their effective vote counts do not need to be computed again.
+
+Adding or removing a voter changes the share of every voter, so it recomputes everything.
+"""
+
+from dataclasses import dataclass
+
+from src.algorithm.equal_shares import (
+    CONTINUOUS_COST,
+    DISTRIBUTION_PARAMETER_COST,
+    MAX_ROUNDS,
+    break_ties,
+    compute_effective_vote_count,
+    distribute_cost_among_voters,
+)
+from src.algorithm.utils import filter_bids, find_max, remove_invalid_bids, remove_zero_bids
+from src.logger import LoggerName, get_logger
+
+logger = get_logger(LoggerName.ALGORITHM)
+
+
+@dataclass(frozen=True)
+class Purchase:
+    """A single purchase of a fixed-budget run."""
+
+    candidate: int
+    effective_vote_count: float
+    cost: float
+    contributions: list[tuple[int, float]]  # (voter_id, payment)
+
+
+class _FixedBudgetRun:
+    """
+    The state of a single fixed-budget run.
+    Same variables and same operations as in `equal_shares_fixed_budget`,
+    split so that recorded purchases can be replayed without searching for the best candidate.
+    """
+
+    def __init__(
+        self,
+        voters: list[int],
+        projects_costs: dict[int, int],
+        budget: float,
+        bids: dict[int, dict[int, int]],
+        max_bid_for_project: dict[int, int],
+    ) -> None:
+        self.max_bid_for_project = max_bid_for_project
+        self.voters_budgets = {i: budget / len(voters) for i in voters}
+        self.remaining_candidates = {
+            candidate: len(bids[candidate])
+            for candidate in projects_costs.keys()
+            if projects_costs[candidate] > 0 and len(bids[candidate]) > 0
+        }
+        self.winners_allocations: dict[int, float] = {candidate: 0 for candidate in projects_costs.keys()}
+        self.updated_cost = dict(projects_costs)
+        # The bids of a project are copied only before they are changed for the first time
+        self.updated_bids = dict(bids)
+        self._copied_bids: set[int] = set()
+        self.purchases: list[Purchase] = []
+
+    def is_affordable(self, candidate: int) -> bool:
+        candidate_bids = self.updated_bids[candidate]
+        money_behind_candidate = sum(self.voters_budgets[i] for i in candidate_bids.keys() if candidate_bids[i] > 0)
+        return money_behind_candidate >= self.updated_cost[candidate]
+
+    def effective_vote_count(self, candidate: int) -> float | None:
+        return compute_effective_vote_count(
+            self.updated_cost[candidate], [self.voters_budgets[voter] for voter in self.updated_bids[candidate].keys()]
+        )
+
+    def find_best_candidates(self) -> tuple[list[int], float]:
+        """Find the candidates with the highest effective vote count, like the search in equal_shares_fixed_budget."""
+        best_candidates: list[int] = []
+        best_effective_vote_count = 0.0
+
+        remaining_candidates_sorted = sorted(self.remaining_candidates.items(), key=lambda item: item[1], reverse=True)
+        for candidate, previous_effective_vote_count in remaining_candidates_sorted:
+            if previous_effective_vote_count < best_effective_vote_count:
+                break
+
+            if not self.is_affordable(candidate):
+                del self.remaining_candidates[candidate]
+                continue
+
+            effective_vote_count = self.effective_vote_count(candidate)
+            if effective_vote_count is None:
+                continue
+            if effective_vote_count > best_effective_vote_count:
+                best_effective_vote_count = effective_vote_count
+                best_candidates = [candidate]
+            elif effective_vote_count == best_effective_vote_count:
+                best_candidates.append(candidate)
+
+        return best_candidates, best_effective_vote_count
+
+    def create_purchase(self, candidate: int, effective_vote_count: float) -> Purchase:
+        """Calculate the cost and the contributions of funding the candidate."""
+        cost: float = self.updated_cost[candidate]
+        candidate_bids = self.updated_bids[candidate]
+
+        if cost == CONTINUOUS_COST:
+            positive_bids = {
+                voter: bid for voter, bid in candidate_bids.items() if bid > 0 and self.voters_budgets[voter] > 0
+            }
+            cost = min(
+                self.max_bid_for_project[candidate] - self.winners_allocations[candidate],
+                min(bid for voter, bid in positive_bids.items()),
+                sum(self.voters_budgets[voter] for voter, bid in positive_bids.items()),
+            )
+
+        voters_and_budgets = [(voter, self.voters_budgets[voter]) for voter in candidate_bids.keys()]
+        contributions = distribute_cost_among_voters(cost, voters_and_budgets)
+        return Purchase(candidate, effective_vote_count, cost, contributions)
+
+    def apply(self, purchase: Purchase) -> None:
+        """Apply a purchase to the state."""
+        candidate = purchase.candidate
+
+        for voter, voter_payment in purchase.contributions:
+            self.voters_budgets[voter] -= voter_payment
+        self.winners_allocations[candidate] += purchase.cost
+
+        if self.winners_allocations[candidate] < self.max_bid_for_project[candidate]:
+            if candidate not in self._copied_bids:
+                self.updated_bids[candidate] = dict(self.updated_bids[candidate])
+                self._copied_bids.add(candidate)
+            # The cost is fractional in the continuous phase, as in equal_shares_fixed_budget
+            filter_bids(
+                self.updated_bids, candidate, purchase.cost, CONTINUOUS_COST, self.updated_cost  # type: ignore[arg-type]
+            )
+            self.remaining_candidates[candidate] = len(self.updated_bids[candidate].keys())
+        else:
+            self.updated_cost[candidate] = 0
+            self.remaining_candidates.pop(candidate, None)
+
+        self.purchases.append(purchase)
+
+    def is_unaffected(self, purchase: Purchase, changed_projects: set[int]) -> bool:
+        """
+        Check if a recorded purchase would also be chosen now, when only the bids of `changed_projects` changed.
+        Ties with a changed project are treated as affected, so the tie-breaking is done by the simulation.
+        """
+        if purchase.candidate in changed_projects or purchase.candidate not in self.remaining_candidates:
+            return False
+
+        threshold = min(purchase.effective_vote_count, self.remaining_candidates[purchase.candidate])
+        for candidate in changed_projects:
+            if candidate not in self.remaining_candidates or not self.is_affordable(candidate):
+                continue
+            effective_vote_count = self.effective_vote_count(candidate)
+            if effective_vote_count is not None and effective_vote_count >= threshold:
+                return False
+
+        return True
+
+    def run(self, trace: list[Purchase], changed_projects: set[int]) -> int:
+        """
+        Replay the recorded trace while it is unaffected by the changed projects, then simulate the rest.
+        Returns the number of replayed purchases.
+        """
+        replayed = 0
+        for purchase in trace:
+            if not self.is_unaffected(purchase, changed_projects):
+                break
+            self.apply(purchase)
+            replayed += 1
+
+        while True:
+            best_candidates, best_effective_vote_count = self.find_best_candidates()
+            if not best_candidates:
+                break
+
+            best_found = break_ties(self.updated_cost, self.updated_bids, best_candidates)
+            if len(best_found) > 1:
+                raise Exception(
+                    f"Tie-breaking failed: tie between projects {best_found} "
+                    "could not be resolved. Another tie-breaking needs to be added."
+                )
+
+            self.apply(self.create_purchase(best_found[0], best_effective_vote_count))
+
+        return replayed
+
+    def payments_per_voter(self, bids: dict[int, dict[int, int]]) -> dict[int, dict[int, float]]:
+        candidates_payments_per_voter = {
+            candidate: {voter: 0.0 for voter in inner_dict.keys()} for candidate, inner_dict in bids.items()
+        }
+        for purchase in self.purchases:
+            for voter, voter_payment in purchase.contributions:
+                candidates_payments_per_voter[purchase.candidate][voter] += voter_payment
+        return candidates_payments_per_voter
+
+
+class DynamicEqualShares:
+    """
+    The Method of Equal Shares with incremental recomputation after a voter changes their bids.
+    `solve` returns the same result as `equal_shares(voters, projects_costs, budget, self.bids)`.
+
+    >>> engine = DynamicEqualShares(
+    ...     voters=[1, 2, 3],
+    ...     projects_costs={101: 100, 102: 150},
+    ...     budget=300,
+    ...     bids={101: {1: 100, 2: 100}, 102: {2: 150, 3: 150}},
+    ... )
+    >>> engine.solve()[0]
+    {101: 100, 102: 150}
+    >>> engine.update_voter_bids(1, {101: 0, 102: 150})
+    >>> engine.solve()[0]
+    {101: 100, 102: 150}
+    >>> engine.bids
+    {101: {2: 100}, 102: {2: 150, 3: 150, 1: 150}}
+    """
+
+    def __init__(
+        self,
+        voters: list[int],
+        projects_costs: dict[int, int],
+        budget: float,
+        bids: dict[int, dict[int, int]],
+    ) -> None:
+        self._voters = list(voters)
+        self._projects_costs = dict(projects_costs)
+        self._budget = budget
+
+        bids = remove_zero_bids({project_id: dict(project_bids) for project_id, project_bids in bids.items()})
+        self._bids = remove_invalid_bids(self._voters, bids)
+        self._max_bid_for_project = find_max(self._bids)
+
+        # The purchase traces of the fixed-budget runs of the last solve, by the order of the runs
+        self._traces: list[list[Purchase]] = []
+        self._changed_projects: set[int] = set()
+
+        self.last_replayed_purchases = 0
+        self.last_simulated_purchases = 0
+
+    @property
+    def voters(self) -> list[int]:
+        return list(self._voters)
+
+    @property
+    def bids(self) -> dict[int, dict[int, int]]:
+        """A copy of the current bids, without zero bids."""
+        return {project_id: dict(project_bids) for project_id, project_bids in self._bids.items()}
+
+    def update_voter_bids(self, voter_id: int, voter_bids: dict[int, int]) -> None:
+        """
+        Replace all the bids of a voter (project_id -> bid), missing projects mean a zero bid.
+        A new voter is added to the voters.
+        """
+        unknown_projects = set(voter_bids.keys()) - set(self._bids.keys())
+        if unknown_projects:
+            raise ValueError(f"Unknown projects: {sorted(unknown_projects)}")
+
+        if voter_id not in self._voters:
+            self._voters.append(voter_id)
+            self._traces = []
+
+        for project_id, project_bids in self._bids.items():
+            bid = voter_bids.get(project_id, 0)
+            if project_bids.get(voter_id, 0) == bid:
+                continue
+
+            if bid > 0:
+                project_bids[voter_id] = bid
+            else:
+                project_bids.pop(voter_id, None)
+            self._max_bid_for_project[project_id] = max(project_bids.values(), default=0)
+            self._changed_projects.add(project_id)
+
+    def remove_voter(self, voter_id: int) -> None:
+        """Remove a voter and all their bids."""
+        if voter_id not in self._voters:
+            return
+
+        self._voters.remove(voter_id)
+        for project_id, project_bids in self._bids.items():
+            if project_bids.pop(voter_id, None) is not None:
+                self._max_bid_for_project[project_id] = max(project_bids.values(), default=0)
+        self._traces = []
+
+    def _run_fixed_budget(self, run_index: int, budget: float) -> _FixedBudgetRun:
+        run = _FixedBudgetRun(self._voters, self._projects_costs, budget, self._bids, self._max_bid_for_project)
+        trace = self._traces[run_index] if run_index < len(self._traces) else []
+        replayed = run.run(trace, self._changed_projects)
+
+        self.last_replayed_purchases += replayed
+        self.last_simulated_purchases += len(run.purchases) - replayed
+        return run
+
+    def solve(self) -> tuple[dict[int, float], dict[int, dict[int, float]]]:
+        """
+        Compute the outcome, same outer loop as in `equal_shares`.
+        Returns the winners allocations and the payments of each voter for each project.
+        """
+        voters = self._voters
+        budget = self._budget
+        projects = self._projects_costs.keys()
+        max_bid_for_project = self._max_bid_for_project
+
+        self.last_replayed_purchases = 0
+        self.last_simulated_purchases = 0
+        runs: list[_FixedBudgetRun] = []
+
+        # Round the budget to ensure equal division among voters
+        rounded_budget: float = int(budget / len(voters)) * len(voters)
+
+        accepted_run = self._run_fixed_budget(len(runs), rounded_budget)
+        runs.append(accepted_run)
+        winners_allocations = accepted_run.winners_allocations
+        projects_costs_of_next_increase = accepted_run.updated_cost
+        total_chosen_project_cost = sum(winners_allocations[c] for c in winners_allocations)
+
+        round_count = 0
+        while True:
+            round_count += 1
+            if round_count > MAX_ROUNDS:
+                logger.warning(f"Max rounds ({MAX_ROUNDS}) reached - forcing termination.")
+                break
+
+            is_exhaustive = True
+            for candidate in projects:
+                candidate_cost_of_next_increase = projects_costs_of_next_increase[candidate]
+                within_budget = total_chosen_project_cost + candidate_cost_of_next_increase <= budget
+                within_max_bid = winners_allocations[candidate] + candidate_cost_of_next_increase <= max_bid_for_project[candidate]
+                if within_budget and within_max_bid and candidate_cost_of_next_increase > 0:
+                    is_exhaustive = False
+                    break
+
+            if is_exhaustive:
+                break
+
+            updated_rounded_budget = rounded_budget + len(voters) * (budget / DISTRIBUTION_PARAMETER_COST)
+
+            run = self._run_fixed_budget(len(runs), updated_rounded_budget)
+            runs.append(run)
+            projects_costs_of_next_increase = run.updated_cost
+
+            total_chosen_project_cost = sum(run.winners_allocations[c] for c in run.winners_allocations)
+            if total_chosen_project_cost > budget:
+                break
+
+            rounded_budget = updated_rounded_budget
+            winners_allocations = run.winners_allocations
+            accepted_run = run
+
+        self._traces = [run.purchases for run in runs]
+        self._changed_projects = set()
+
+        logger.debug(
+            "Dynamic ES | runs: %s, replayed purchases: %s, simulated purchases: %s",
+            len(runs),
+            self.last_replayed_purchases,
+            self.last_simulated_purchases,
+        )
+        return winners_allocations, accepted_run.payments_per_voter(self._bids)
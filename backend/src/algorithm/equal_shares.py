@@ -12,7 +12,7 @@ logging messages.
 
 import copy
 import logging
-from typing import Any
+from typing import Any, Iterable
 
 from src.algorithm.utils import filter_bids, find_max, remove_invalid_bids, remove_zero_bids
 from src.logger import get_logger, LoggerName
@@ -30,7 +30,8 @@ def equal_shares(
     projects_costs: dict[int, int],
     budget: float,
     bids: dict[int, dict[int, int]],
-    tracker_callback = None
+    tracker_callback = None,
+    validate_bids: bool = True,
 ) -> tuple[dict[int, int], dict[int, dict[int, float]]]:
     """
     Implements the Method of Equal Shares (MES) algorithm for participatory budgeting.
@@ -46,6 +47,8 @@ def equal_shares(
             - Second level key: voter ID
             - Value: amount bid by that voter for that project
         tracker_callback (Optional[Callable]): Callback function for tracking algorithm progress.
+        validate_bids (bool): If False, the bids are used as given. Only for bids that are already
+            cleaned (positive bids of known voters only), e.g. the bids of a PreparedInstance.
 
     Returns:
         tuple[dict[int, int], dict[int, dict[int, float]]]: A tuple containing:
@@ -84,10 +87,14 @@ def equal_shares(
     """
     logger.debug(f'ES input:\n voters: {voters} \n projects_costs: {projects_costs} \n budget: {budget} \n bids: {bids}')
     projects = projects_costs.keys() # Get list of project IDs
-    bids = remove_zero_bids(bids)
-    bids = remove_invalid_bids(voters, bids) # Remove bids from invalid voters
+    if validate_bids:
+        bids = remove_zero_bids(bids)
+        bids = remove_invalid_bids(voters, bids) # Remove bids from invalid voters
     max_bid_for_project = find_max(bids)
 
+    # The supporter counts do not change between rounds, so they are computed once for the tracker
+    effective_votes = count_supporters(projects, bids) if tracker_callback is not None else None
+
     # Initialize a dict to track previous allocations
     previous_allocations = {pid: 0 for pid in projects}
 
@@ -98,7 +105,8 @@ def equal_shares(
     # Run first round with initial budget
     logger.debug("Calling ESFB for the first time")
     winners_allocations, projects_costs_of_next_increase, candidates_payments_per_voter = equal_shares_fixed_budget(
-        voters, projects_costs, rounded_budget, bids, max_bid_for_project, previous_allocations, tracker_callback
+        voters, projects_costs, rounded_budget, bids, max_bid_for_project, previous_allocations, tracker_callback,
+        effective_votes
     )
 
     # Calculate total cost of chosen projects
@@ -153,7 +161,8 @@ def equal_shares(
                 bids,
                 max_bid_for_project,
                 previous_allocations,
-                tracker_callback
+                tracker_callback,
+                effective_votes
             )
         )
 
@@ -223,6 +232,20 @@ def equal_shares(
     return winners_allocations, candidates_payments_per_voter
 
 
+def count_supporters(projects: Iterable[int], bids: dict[int, dict[int, int]]) -> dict[str, float]:
+    """
+    Count the voters with a positive bid for each project.
+    The keys are the project IDs as strings, the format expected by the tracker callback.
+
+    >>> count_supporters([11, 12, 13], {11: {1: 100, 2: 0}, 12: {1: 50, 2: 70}})
+    {'11': 1.0, '12': 2.0, '13': 0.0}
+    """
+    return {
+        str(pid): float(sum(1 for bid in bids.get(pid, {}).values() if bid > 0))
+        for pid in projects
+    }
+
+
 def break_ties(cost: dict[int, int], bids: dict[int, dict[int, int]], candidates: list[int]) -> list[int]:
     """
     break ties
@@ -240,6 +263,43 @@ def break_ties(cost: dict[int, int], bids: dict[int, dict[int, int]], candidates
     return remaining
 
 
+def compute_effective_vote_count(cost: float, approvers_budgets: list[float]) -> float | None:
+    """
+    Calculate how many "effective" voters support a project:
+    A measure of project support that considers both number of supporters and their ability to pay.
+    Formula: project_cost / equal_payment_per_voter
+    Higher value means stronger support.
+
+    :argument
+        cost: the current cost of the project.
+        approvers_budgets: the remaining budgets of the voters who support the project.
+    :return
+        the effective vote count, or None if the approvers cannot pay the cost.
+
+    >>> compute_effective_vote_count(60, [30., 30., 30.])
+    3.0
+    >>> compute_effective_vote_count(60, [10., 30., 30.])
+    2.4
+    """
+    # Sort supporters by their remaining budget (lowest to highest)
+    # This helps handle cases where some supporters can't pay their full share
+    sorted_budgets = sorted(approvers_budgets)
+
+    denominator = len(sorted_budgets)
+    paid_so_far = 0.0
+    for budget_of_i in sorted_budgets:
+        # compute payment if remaining approvers pay equally
+        equal_payment = (cost - paid_so_far) / denominator
+        if budget_of_i < equal_payment:
+            # i cannot afford the payment, so pays entire remaining budget_of_i
+            paid_so_far += budget_of_i
+            denominator -= 1
+        else:
+            # i (and all later approvers) can afford the payment; stop here
+            return cost / equal_payment
+    return None
+
+
 def distribute_cost_among_voters(cost: float, voters_and_budgets: list[tuple[Any, float]]) -> list[tuple[Any, float]]:
     """
     :argument
@@ -288,6 +348,7 @@ def equal_shares_fixed_budget(
     max_bid_for_project: dict,
     previous_allocations: dict[int, float] | None = None,
     tracker_callback=None,
+    effective_votes: dict[str, float] | None = None,
     # Return types:
 ) -> tuple[
     dict[int, int],  # winners_allocations
@@ -309,6 +370,13 @@ def equal_shares_fixed_budget(
             - Value: amount bid by that voter for that project
         max_bid_for_project (dict[int, int]): Dictionary mapping project IDs to their maximum
             allowable funding amounts.
+        previous_allocations (dict[int, float] | None): Allocations reported to the tracker by
+            the previous call, used to report only the delta of each funded project.
+        tracker_callback (Optional[Callable]): Callback function for tracking algorithm progress.
+            It is called once per funded project with the payments of that project,
+            so the callback can update the voter budgets incrementally.
+        effective_votes (dict[str, float] | None): Supporter counts passed to the tracker.
+            Computed from `bids` when not given.
 
     Returns:
         tuple[dict[int, int], dict[int, int], dict[int, dict[int, float]]]: A tuple containing:
@@ -419,38 +487,17 @@ def equal_shares_fixed_budget(
                 continue
 
             # Calculate the effective vote count of candidate
-            # Sort supporters by their remaining budget (lowest to highest)
-            # This helps handle cases where some supporters can't pay their full share
-            sorted_approvers = {
-                voter: voters_budgets[voter]
-                for voter in sorted(updated_bids[candidate].keys(), key=lambda i: voters_budgets[i])
-            }
-
-            # Calculate how many "effective" voters support the project
-            denominator = len(sorted_approvers)
-            paid_so_far = 0.0
-            for i, budget_of_i in sorted_approvers.items():
-                # compute payment if remaining approvers pay equally
-                equal_payment = (updated_cost[candidate] - paid_so_far) / denominator
-                if budget_of_i < equal_payment:
-                    # i cannot afford the payment, so pays entire remaining budget_of_i
-                    paid_so_far += budget_of_i
-                    denominator -= 1
-                else:
-                    # i (and all later approvers) can afford the payment; stop here
-                    # Calculate effective vote count:
-                    # A measure of project support that considers both number of supporters and their ability to pay.
-                    # Formula: project_cost / equal_payment_per_voter
-                    # Higher value means stronger support.
-                    effective_vote_count = updated_cost[candidate] / equal_payment
-                    # Store the effective vote count for this project
-                    current_round_effective_votes[str(candidate)] = effective_vote_count
-                    if effective_vote_count > best_effective_vote_count:
-                        best_effective_vote_count = effective_vote_count
-                        best_candidates = [candidate]
-                    elif effective_vote_count == best_effective_vote_count:
-                        best_candidates.append(candidate)
-                    break
+            effective_vote_count = compute_effective_vote_count(
+                updated_cost[candidate], [voters_budgets[voter] for voter in updated_bids[candidate].keys()]
+            )
+            if effective_vote_count is not None:
+                # Store the effective vote count for this project
+                current_round_effective_votes[str(candidate)] = effective_vote_count
+                if effective_vote_count > best_effective_vote_count:
+                    best_effective_vote_count = effective_vote_count
+                    best_candidates = [candidate]
+                elif effective_vote_count == best_effective_vote_count:
+                    best_candidates.append(candidate)
             # logger.debug(
             #     "Candidate %s: cost %s; approvers and budgets=%s; effective_vote_count=%s",
             #     candidate,
@@ -566,56 +613,33 @@ def equal_shares_fixed_budget(
         # )
 
     if tracker_callback is not None:
+        if effective_votes is None:
+            effective_votes = count_supporters(projects, bids)
+
         # Get only funded projects sorted by allocation amount
         funded_projects = [(pid, amount) for pid, amount in winners_allocations.items() 
                           if amount > 0]
         funded_projects.sort(key=lambda x: x[1], reverse=True)
-        
-        # Track each funded project for visualization
-        remaining_budget = budget
-        voter_budgets = {v: budget/len(voters) for v in voters}
-        previous_voter_budgets = {v: budget/len(voters) for v in voters}
-        
-        for project_id, total_allocation in funded_projects:
+
+        # Every voter starts this run with the same budget; the callback receives only the
+        # payments of each funded project and applies them to its own copy of the budgets.
+        initial_voter_budget = budget / len(voters)
+
+        for round_index, (project_id, total_allocation) in enumerate(funded_projects):
             # Calculate the delta between current and previous allocation
             delta_allocation = total_allocation - previous_allocations[project_id]
             previous_allocations[project_id] = total_allocation  # Update for next time
 
-            # Calculate effective votes for ALL projects
-            effective_votes = {}
-            for pid in projects_costs.keys():
-                pid_supporters = len([v for v, bid in bids[pid].items() if bid > 0])
-                effective_votes[str(pid)] = float(pid_supporters)
-
-            # Get the payments each voter made for this project
-            project_payments = candidates_payments_per_voter[project_id]
-
-            # Update voter budgets for tracking
-            for voter_id in voter_budgets:
-                voter_payment = project_payments.get(voter_id, 0)
-                voter_budgets[voter_id] -= voter_payment
-
-            # logger.debug(f'calling tracker_callback with:')
-            # logger.debug(f"project_id: {project_id}")
-            # logger.debug(f"delta_allocation: {delta_allocation}")
-            # logger.debug(f"effective_votes: {effective_votes}")
-            # logger.debug(f"voter_budgets: {voter_budgets}")
-            # logger.debug(f"previous_voter_budgets: {previous_voter_budgets}")
-            # logger.debug(f"project_payments: {project_payments}")
-
             tracker_callback(
                 project_id=project_id,
                 cost=delta_allocation,
                 effective_votes=effective_votes,
-                voter_budgets=voter_budgets,
-                previous_allocations=previous_voter_budgets.copy(),
-                payments_per_voter=project_payments
+                payments_per_voter=candidates_payments_per_voter[project_id],
+                voters=voters,
+                initial_voter_budget=initial_voter_budget,
+                new_run=round_index == 0,
             )
 
-            # Update previous budgets for next round
-            previous_voter_budgets = voter_budgets.copy()
-            remaining_budget -= delta_allocation
-
     logger.info("ESFB | winners_allocations: %s", winners_allocations)
     logger.info("ESFB | Cost for next increase: %s", updated_cost)
     return winners_allocations, updated_cost, candidates_payments_per_voter
@@ -0,0 +1,244 @@
+"""
+A prepared input of the algorithm.
+
+The input is cleaned once (zero bids and bids of unknown voters are removed)
+and kept as NumPy arrays, so it can be reused by several runs of the algorithm
+without parsing and copying the nested bids dicts again.
+"""
+
+import hashlib
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from src.algorithm.catalog import CostMinMax, ProjectCatalog
+
+
+@dataclass(frozen=True)
+class PreparedInstance:
+    """
+    The bids are stored in a compressed sparse row layout:
+    the positive bids for the project `project_ids[p]` are `bid_amounts[bid_offsets[p]:bid_offsets[p + 1]]`,
+    given by the voters `voter_ids[bid_voters[bid_offsets[p]:bid_offsets[p + 1]]]`.
+
+    The arrays should be treated as read-only, they may be shared between runs.
+
+    >>> instance = PreparedInstance.from_input(
+    ...     voters=[1, 2],
+    ...     cost_min_max=[{11: (200, 500)}, {12: (300, 300)}, {13: (100, 150)}],
+    ...     budget=900,
+    ...     bids={11: {1: 500, 2: 200}, 12: {1: 300, 2: 300}, 13: {1: 0, 2: 100, 3: 100}},
+    ... )
+    >>> instance.bids()
+    {11: {1: 500, 2: 200}, 12: {1: 300, 2: 300}, 13: {2: 100}}
+    >>> instance.projects_min_costs()
+    {11: 200, 12: 300, 13: 100}
+    >>> instance.cost_min_max()
+    [{11: (200, 500)}, {12: (300, 300)}, {13: (100, 150)}]
+    >>> instance.average_bids().tolist()
+    [350.0, 300.0, 50.0]
+    """
+
+    voter_ids: np.ndarray
+    project_ids: np.ndarray
+    min_costs: np.ndarray
+    max_costs: np.ndarray
+    budget: float
+    bid_offsets: np.ndarray
+    bid_voters: np.ndarray
+    bid_amounts: np.ndarray
+
+    @classmethod
+    def from_input(
+        cls,
+        voters: list[int],
+        cost_min_max: ProjectCatalog | CostMinMax,
+        budget: float,
+        bids: dict[int, dict[int, int]],
+    ) -> "PreparedInstance":
+        """Create a prepared instance from the input format of `min_max_equal_shares`."""
+        voter_positions = {voter_id: position for position, voter_id in enumerate(voters)}
+        catalog = ProjectCatalog.of(cost_min_max)
+
+        bid_offsets = [0]
+        bid_voters: list[int] = []
+        bid_amounts: list[int] = []
+        for project_id in catalog:
+            for voter_id, amount in bids.get(project_id, {}).items():
+                if amount > 0 and voter_id in voter_positions:
+                    bid_voters.append(voter_positions[voter_id])
+                    bid_amounts.append(amount)
+            bid_offsets.append(len(bid_voters))
+
+        return cls(
+            voter_ids=np.asarray(voters, dtype=np.int64),
+            project_ids=catalog.project_ids,
+            min_costs=catalog.min_costs,
+            max_costs=catalog.max_costs,
+            budget=budget,
+            bid_offsets=np.asarray(bid_offsets, dtype=np.int64),
+            bid_voters=np.asarray(bid_voters, dtype=np.int64),
+            bid_amounts=np.asarray(bid_amounts, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        voter_ids: np.ndarray,
+        cost_min_max: ProjectCatalog | CostMinMax,
+        budget: float,
+        row_voters: np.ndarray,
+        row_projects: np.ndarray,
+        row_amounts: np.ndarray,
+    ) -> "PreparedInstance":
+        """
+        Create a prepared instance from bids in rows: the voter (a position in `voter_ids`),
+        the project id and the amount of every bid, without building the nested bids dicts.
+        Zero bids and bids for unknown projects are removed, the bids of a project keep the order of the rows.
+
+        >>> PreparedInstance.from_rows(
+        ...     voter_ids=np.array([1, 2]),
+        ...     cost_min_max=[{11: (200, 500)}, {12: (300, 300)}],
+        ...     budget=900,
+        ...     row_voters=np.array([0, 0, 1, 1, 1]),
+        ...     row_projects=np.array([12, 11, 11, 12, 13]),
+        ...     row_amounts=np.array([300, 500, 200, 0, 100]),
+        ... ).bids()
+        {11: {1: 500, 2: 200}, 12: {1: 300}}
+        """
+        catalog = ProjectCatalog.of(cost_min_max)
+        positions = catalog.positions(row_projects)
+        row_amounts = np.asarray(row_amounts, dtype=np.int64)
+
+        rows = np.flatnonzero((positions >= 0) & (row_amounts > 0))
+        rows = rows[np.argsort(positions[rows], kind="stable")]
+        supporters = np.bincount(positions[rows], minlength=len(catalog))
+
+        return cls(
+            voter_ids=np.asarray(voter_ids, dtype=np.int64),
+            project_ids=catalog.project_ids,
+            min_costs=catalog.min_costs,
+            max_costs=catalog.max_costs,
+            budget=budget,
+            bid_offsets=np.concatenate(([0], np.cumsum(supporters))).astype(np.int64),
+            bid_voters=np.asarray(row_voters, dtype=np.int64)[rows],
+            bid_amounts=row_amounts[rows],
+        )
+
+    def voters(self) -> list[int]:
+        return self.voter_ids.tolist()
+
+    def bids(self) -> dict[int, dict[int, int]]:
+        """Build a new nested bids dict (project -> voter -> bid), only positive bids are included."""
+        voter_ids = self.voter_ids[self.bid_voters].tolist()
+        amounts = self.bid_amounts.tolist()
+        offsets = self.bid_offsets.tolist()
+
+        bids: dict[int, dict[int, int]] = {}
+        for i, project_id in enumerate(self.project_ids.tolist()):
+            start, end = offsets[i], offsets[i + 1]
+            bids[project_id] = dict(zip(voter_ids[start:end], amounts[start:end]))
+        return bids
+
+    def projects_min_costs(self) -> dict[int, int]:
+        return dict(zip(self.project_ids.tolist(), self.min_costs.tolist()))
+
+    def projects_max_costs(self) -> dict[int, int]:
+        return dict(zip(self.project_ids.tolist(), self.max_costs.tolist()))
+
+    def catalog(self) -> ProjectCatalog:
+        """The project catalog of the instance, sharing the cost arrays."""
+        return ProjectCatalog(self.project_ids, self.min_costs, self.max_costs)
+
+    def cost_min_max(self) -> CostMinMax:
+        return self.catalog().cost_min_max()
+
+    def supporters_count(self) -> np.ndarray:
+        """Number of voters with a positive bid for each project, in the order of `project_ids`."""
+        return np.diff(self.bid_offsets)
+
+    def validate(self) -> None:
+        """
+        Check the arrays in bulk, raises ValueError if they do not describe a valid instance:
+        unique voter and project ids, 0 <= min cost <= max cost, consistent bid offsets,
+        positive bids of known voters, and at most one bid per voter for each project.
+        """
+        for name in ("voter_ids", "project_ids", "min_costs", "max_costs", "bid_offsets", "bid_voters", "bid_amounts"):
+            array = getattr(self, name)
+            if array.ndim != 1 or not np.issubdtype(array.dtype, np.integer):
+                raise ValueError(f"{name} must be a one-dimensional integer array")
+
+        projects_count = len(self.project_ids)
+        voters_count = len(self.voter_ids)
+        bids_count = len(self.bid_amounts)
+
+        if voters_count == 0:
+            raise ValueError("There must be at least one voter")
+        if not self.budget > 0:
+            raise ValueError("The budget must be positive")
+        if len(self.min_costs) != projects_count or len(self.max_costs) != projects_count:
+            raise ValueError("min_costs and max_costs must have one value per project")
+        if len(self.bid_offsets) != projects_count + 1 or len(self.bid_voters) != bids_count:
+            raise ValueError("bid_offsets must have projects + 1 values, and bid_voters one value per bid")
+        if len(np.unique(self.voter_ids)) != voters_count:
+            raise ValueError("voter_ids must be unique")
+        if len(np.unique(self.project_ids)) != projects_count:
+            raise ValueError("project_ids must be unique")
+        if np.any(self.min_costs < 0) or np.any(self.min_costs > self.max_costs):
+            raise ValueError("Costs must satisfy 0 <= min_cost <= max_cost")
+        if self.bid_offsets[0] != 0 or self.bid_offsets[-1] != bids_count or np.any(np.diff(self.bid_offsets) < 0):
+            raise ValueError("bid_offsets must be non-decreasing, from 0 to the number of bids")
+        if bids_count == 0:
+            return
+
+        if self.bid_voters.min() < 0 or self.bid_voters.max() >= voters_count:
+            raise ValueError("bid_voters must be positions in voter_ids")
+        if self.bid_amounts.min() <= 0:
+            raise ValueError("bid_amounts must be positive")
+
+        # Write the index of every bid of a project at its voter, a repeated voter reads back a different index
+        bid_indexes = np.zeros(voters_count, dtype=np.int64)
+        offsets = self.bid_offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            project_voters = self.bid_voters[start:end]
+            bid_indexes[project_voters] = np.arange(start, end)
+            if np.any(bid_indexes[project_voters] != np.arange(start, end)):
+                raise ValueError("A voter can have at most one bid for each project")
+
+    def fingerprint(self) -> str:
+        """A hash of the budget and the arrays, equal for instances of the same input."""
+        digest = hashlib.sha256(repr(float(self.budget)).encode())
+        for array in (
+            self.voter_ids,
+            self.project_ids,
+            self.min_costs,
+            self.max_costs,
+            self.bid_offsets,
+            self.bid_voters,
+            self.bid_amounts,
+        ):
+            digest.update(len(array).to_bytes(8, "little"))
+            digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+        return digest.hexdigest()
+
+    def bid_projects(self) -> np.ndarray:
+        """The position (in `project_ids`) of the project of every bid, aligned with `bid_amounts`."""
+        return np.repeat(np.arange(len(self.project_ids)), np.diff(self.bid_offsets))
+
+    def average_bids(self) -> np.ndarray:
+        """The sum of the bids of each project divided by the number of voters, in the order of `project_ids`."""
+        sums = np.bincount(self.bid_projects(), weights=self.bid_amounts, minlength=len(self.project_ids))
+        return sums / len(self.voter_ids)
+
+    def select_bids(self, keep: np.ndarray, bid_amounts: np.ndarray) -> "PreparedInstance":
+        """
+        Create an instance with only the bids where `keep` is True, with their amounts taken from `bid_amounts`.
+        Both arrays are aligned with the bids of this instance.
+        """
+        kept_per_project = np.bincount(self.bid_projects()[keep], minlength=len(self.project_ids))
+        return replace(
+            self,
+            bid_offsets=np.concatenate(([0], np.cumsum(kept_per_project))).astype(np.int64),
+            bid_voters=self.bid_voters[keep],
+            bid_amounts=bid_amounts[keep],
+        )
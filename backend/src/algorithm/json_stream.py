@@ -0,0 +1,248 @@
+"""
+Streaming ingest of the input JSON of the algorithm (the format of `PublicEqualSharesInput`).
+
+The file is read in chunks, and the bids are decoded one project at a time and appended
+to compact integer arrays, so the whole document is never held as Python objects.
+The peak memory stays near the size of the final `PreparedInstance` arrays,
+plus the bids of a single project.
+"""
+
+import json
+from array import array
+from typing import IO, Any, Iterator
+
+import numpy as np
+
+from src.algorithm.catalog import ProjectCatalog
+from src.algorithm.instance import PreparedInstance
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = " \t\n\r"
+
+
+class _JsonReader:
+    """
+    A minimal incremental JSON reader: it walks the objects of the document,
+    and decodes the values that the caller asks for with the C decoder of the json module.
+    """
+
+    def __init__(self, f: IO[str], chunk_size: int) -> None:
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Read the next chunk, returns False at the end of the file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or an empty string at the end of the file."""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer) or not self._fill():
+                return self._buffer[self._position:self._position + 1]
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON: expected '{char}', found '{found}'")
+        self._position += 1
+
+    def value(self) -> Any:
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError as e:
+                # The value may continue in the next chunk
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON: {e.msg}") from e
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+
+            self._position = end
+            return value
+
+    def object_keys(self) -> Iterator[str]:
+        """Iterate the keys of the next object, the caller must consume the value of each key."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._position += 1
+            return
+
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("Invalid JSON: object keys must be strings")
+            self.expect(":")
+            yield key
+
+            if self.peek() == ",":
+                self._position += 1
+                continue
+            self.expect("}")
+            return
+
+
+def _as_int_array(values: list, name: str) -> np.ndarray:
+    """Convert decoded JSON numbers to an int64 array, like the int fields of the pydantic input."""
+    result = np.asarray(values)
+    if result.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if np.issubdtype(result.dtype, np.integer):
+        return result.astype(np.int64, copy=False)
+    if np.issubdtype(result.dtype, np.floating) and np.all(np.mod(result, 1) == 0):
+        return result.astype(np.int64)
+    raise ValueError(f"{name} must be integers")
+
+
+def _as_int(value: Any, name: str) -> int:
+    """Convert a decoded JSON number to an int, integral floats are accepted like in the pydantic input."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"{name} must be integers")
+
+
+class _BidsBuilder:
+    """
+    Collects the bids of the projects into the CSR arrays of PreparedInstance.
+
+    When the voters and the projects are already known (they come before the bids in the
+    exported files), the bids of each project are resolved to voter positions as they are read,
+    and only the kept bids are stored. Otherwise the bids are kept as read, and resolved at the end.
+    """
+
+    def __init__(self) -> None:
+        self.voter_ids: np.ndarray | None = None
+        self.catalog: ProjectCatalog | None = None
+        self._sorted_voter_ids = np.zeros(0, dtype=np.int64)
+        self._voters_order = np.zeros(0, dtype=np.int64)
+
+        self._bid_voters = array("q")
+        self._bid_amounts = array("q")
+        # project position -> (start, end) in the bid arrays, the last bids of a project replace earlier ones
+        self._segments: dict[int, tuple[int, int]] = {}
+        self._pending: list[tuple[int, np.ndarray, np.ndarray]] = []
+
+    def set_voters(self, voter_ids: np.ndarray) -> None:
+        self.voter_ids = voter_ids
+        self._voters_order = np.argsort(voter_ids, kind="stable")
+        self._sorted_voter_ids = voter_ids[self._voters_order]
+
+    def add_project(self, project_id: int, voter_ids: np.ndarray, amounts: np.ndarray) -> None:
+        if self.voter_ids is None or self.catalog is None:
+            self._pending.append((project_id, voter_ids, amounts))
+            return
+
+        if project_id not in self.catalog:
+            return
+
+        voter_positions, known = self._voter_positions(voter_ids)
+        keep = known & (amounts > 0)
+
+        start = len(self._bid_amounts)
+        self._bid_voters.extend(voter_positions[keep].tolist())
+        self._bid_amounts.extend(amounts[keep].tolist())
+        self._segments[self.catalog.position(project_id)] = (start, len(self._bid_amounts))
+
+    def _voter_positions(self, voter_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The positions of the voters in `voter_ids`, and a mask of the voters that are known."""
+        if len(self._sorted_voter_ids) == 0:
+            return np.zeros(len(voter_ids), dtype=np.int64), np.zeros(len(voter_ids), dtype=bool)
+
+        found_at = np.minimum(np.searchsorted(self._sorted_voter_ids, voter_ids), len(self._sorted_voter_ids) - 1)
+        return self._voters_order[found_at], self._sorted_voter_ids[found_at] == voter_ids
+
+    def build(self, budget: int) -> PreparedInstance:
+        if self.voter_ids is None or self.catalog is None:
+            raise ValueError("The input must have voters, cost_min_max, budget and bids")
+
+        pending, self._pending = self._pending, []
+        for project_id, voter_ids, amounts in pending:
+            self.add_project(project_id, voter_ids, amounts)
+
+        bid_voters = np.frombuffer(self._bid_voters, dtype=np.int64) if self._bid_voters else np.zeros(0, np.int64)
+        bid_amounts = np.frombuffer(self._bid_amounts, dtype=np.int64) if self._bid_amounts else np.zeros(0, np.int64)
+
+        projects_count = len(self.catalog.project_ids)
+        segments = [self._segments.get(position, (0, 0)) for position in range(projects_count)]
+        bids_per_project = np.array([end - start for start, end in segments], dtype=np.int64)
+        bid_offsets = np.concatenate(([0], np.cumsum(bids_per_project))).astype(np.int64)
+
+        # The arrays are used as they are when the projects were read in the order of the catalog
+        if bid_offsets[-1] != len(bid_amounts) or any(start != offset for (start, _), offset in zip(segments, bid_offsets)):
+            bid_voters = np.concatenate([bid_voters[start:end] for start, end in segments] or [bid_voters[:0]])
+            bid_amounts = np.concatenate([bid_amounts[start:end] for start, end in segments] or [bid_amounts[:0]])
+
+        return PreparedInstance(
+            voter_ids=self.voter_ids,
+            project_ids=self.catalog.project_ids,
+            min_costs=self.catalog.min_costs,
+            max_costs=self.catalog.max_costs,
+            budget=budget,
+            bid_offsets=bid_offsets,
+            bid_voters=bid_voters,
+            bid_amounts=bid_amounts,
+        )
+
+
+def load_instance_json(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> PreparedInstance:
+    """
+    Load an input JSON file of the run-algorithm command as a `PreparedInstance`.
+    Zero bids and bids of unknown voters or projects are removed, like in `PreparedInstance.from_input`.
+    """
+    builder = _BidsBuilder()
+    budget: int | None = None
+
+    with open(path, "r") as f:
+        reader = _JsonReader(f, chunk_size)
+        for key in reader.object_keys():
+            if key == "voters":
+                builder.set_voters(_as_int_array(reader.value(), "voters"))
+            elif key == "cost_min_max":
+                builder.catalog = ProjectCatalog.from_cost_min_max(
+                    [
+                        {int(project_id): (_as_int(min_cost, "cost_min_max"), _as_int(max_cost, "cost_min_max"))}
+                        for entry in reader.value()
+                        for project_id, (min_cost, max_cost) in entry.items()
+                    ]
+                )
+            elif key == "budget":
+                budget = _as_int(reader.value(), "budget")
+            elif key == "bids":
+                for project_key in reader.object_keys():
+                    project_bids = reader.value()
+                    if not isinstance(project_bids, dict):
+                        raise ValueError("bids must map each project to an object of voter bids")
+
+                    voter_ids = np.fromiter(map(int, project_bids.keys()), dtype=np.int64, count=len(project_bids))
+                    amounts = _as_int_array(list(project_bids.values()), "bids")
+                    builder.add_project(int(project_key), voter_ids, amounts)
+            else:
+                reader.value()
+
+        if reader.peek() != "":
+            raise ValueError("Invalid JSON: extra data after the document")
+
+    if budget is None:
+        raise ValueError("The input must have voters, cost_min_max, budget and bids")
+    return builder.build(budget)
@@ -10,7 +10,7 @@ from pabutools.rules import BudgetAllocation
 from pabutools.rules.mes.mes_details import MESAllocationDetails, MESIteration, MESProjectDetails
 
 from src.algorithm.equal_shares import equal_shares
-from src.algorithm.mes_visualization.tracker import RoundInfo, MESTracker
+from src.algorithm.mes_visualization.tracker import RoundInfo, MESTracker, StreamingMESTracker
 from src.logger import get_logger, LoggerName
 
 logger = get_logger(LoggerName.ALGORITHM)
@@ -52,6 +52,9 @@ def create_mes_iteration(round_info: RoundInfo, instance: Instance, profile: Abs
         
         # Create map of project IDs to actual Project instances
         project_map = {p.name: p for p in instance}
+
+        # The round keeps arrays, build each dict view once for this iteration
+        round_effective_votes = round_info.effective_votes
         
         # Set supporter indices and project details for ALL projects
         for proj in instance:
@@ -65,7 +68,7 @@ def create_mes_iteration(round_info: RoundInfo, instance: Instance, profile: Abs
             
             # Set effective votes and affordability for all projects
             proj_name = str(proj.name)
-            effective_votes = round_info.effective_votes.get(proj_name, 0.0)
+            effective_votes = round_effective_votes.get(proj_name, 0.0)
             
             # Apply to both Project and ProjectDetails objects
             for target in [proj, proj_details]:
@@ -88,17 +91,19 @@ def create_mes_iteration(round_info: RoundInfo, instance: Instance, profile: Abs
         iteration.selected_project = delta_project
         
         # Set budget information
+        previous_allocations = round_info.previous_allocations
         iteration.voters_budget = []
         for voter_idx in range(voters_count):
             voter_id = voter_idx + 1
-            budget = round_info.previous_allocations.get(voter_id, initial_voter_budget)
+            budget = previous_allocations.get(voter_id, initial_voter_budget)
             iteration.voters_budget.append(budget)
         
         # After selection state
+        voter_budgets = round_info.voter_budgets
         iteration.voters_budget_after_selection = []
         for voter_idx in range(voters_count):
             voter_id = voter_idx + 1
-            budget = round_info.voter_budgets.get(voter_id, 0)
+            budget = voter_budgets.get(voter_id, 0)
             iteration.voters_budget_after_selection.append(budget)
 
         return iteration
@@ -152,14 +157,34 @@ def method_of_equal_shares(
     sat_class: Optional[type] = None,
     analytics: bool = False,
     verbose: bool = False,
+    stream_rounds: bool = True,
     **kwargs
 ) -> BudgetAllocation:
-    """Run MES algorithm and create visualization data."""
+    """Run MES algorithm and create visualization data.
+
+    With stream_rounds the tracked rounds are spilled to a temporary file and
+    read back one at a time, instead of being kept in memory.
+    """
     # Convert input
     input_data = convert_pabutools_input(instance, profile)
     
     # Create tracker to collect round information
-    tracker = MESTracker()
+    tracker = StreamingMESTracker() if stream_rounds else MESTracker()
+    try:
+        return _run_method_of_equal_shares(instance, profile, input_data, tracker, analytics)
+    finally:
+        if isinstance(tracker, StreamingMESTracker):
+            tracker.close()
+
+
+def _run_method_of_equal_shares(
+    instance: Instance,
+    profile: AbstractProfile,
+    input_data: MESInput,
+    tracker: MESTracker | StreamingMESTracker,
+    analytics: bool,
+) -> BudgetAllocation:
+    """Run our MES with the given tracker and build the pabutools allocation from its rounds."""
     # logger.debug("Created tracker")
 
     # Run algorithm and get final winners
@@ -183,7 +208,7 @@ def method_of_equal_shares(
         
         # Create iterations from tracker rounds
         project_iterations = []
-        for round_info in tracker.rounds:
+        for round_info in tracker.iter_rounds():
             iteration = create_mes_iteration(round_info, instance, profile)
             if iteration is not None:
                 project_iterations.append(iteration)
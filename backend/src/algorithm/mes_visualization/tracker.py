@@ -1,85 +1,304 @@
-from dataclasses import dataclass
-from typing import Dict, Optional
+import json
+import os
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
 from src.logger import get_logger, LoggerName
 
 logger = get_logger(LoggerName.ALGORITHM)
 
-@dataclass
+
+class RoundsLayout:
+    """Order of the voters and projects, shared by all the rounds of a tracker."""
+
+    __slots__ = ("voter_ids", "voter_positions", "project_ids")
+
+    def __init__(self, voter_ids: List[int], project_ids: List[str]):
+        self.voter_ids = voter_ids
+        self.voter_positions = {voter_id: position for position, voter_id in enumerate(voter_ids)}
+        self.project_ids = project_ids
+
+    def payments_to_arrays(self, payments_per_voter: Dict[int, float]) -> tuple[np.ndarray, np.ndarray]:
+        """Convert payments of voters to arrays of voter positions and amounts."""
+        payers = np.fromiter(
+            (self.voter_positions[voter_id] for voter_id in payments_per_voter),
+            dtype=np.int64,
+            count=len(payments_per_voter),
+        )
+        payments = np.fromiter(payments_per_voter.values(), dtype=np.float64, count=len(payments_per_voter))
+        return payers, payments
+
+
 class RoundInfo:
-    """Information about a single round of the MES algorithm."""
-    selected_project: int
-    cost: float
-    effective_votes: Dict[str, float]
-    voter_budgets: Dict[int, float]
-    previous_allocations: Dict[int, float]  # Budget states before this round
-    payments_per_voter: Dict[int, float]    # What each voter paid this round
+    """Information about a single round of the MES algorithm.
+
+    The per-voter and per-project values are NumPy arrays in the order of the shared layout.
+    The dict views (voter_budgets, previous_allocations, ...) are built only when accessed.
+    """
+
+    __slots__ = (
+        "selected_project",
+        "cost",
+        "layout",
+        "effective_votes_array",
+        "voter_budgets_array",
+        "previous_budgets_array",
+        "payers_array",
+        "payments_array",
+    )
+
+    def __init__(self,
+                 selected_project: int,
+                 cost: float,
+                 layout: RoundsLayout,
+                 effective_votes_array: np.ndarray,
+                 voter_budgets_array: np.ndarray,
+                 previous_budgets_array: np.ndarray,  # Budget states before this round
+                 payers_array: np.ndarray,  # Positions of the voters that paid this round
+                 payments_array: np.ndarray):  # What each of them paid this round
+        self.selected_project = selected_project
+        self.cost = cost
+        self.layout = layout
+        self.effective_votes_array = effective_votes_array
+        self.voter_budgets_array = voter_budgets_array
+        self.previous_budgets_array = previous_budgets_array
+        self.payers_array = payers_array
+        self.payments_array = payments_array
+
+    @property
+    def effective_votes(self) -> Dict[str, float]:
+        return dict(zip(self.layout.project_ids, self.effective_votes_array.tolist()))
+
+    @property
+    def voter_budgets(self) -> Dict[int, float]:
+        return dict(zip(self.layout.voter_ids, self.voter_budgets_array.tolist()))
+
+    @property
+    def previous_allocations(self) -> Dict[int, float]:
+        return dict(zip(self.layout.voter_ids, self.previous_budgets_array.tolist()))
+
+    @property
+    def payments_per_voter(self) -> Dict[int, float]:
+        voter_ids = self.layout.voter_ids
+        return {voter_ids[position]: payment for position, payment in zip(
+            self.payers_array.tolist(), self.payments_array.tolist()
+        )}
 
     def __str__(self) -> str:
         return (f"Round(project={self.selected_project}, "
-                f"cost={self.cost}, votes={len(self.effective_votes)})")
+                f"cost={self.cost}, votes={len(self.effective_votes_array)})")
+
+
+def _apply_payments(previous_budgets: np.ndarray, payers: np.ndarray, payments: np.ndarray) -> np.ndarray:
+    voter_budgets = previous_budgets.copy()
+    voter_budgets[payers] -= payments
+    return voter_budgets
+
 
 class MESTracker:
     """Tracks rounds of the MES algorithm for visualization."""
-    
+
     def __init__(self):
         self.rounds: list[RoundInfo] = []
         self.total_allocations: Dict[int, float] = {}
-        self.current_voter_budgets: Dict[int, float] = {}
-        self.previous_allocations: Dict[int, float] = {}  # Track previous state
+        self._layout: Optional[RoundsLayout] = None
+        self._current_budgets: Optional[np.ndarray] = None
+        self._last_effective_votes: Optional[Dict[str, float]] = None
+        self._effective_votes_array: np.ndarray = np.zeros(0)
         # logger.debug("Initialized MESTracker")
 
-    def __call__(self, 
-                 project_id: int, 
-                 cost: float, 
+    def __call__(self,
+                 project_id: int,
+                 cost: float,
                  effective_votes: Dict[str, float],
-                 voter_budgets: Dict[int, float],
                  payments_per_voter: Dict[int, float],
-                 previous_allocations: Optional[Dict[int, float]] = None) -> None:
+                 voters: List[int],
+                 initial_voter_budget: float,
+                 new_run: bool) -> None:
         """Callback function for the MES algorithm to track rounds.
-        
+
+        The algorithm reports only what changed in each round (the payments),
+        and the tracker applies them to the voter budgets of the previous round.
+
         Args:
             project_id: ID of the selected project
             cost: Cost allocated to the project
-            effective_votes: Dict mapping project IDs to their effective votes
-            voter_budgets: Dict mapping voter IDs to their remaining budgets
+            effective_votes: Dict mapping project IDs to their effective votes, shared between rounds
             payments_per_voter: Dict mapping voter IDs to their payments for this project
-            previous_allocations: Optional dict of voter budgets before this round
+            voters: List of all voter IDs
+            initial_voter_budget: Budget of each voter at the start of the current run
+            new_run: True for the first round of a new fixed-budget run, the budgets are reset
         """
         # logger.debug(f"MESTracker receiving round:")
         # logger.debug(f"Project ID: {project_id}")
         # logger.debug(f"Cost: {cost}")
-        # logger.debug(f"Effective votes: {effective_votes}")
         # logger.debug(f"Payments per voter: {payments_per_voter}")
         # logger.debug(f"Current rounds count: {len(self.rounds)}")
 
         # Update total allocations
-        if project_id not in self.total_allocations:
-            self.total_allocations[project_id] = 0
         self.total_allocations[project_id] = cost
 
-        # Update current voter budgets
-        self.current_voter_budgets = voter_budgets.copy()
-        
-        # Use provided previous allocations or current tracked state
-        if previous_allocations is None:
-            previous_allocations = self.previous_allocations.copy()
-        
+        if self._layout is None:
+            self._layout = RoundsLayout(list(voters), list(effective_votes.keys()))
+        if effective_votes is not self._last_effective_votes:
+            self._effective_votes_array = np.array(
+                [effective_votes.get(pid, 0.0) for pid in self._layout.project_ids], dtype=np.float64
+            )
+            self._last_effective_votes = effective_votes
+
+        # Budget states before this round
+        if new_run or self._current_budgets is None:
+            previous_budgets = np.full(len(self._layout.voter_ids), initial_voter_budget, dtype=np.float64)
+        else:
+            previous_budgets = self._current_budgets
+
+        # Apply the payments of this round, the previous state is kept as is for the previous round
+        payers, payments = self._layout.payments_to_arrays(payments_per_voter)
+        voter_budgets = _apply_payments(previous_budgets, payers, payments)
+
         # Create round info
         round_info = RoundInfo(
             selected_project=project_id,
             cost=cost,
-            effective_votes=effective_votes,
-            voter_budgets=self.current_voter_budgets.copy(),
-            previous_allocations=previous_allocations,
-            payments_per_voter=payments_per_voter
+            layout=self._layout,
+            effective_votes_array=self._effective_votes_array,
+            voter_budgets_array=voter_budgets,
+            previous_budgets_array=previous_budgets,
+            payers_array=payers,
+            payments_array=payments,
         )
-        
+
         self.rounds.append(round_info)
-        
-        # Update previous allocations for next round
-        self.previous_allocations = voter_budgets.copy()
-        
+        self._current_budgets = voter_budgets
+
         # logger.debug(f"Total rounds after append: {len(self.rounds)}")
-    
+
+    @property
+    def current_voter_budgets(self) -> Dict[int, float]:
+        """The voter budgets after the last tracked round."""
+        if self._layout is None or self._current_budgets is None:
+            return {}
+        return dict(zip(self._layout.voter_ids, self._current_budgets.tolist()))
+
+    def iter_rounds(self) -> Iterator[RoundInfo]:
+        """Iterate the tracked rounds in order."""
+        return iter(self.rounds)
+
     def __len__(self) -> int:
         return len(self.rounds)
+
+
+class StreamingMESTracker:
+    """Tracks rounds of the MES algorithm like MESTracker, but spills them to an NDJSON file.
+
+    Each round is appended as one JSON line holding only the payments of that round,
+    so memory does not grow with the number of rounds. The voter budgets are rebuilt
+    from the payments while the rounds are read back with iter_rounds.
+    The voters list and the effective votes are written only when they change.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: File to write the rounds to. If None, a temporary file is used
+                  and removed when the tracker is closed.
+        """
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="mes-rounds-", suffix=".ndjson")
+            os.close(fd)
+
+        self.path: str = path
+        self.total_allocations: Dict[int, float] = {}
+        self._file = open(path, "w", encoding="utf-8")
+        self._rounds_count = 0
+        self._last_voters: Optional[List[int]] = None
+        self._last_effective_votes: Optional[Dict[str, float]] = None
+
+    def __call__(self,
+                 project_id: int,
+                 cost: float,
+                 effective_votes: Dict[str, float],
+                 payments_per_voter: Dict[int, float],
+                 voters: List[int],
+                 initial_voter_budget: float,
+                 new_run: bool) -> None:
+        """Callback function for the MES algorithm, same arguments as MESTracker.__call__."""
+        self.total_allocations[project_id] = cost
+
+        record: dict = {
+            "project": project_id,
+            "cost": cost,
+            "payers": list(payments_per_voter.keys()),
+            "payments": list(payments_per_voter.values()),
+        }
+        if voters is not self._last_voters:
+            record["voters"] = list(voters)
+            self._last_voters = voters
+        if new_run or self._rounds_count == 0:
+            record["initial_voter_budget"] = initial_voter_budget
+        if effective_votes is not self._last_effective_votes:
+            record["effective_votes"] = effective_votes
+            self._last_effective_votes = effective_votes
+
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._rounds_count += 1
+
+    def iter_rounds(self) -> Iterator[RoundInfo]:
+        """Read the rounds back lazily, one RoundInfo at a time."""
+        self._file.flush()
+
+        layout: Optional[RoundsLayout] = None
+        effective_votes_array: np.ndarray = np.zeros(0)
+        previous_budgets: np.ndarray = np.zeros(0)
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if "voters" in record:
+                    project_ids = layout.project_ids if layout is not None else []
+                    layout = RoundsLayout(record["voters"], project_ids)
+                assert layout is not None
+                if "effective_votes" in record:
+                    if not layout.project_ids:
+                        layout.project_ids = list(record["effective_votes"].keys())
+                    effective_votes_array = np.array(
+                        [record["effective_votes"].get(pid, 0.0) for pid in layout.project_ids], dtype=np.float64
+                    )
+                if "initial_voter_budget" in record:
+                    previous_budgets = np.full(
+                        len(layout.voter_ids), record["initial_voter_budget"], dtype=np.float64
+                    )
+
+                payers, payments = layout.payments_to_arrays(dict(zip(record["payers"], record["payments"])))
+                voter_budgets = _apply_payments(previous_budgets, payers, payments)
+
+                yield RoundInfo(
+                    selected_project=record["project"],
+                    cost=record["cost"],
+                    layout=layout,
+                    effective_votes_array=effective_votes_array,
+                    voter_budgets_array=voter_budgets,
+                    previous_budgets_array=previous_budgets,
+                    payers_array=payers,
+                    payments_array=payments,
+                )
+                previous_budgets = voter_budgets
+
+    def close(self) -> None:
+        """Close the file, and remove it if it is a temporary file."""
+        if not self._file.closed:
+            self._file.close()
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> "StreamingMESTracker":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._rounds_count
@@ -0,0 +1,169 @@
+"""
+Plots of the results of the algorithm, rendered to files outside of the algorithm call.
+
+The algorithm functions return their results, and the plots are rendered afterwards
+by a `BidPlotRenderer` in a background thread. The renderer is headless (it draws on a
+matplotlib Figure without pyplot, so no window is opened), and matplotlib is imported
+only by the background thread, when the first plot is rendered.
+
+Every plot is cached by a hash of the plotted results, the same results are rendered only once.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any
+
+from src.algorithm.catalog import CostMinMax, ProjectCatalog
+from src.logger import LoggerName, get_logger
+
+logger = get_logger(LoggerName.ALGORITHM)
+
+PLOT_FORMATS = ("png", "svg")
+
+
+def bid_plot_values(
+    cost_min_max: ProjectCatalog | CostMinMax,
+    average_bids: dict[int, float],
+    winners_allocations: dict[int, int],
+) -> list[tuple[int, list[tuple[str, float, str]]]]:
+    """
+    The bars of every project: (project_id, [(label, value, color), ...]), the bars sorted by value.
+
+    >>> bid_plot_values([{11: (200, 500)}], {11: 350.0}, {11: 500})
+    [(11, [('Cost Min', 200, 'red'), ('Average Bids', 350.0, 'blue'), ('Winners Allocations', 500, 'green'), \
+('Cost Max', 500, 'orange')])]
+    """
+    catalog = ProjectCatalog.of(cost_min_max)
+
+    projects_values = []
+    for project_id, cost_min, cost_max in zip(
+        catalog.project_ids.tolist(), catalog.min_costs.tolist(), catalog.max_costs.tolist()
+    ):
+        values = [
+            ("Average Bids", average_bids.get(project_id, 0.0), "blue"),
+            ("Winners Allocations", winners_allocations.get(project_id, 0), "green"),
+            ("Cost Min", cost_min, "red"),
+            ("Cost Max", cost_max, "orange"),
+        ]
+        projects_values.append((project_id, sorted(values, key=lambda x: x[1])))
+    return projects_values
+
+
+def draw_bid_data(ax: Any, projects_values: list[tuple[int, list[tuple[str, float, str]]]]) -> None:
+    """Draw the stacked bars of `bid_plot_values` on a matplotlib Axes."""
+    # Bar width
+    bar_width = 0.5
+    # Small offset for equal values
+    small_offset = 0.001
+
+    for i, (project_id, values_sorted) in enumerate(projects_values):
+        # Plot the sorted bars, applying a small horizontal offset to distinguish equal values
+        cumulative_bottom = 0.0
+        last_value = None
+        for label, value, color in values_sorted:
+            if last_value is not None and value == last_value:
+                # Add small horizontal offset for equal values
+                value += small_offset
+            ax.bar(i, value, width=bar_width, label=label if i == 0 else "", color=color, bottom=cumulative_bottom)
+            cumulative_bottom += value
+            last_value = value
+
+    # Adding labels and title
+    ax.set_xlabel("Project ID")
+    ax.set_ylabel("Value")
+    ax.set_title("Bids, Winners Allocations, and Costs for Projects (Sorted and Offset for Equal Values)")
+    ax.set_xticks(range(len(projects_values)), [str(project_id) for project_id, _ in projects_values])
+    ax.legend()
+
+
+def bid_plot_hash(projects_values: list[tuple[int, list[tuple[str, float, str]]]], plot_format: str) -> str:
+    """A hash of the plotted values and the format, used as the cache key."""
+    payload = json.dumps([projects_values, plot_format], separators=(",", ":"), default=float)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_bid_plot(path: str, projects_values: list[tuple[int, list[tuple[str, float, str]]]]) -> str:
+    """Render the plot to a file, the format is taken from the extension of the path."""
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(10, 6))
+    draw_bid_data(figure.add_subplot(), projects_values)
+    figure.tight_layout()
+
+    # Write to a temporary file first, so a cached path always holds a complete plot
+    temp_path = f"{path}.tmp"
+    figure.savefig(temp_path, format=os.path.splitext(path)[1][1:])
+    os.replace(temp_path, path)
+    return path
+
+
+class BidPlotRenderer:
+    """
+    Renders plots of the results in a background thread, into `output_dir`.
+
+    Usage:
+        renderer = BidPlotRenderer("plots")
+        future = renderer.submit(cost_min_max, averages, winners_allocations)
+        ...
+        path = future.result()
+        renderer.close()
+    """
+
+    def __init__(self, output_dir: str, max_workers: int = 1) -> None:
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bid-plot")
+        self._lock = Lock()
+        self._in_flight: dict[str, Future[str]] = {}
+
+    def submit(
+        self,
+        cost_min_max: ProjectCatalog | CostMinMax,
+        average_bids: dict[int, float],
+        winners_allocations: dict[int, int],
+        plot_format: str = "png",
+    ) -> Future[str]:
+        """
+        Schedule rendering of the plot, returns a future of the path of the file.
+        If the same results were already rendered, the future is already done.
+        """
+        if plot_format not in PLOT_FORMATS:
+            raise ValueError(f"Unknown plot format: {plot_format}, expected one of {PLOT_FORMATS}")
+
+        projects_values = bid_plot_values(cost_min_max, average_bids, winners_allocations)
+        plot_hash = bid_plot_hash(projects_values, plot_format)
+        path = os.path.join(self.output_dir, f"bids-{plot_hash[:16]}.{plot_format}")
+
+        with self._lock:
+            future = self._in_flight.get(plot_hash)
+            if future is not None:
+                return future
+
+            if os.path.exists(path):
+                logger.debug("Bid plot cache hit: %s", path)
+                future = Future()
+                future.set_result(path)
+                return future
+
+            future = self._executor.submit(render_bid_plot, path, projects_values)
+            self._in_flight[plot_hash] = future
+
+        future.add_done_callback(lambda _: self._forget(plot_hash))
+        return future
+
+    def _forget(self, plot_hash: str) -> None:
+        with self._lock:
+            self._in_flight.pop(plot_hash, None)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the background thread, by default after all the scheduled plots are rendered."""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "BidPlotRenderer":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
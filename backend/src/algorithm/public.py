@@ -2,7 +2,12 @@ import time
 
 from pydantic import BaseModel
 
+from src.algorithm.catalog import ProjectCatalog
 from src.algorithm.computation import min_max_equal_shares
+from src.algorithm.instance import PreparedInstance
+from src.logger import LoggerName, get_logger
+
+logger = get_logger(LoggerName.ALGORITHM)
 
 
 class PublicEqualSharesInput(BaseModel):
@@ -11,13 +16,29 @@ class PublicEqualSharesInput(BaseModel):
     budget: int
     bids: dict[int, dict[int, int]]
 
+    def project_catalog(self) -> ProjectCatalog:
+        return ProjectCatalog.from_cost_min_max(self.cost_min_max)
+
+    def prepared_instance(self) -> PreparedInstance:
+        return PreparedInstance.from_input(self.voters, self.project_catalog(), self.budget, self.bids)
+
 
 class PublicEqualSharesResponse(BaseModel):
     results: dict[int, int]
 
 
 def public_equal_shares(data: PublicEqualSharesInput) -> PublicEqualSharesResponse:
-    results = _run_equal_shares(data.voters, data.cost_min_max, data.budget, data.bids)
+    results = _run_equal_shares(data.voters, data.project_catalog(), data.budget, data.bids)
+
+    # fix results and make them integers
+    results = {int(k): int(v) for k, v in results.items()}
+
+    return PublicEqualSharesResponse(results=results)
+
+
+def public_equal_shares_prepared(instance: PreparedInstance) -> PublicEqualSharesResponse:
+    """Same as public_equal_shares, for an input that is already prepared (e.g. loaded from a .npz file)."""
+    results = _run_equal_shares(instance.voters(), instance.catalog(), instance.budget, instance.bids())
 
     # fix results and make them integers
     results = {int(k): int(v) for k, v in results.items()}
@@ -26,35 +47,20 @@ def public_equal_shares(data: PublicEqualSharesInput) -> PublicEqualSharesRespon
 
 
 def _run_equal_shares(
-    voters: list[int], cost_min_max: list[dict[int, tuple[int, int]]], budget: int, bids: dict[int, dict[int, int]]
+    voters: list[int], catalog: ProjectCatalog, budget: float, bids: dict[int, dict[int, int]]
 ) -> dict[int, int]:
     start_time = time.time()
-    winners_allocations, candidates_payments_per_voter = min_max_equal_shares(voters, cost_min_max, budget, bids)
-    end_time = time.time()
-
-    # Calculate the elapsed time
-    elapsed_time = end_time - start_time
-    print(" T.0 result: ", winners_allocations)
-    print(candidates_payments_per_voter)
-    print(f"Function executed in {elapsed_time:.4f} seconds")
-    # Iterate over each entry in the bids dictionary
-    total_sum = 0
-    for bid in winners_allocations.values():
-        total_sum += bid  # Add the value where the key is 1
-    # Output the result
-    print("The sum of all Projects:", total_sum, ", budget - total = ", budget - total_sum)  # Record the end time
-    print("----------------------------------------------------------------------------------")
-    # Calculate the elapsed time
-    elapsed_time = end_time - start_time
-    print(" T.0 result: ", winners_allocations)
-    print(candidates_payments_per_voter)
-    print(f"Function executed in {elapsed_time:.4f} seconds")
-    # Iterate over each entry in the bids dictionary
-    total_sum = 0
-    for bid in winners_allocations.values():
-        total_sum += bid  # Add the value where the key is 1
-    # Output the result
-    print("The sum of all Projects:", total_sum, ", budget - total = ", budget - total_sum)  # Record the end time
-    print("----------------------------------------------------------------------------------")
+    winners_allocations, candidates_payments_per_voter = min_max_equal_shares(voters, catalog, budget, bids)
+    elapsed_time = time.time() - start_time
+
+    # The allocations and the payments may be very large, they are logged only at the debug level
+    logger.debug("result: %s", winners_allocations)
+    logger.debug("payments per voter: %s", candidates_payments_per_voter)
+
+    total_sum = sum(winners_allocations.values())
+    logger.info(
+        f"Function executed in {elapsed_time:.4f} seconds, "
+        f"the sum of all projects: {total_sum}, budget - total = {budget - total_sum}"
+    )
 
     return winners_allocations
@@ -0,0 +1,149 @@
+"""
+Run several variants ("scenarios") of the algorithm on the same prepared instance,
+and compare their results in one table.
+
+The scenarios run in parallel processes. The prepared instance is published once to shared
+memory, each worker process attaches to it when it starts, and then only the small scenario
+descriptions are sent to it.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from enum import StrEnum
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from src.algorithm.average_first import average_first_prepared
+from src.algorithm.equal_shares import CONTINUOUS_COST, equal_shares
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.shared_instance import SharedInstanceSpec, attach_instance, share_instance
+
+
+class ScenarioAlgorithm(StrEnum):
+    AVERAGES = "averages"
+    EQUAL_SHARES = "equal_shares"
+    AVERAGE_FIRST = "average_first"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    A variant of the algorithm to run on the prepared instance.
+
+    Args:
+        name: the name of the column in the comparison table
+        algorithm: which algorithm to run
+        min_cost_factor: the minimum cost of each project is multiplied by this factor,
+                         costs that become smaller than CONTINUOUS_COST are set to CONTINUOUS_COST
+        budget: overrides the budget of the instance
+    """
+
+    name: str
+    algorithm: ScenarioAlgorithm = ScenarioAlgorithm.EQUAL_SHARES
+    min_cost_factor: float = 1.0
+    budget: float | None = None
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    name: str
+    allocations: dict[int, float]
+    elapsed_time: float
+
+
+def run_scenario(instance: PreparedInstance, scenario: Scenario) -> ScenarioResult:
+    """Run a single scenario on the instance, in the current process."""
+    start_time = time.time()
+
+    if scenario.budget is not None:
+        instance = replace(instance, budget=scenario.budget)
+    if scenario.min_cost_factor != 1.0:
+        instance = replace(
+            instance, min_costs=np.maximum(instance.min_costs * scenario.min_cost_factor, CONTINUOUS_COST)
+        )
+
+    allocations: dict[int, float]
+    if scenario.algorithm == ScenarioAlgorithm.AVERAGES:
+        allocations = dict(zip(instance.project_ids.tolist(), instance.average_bids().tolist()))
+    elif scenario.algorithm == ScenarioAlgorithm.EQUAL_SHARES:
+        winners_allocations, _ = equal_shares(
+            instance.voters(), instance.projects_min_costs(), instance.budget, instance.bids(), validate_bids=False
+        )
+        allocations = dict(winners_allocations)
+    elif scenario.algorithm == ScenarioAlgorithm.AVERAGE_FIRST:
+        winners_allocations, _ = average_first_prepared(instance)
+        allocations = dict(winners_allocations)
+    else:
+        raise ValueError(f"Unknown algorithm: {scenario.algorithm}")
+
+    return ScenarioResult(name=scenario.name, allocations=allocations, elapsed_time=time.time() - start_time)
+
+
+# The instance of the current worker process and its shared memory segment, set once by _init_worker.
+# The segment stays mapped until the worker process exits.
+_worker_instance: PreparedInstance | None = None
+_worker_segment: SharedMemory | None = None
+
+
+def _init_worker(spec: SharedInstanceSpec) -> None:
+    global _worker_instance, _worker_segment
+    _worker_instance, _worker_segment = attach_instance(spec)
+
+
+def _run_scenario_in_worker(scenario: Scenario) -> ScenarioResult:
+    assert _worker_instance is not None
+    return run_scenario(_worker_instance, scenario)
+
+
+def run_scenarios(
+    instance: PreparedInstance, scenarios: list[Scenario], max_workers: int | None = None
+) -> list[ScenarioResult]:
+    """
+    Run the scenarios in parallel processes, the results are in the order of the scenarios.
+    If max_workers is 1, the scenarios run one after another in the current process.
+    """
+    if len({scenario.name for scenario in scenarios}) != len(scenarios):
+        raise ValueError("Scenario names must be unique")
+
+    if max_workers is None:
+        max_workers = min(len(scenarios), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        return [run_scenario(instance, scenario) for scenario in scenarios]
+
+    # The segment is unlinked after the workers exit, also when a worker crashes
+    with share_instance(instance) as shared, ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(shared.spec,)
+    ) as executor:
+        return list(executor.map(_run_scenario_in_worker, scenarios))
+
+
+def compare_scenarios(
+    instance: PreparedInstance, scenarios: list[Scenario], max_workers: int | None = None
+) -> pd.DataFrame:
+    """
+    Run the scenarios and return a comparison table.
+    One row per project, with its min and max costs, its supporters count,
+    and the allocation of every scenario.
+    The running time of every scenario (in seconds) is in `table.attrs["elapsed_time"]`.
+    """
+    results = run_scenarios(instance, scenarios, max_workers)
+
+    project_ids = instance.project_ids.tolist()
+    table = pd.DataFrame(
+        {
+            "min_cost": instance.min_costs,
+            "max_cost": instance.max_costs,
+            "supporters": instance.supporters_count(),
+        },
+        index=pd.Index(project_ids, name="project_id"),
+    )
+    for result in results:
+        table[result.name] = [result.allocations.get(project_id, 0) for project_id in project_ids]
+
+    table.attrs["elapsed_time"] = {result.name: result.elapsed_time for result in results}
+    return table
@@ -0,0 +1,132 @@
+"""
+Share a PreparedInstance between processes through shared memory.
+
+The arrays of the instance are published once into a single shared memory segment,
+and other processes attach to the segment by its name and use the arrays in place,
+instead of receiving a pickled copy of the bids for every task.
+
+The process that publishes the instance owns the segment: `SharedInstance.close` unlinks it,
+and it is also unlinked when the owner is garbage collected. If the owner crashes, the segment
+is unlinked by the resource tracker of multiprocessing, which the worker processes started
+by the owner share with it.
+
+Usage:
+    with share_instance(instance) as shared:
+        # in a worker process, started by this process
+        worker_instance, segment = attach_instance(shared.spec)
+        ...
+        detach_instance(segment)
+"""
+
+import weakref
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from src.algorithm.columnar import INSTANCE_ARRAYS
+from src.algorithm.instance import PreparedInstance
+
+
+# Segments that were detached while arrays of their instance were still referenced
+_detached_segments: list[SharedMemory] = []
+
+
+@dataclass(frozen=True)
+class SharedInstanceSpec:
+    """Where to find the arrays of an instance in a shared memory segment, small enough to send to a process."""
+
+    segment_name: str
+    budget: float
+    arrays: tuple[tuple[str, int, int], ...]  # (name, offset in bytes, length), all arrays are int64
+
+
+def _release_segment(segment: SharedMemory) -> None:
+    detach_instance(segment)
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class SharedInstance:
+    """An instance published to a shared memory segment, owned by the current process."""
+
+    def __init__(self, segment: SharedMemory, spec: SharedInstanceSpec) -> None:
+        self.spec = spec
+        self._finalizer = weakref.finalize(self, _release_segment, segment)
+
+    @property
+    def name(self) -> str:
+        return self.spec.segment_name
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    def close(self) -> None:
+        """Unlink the segment, the processes that are attached to it keep their mapping until they detach."""
+        self._finalizer()
+
+    def __enter__(self) -> "SharedInstance":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def share_instance(instance: PreparedInstance, name: str | None = None) -> SharedInstance:
+    """
+    Copy the arrays of the instance to a new shared memory segment.
+
+    Args:
+        instance: the instance to publish
+        name: the name of the segment, a unique name is generated if it is None
+    """
+    arrays = [np.ascontiguousarray(getattr(instance, array_name), dtype=np.int64) for array_name in INSTANCE_ARRAYS]
+    size = max(sum(array.nbytes for array in arrays), 1)
+
+    segment = SharedMemory(name=name, create=True, size=size)
+    buffer = segment.buf
+    assert buffer is not None
+    layout = []
+    offset = 0
+    for array_name, array in zip(INSTANCE_ARRAYS, arrays):
+        np.frombuffer(buffer, dtype=np.int64, count=len(array), offset=offset)[:] = array
+        layout.append((array_name, offset, len(array)))
+        offset += array.nbytes
+
+    spec = SharedInstanceSpec(segment_name=segment.name, budget=instance.budget, arrays=tuple(layout))
+    return SharedInstance(segment, spec)
+
+
+def attach_instance(spec: SharedInstanceSpec) -> tuple[PreparedInstance, SharedMemory]:
+    """
+    Map the instance from the shared memory segment, without copying the arrays.
+    The arrays are read-only, the segment stays mapped until it is detached with `detach_instance`
+    and the arrays are released.
+    """
+    segment = SharedMemory(name=spec.segment_name)
+    buffer = segment.buf
+    assert buffer is not None
+    arrays = {}
+    for array_name, offset, length in spec.arrays:
+        # frombuffer holds the buffer of the segment, so it cannot be unmapped under the array
+        array = np.frombuffer(buffer, dtype=np.int64, count=length, offset=offset)
+        array.flags.writeable = False
+        arrays[array_name] = array
+    return PreparedInstance(budget=spec.budget, **arrays), segment
+
+
+def detach_instance(segment: SharedMemory) -> None:
+    """
+    Close the mapping of the segment in the current process.
+    If arrays of the instance are still referenced, the mapping is closed by a later call, after they are released.
+    """
+    _detached_segments.append(segment)
+    for detached in list(_detached_segments):
+        try:
+            detached.close()
+        except BufferError:
+            continue
+        _detached_segments.remove(detached)
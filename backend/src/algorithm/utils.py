@@ -3,6 +3,8 @@ import logging
 
 import numpy as np
 
+from src.algorithm.catalog import CostMinMax, ProjectCatalog
+
 logger = logging.getLogger("equal_shares_logger")
 
 
@@ -115,7 +117,7 @@ def remove_zero_bids(bids: dict[int, dict[int, int]]) -> dict[int, dict[int, int
     return bids
 
 
-def get_project_min_costs(cost_min_max: list) -> dict:
+def get_project_min_costs(cost_min_max: ProjectCatalog | CostMinMax) -> dict:
     """
     Convert the cost-min-max format
     to a dict that maps each project to its minimum cost.
@@ -124,64 +126,39 @@ def get_project_min_costs(cost_min_max: list) -> dict:
     >>> get_project_min_costs(cost_min_max)
     {11: 200, 12: 300, 13: 100}
     """
-    projects_min_costs = {}
-    for item in copy.deepcopy(cost_min_max):
-        project_id, (min_value, _) = item.popitem()
-        projects_min_costs[project_id] = min_value
-    return projects_min_costs
+    return ProjectCatalog.of(cost_min_max).projects_min_costs()
 
 
-def get_project_max_costs(cost_min_max: list) -> dict:
+def get_project_max_costs(cost_min_max: ProjectCatalog | CostMinMax) -> dict:
     """
     Convert the cost-min-max format
-    to a dict that maps each project to its minimum cost.
+    to a dict that maps each project to its maximum cost.
 
     >>> cost_min_max=[{11: (200, 300)}, {12: (300,400)}, {13: (100,150)}]
     >>> get_project_max_costs(cost_min_max)
     {11: 300, 12: 400, 13: 150}
     """
-    projects_max_costs = {}
-    for item in copy.deepcopy(cost_min_max):
-        project_id, (_, max_value) = item.popitem()
-        projects_max_costs[project_id] = max_value
-    return projects_max_costs
+    return ProjectCatalog.of(cost_min_max).projects_max_costs()
 
 
-def check_allocations(cost_min_max: list[dict[int, tuple[int, int]]], winners_allocations: dict[int, int]) -> bool:
+def check_allocations(cost_min_max: ProjectCatalog | CostMinMax, winners_allocations: dict[int, int]) -> bool:
     """
     Inputs:
 
-    cost_min_max is a list of dictionaries where each key is associated
+    cost_min_max is the project catalog, or a list of dictionaries where each key is associated
     with a tuple containing the minimum and maximum costs.
     winners_allocations is a dictionary where each key represents an allocation value.
     Function:
 
-    The function iterates through each key-value pair in winners_allocations.
-    If the allocation is not zero, it searches for the corresponding range in cost_min_max.
-    If found, it checks whether the allocation falls within the specified range and prints the result.
+    The function checks that every non-zero allocation falls within the range of its project,
+    and logs the allocations that do not.
 
+    >>> check_allocations([{11: (200, 300)}, {12: (300,400)}], {11: 250, 12: 0})
+    True
+    >>> check_allocations([{11: (200, 300)}, {12: (300,400)}], {11: 250, 12: 200})
+    False
     """
-
-    boll_flag = True
-    # Loop through each key and value in winners_allocations
-    for project_id, project_cost in winners_allocations.items():
-        # Check if the project_cost is not zero
-        if project_cost != 0:
-            # Find the corresponding range in cost_min_max
-            cost_range = next((entry[project_id] for entry in cost_min_max if project_cost in entry), None)
-
-            if cost_range:
-                min_cost, max_cost = cost_range
-                # Check if the project_cost falls within the range
-                if not min_cost <= project_cost <= max_cost:
-                    boll_flag = False
-                    logger.info(
-                        f"project_cost {project_cost} for project_id {project_id} "
-                        f"is NOT within the range {min_cost}-{max_cost}."
-                    )
-            else:
-                continue
-    return boll_flag
+    return ProjectCatalog.of(cost_min_max).check_allocations(winners_allocations)
 
 
 def calculate_average_bids(bids: dict[int, dict[int, int]], voters: list[int]) -> dict[int, float]:
@@ -234,70 +211,27 @@ def normalize_bids(voters: list, bids: dict, bid_sums: dict, budget: int) -> dic
 
 def plot_bid_data(
     bids: dict[int, dict[int, int]],
-    cost_min_max: list[dict[int, tuple[int, int]]],
+    cost_min_max: ProjectCatalog | CostMinMax,
     average_bids: dict[int, float],
     winners_allocations: dict[int, int],
 ) -> None:
+    """
+    Show the plot of the results in an interactive matplotlib window.
+    To render the plot to a file without blocking, use `src.algorithm.plotting.BidPlotRenderer`.
+    """
     import matplotlib.pyplot as plt
-    # Extracting project IDs
-    project_ids = list(bids.keys())
-
-    # Flattening cost_min_max to work with the list of dictionaries
-    cost_min_values = []
-    cost_max_values = []
-    for project_id in project_ids:
-        for cost_dict in cost_min_max:
-            if project_id in cost_dict:
-                cost_min, cost_max = cost_dict[project_id]
-                cost_min_values.append(cost_min)
-                cost_max_values.append(cost_max)
-                break
-
-    # Extracting values for average_bids and winners_allocations
-    avg_bids_values = [average_bids[pid] for pid in project_ids]
-    winners_allocations_values = [winners_allocations[pid] for pid in project_ids]
-
-    # Bar width
-    bar_width = 0.5
-    x_pos = np.arange(len(project_ids))
-
-    # Small offset for equal values
-    small_offset = 0.001
+
+    from src.algorithm.plotting import bid_plot_values, draw_bid_data
+
+    projects_values = [
+        (project_id, values)
+        for project_id, values in bid_plot_values(cost_min_max, average_bids, winners_allocations)
+        if project_id in bids
+    ]
 
     # Create the plot
     plt.figure(figsize=(10, 6))
-
-    # Sort the values (Average Bids, Winners Allocations, Cost Min, Cost Max) per project in ascending order
-    for i, project_id in enumerate(project_ids):
-        values = [
-            ("Average Bids", avg_bids_values[i], "blue"),
-            ("Winners Allocations", winners_allocations_values[i], "green"),
-            ("Cost Min", cost_min_values[i], "red"),
-            ("Cost Max", cost_max_values[i], "orange"),
-        ]
-
-        # Sort the values by the second element (the value itself)
-        values_sorted = sorted(values, key=lambda x: x[1])
-
-        # Plot the sorted bars, applying a small horizontal offset to distinguish equal values
-        cumulative_bottom = 0.0
-        last_value = None
-        for label, value, color in values_sorted:
-            if last_value is not None and value == last_value:
-                # Add small horizontal offset for equal values
-                value += small_offset
-            plt.bar(
-                x_pos[i], value, width=bar_width, label=label if i == 0 else "", color=color, bottom=cumulative_bottom
-            )
-            cumulative_bottom += value
-            last_value = value
-
-    # Adding labels and title
-    plt.xlabel("Project ID")
-    plt.ylabel("Value")
-    plt.title("Bids, Winners Allocations, and Costs for Projects (Sorted and Offset for Equal Values)")
-    plt.xticks(x_pos, [str(item) for item in project_ids])
-    plt.legend()
+    draw_bid_data(plt.gca(), projects_values)
 
     # Display the plot
     plt.tight_layout()
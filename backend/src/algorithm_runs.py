@@ -0,0 +1,178 @@
+# Runs of the algorithm on the data of the active poll, in the algorithm worker pool.
+#
+# The instance of a run is taken from the live bid matrix. A run is identified by the poll,
+# the algorithm, and the data version of the poll, so requests for data that did not change are
+# served by the existing run without loading the votes or computing the result again.
+# Runs are also matched by the fingerprint of their instance, for versions that changed only
+# settings that do not affect the algorithm.
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import chain
+
+import numpy as np
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.scenarios import Scenario, ScenarioAlgorithm
+from src.jobs import AlgorithmWorkerPool, Job, JobStatus
+from src.models import PollBids, Project, Settings, VoteColumns, VoteData
+from src.results_cache import PollDataCache, results_cache
+
+# Runs in these statuses are reused by requests for the same data, failed runs are submitted again
+_REUSABLE_STATUSES = frozenset({JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.FINISHED})
+
+
+def build_poll_instance(
+    settings: Settings, projects: list[Project], votes: VoteColumns | list[VoteData]
+) -> PreparedInstance:
+    """Build the instance of the algorithm from the data of a poll, votes for unknown projects are ignored."""
+    columns = VoteColumns.of(votes)
+
+    return PreparedInstance.from_rows(
+        voter_ids=np.array(columns.voter_ids, dtype=np.int64),
+        cost_min_max=[{project.project_id: (project.min_points, project.max_points)} for project in projects],
+        budget=settings.max_total_points,
+        row_voters=np.array(columns.row_voters, dtype=np.int64),
+        row_projects=np.array(columns.project_ids, dtype=np.int64),
+        row_amounts=np.array(columns.points, dtype=np.int64),
+    )
+
+
+def build_bids_instance(poll_bids: PollBids) -> PreparedInstance:
+    """Build the instance of the algorithm from the bids aggregated by the database, see `get_poll_bids`."""
+    projects = poll_bids.projects
+
+    return PreparedInstance(
+        voter_ids=np.array(poll_bids.voter_ids, dtype=np.int64),
+        project_ids=np.array([project.project_id for project in projects], dtype=np.int64),
+        min_costs=np.array([project.min_points for project in projects], dtype=np.int64),
+        max_costs=np.array([project.max_points for project in projects], dtype=np.int64),
+        budget=poll_bids.budget,
+        bid_offsets=np.concatenate(([0], np.cumsum([len(project.voters) for project in projects]))).astype(np.int64),
+        bid_voters=np.array(list(chain.from_iterable(project.voters for project in projects)), dtype=np.int64),
+        bid_amounts=np.array(list(chain.from_iterable(project.points for project in projects)), dtype=np.int64),
+    )
+
+
+@dataclass
+class AlgorithmRun:
+    """A run of the algorithm on a version of the data of a poll."""
+
+    id: int
+    poll_id: int
+    data_version: int
+    fingerprint: str
+    algorithm: ScenarioAlgorithm
+    job: Job = field(repr=False)
+    voters_count: int
+    projects_count: int
+    bids_count: int
+    budget: float
+    requests_count: int = 1
+
+    def elapsed_seconds(self) -> float | None:
+        """How long the job has been running, or how long it ran if it finished."""
+        if self.job.started_at is None:
+            return None
+        end = self.job.finished_at if self.job.finished_at is not None else time.time()
+        return end - self.job.started_at
+
+    def allocations(self) -> dict[int, float] | None:
+        if self.job.status != JobStatus.FINISHED or self.job.result is None:
+            return None
+        return self.job.result.allocations
+
+
+class AlgorithmRunsStorage:
+    """
+    The runs of the algorithm, the last `max_runs` runs are kept.
+    The run of every data version is indexed in the results cache.
+
+    Usage:
+        run = storage.find(poll_id, data_version, algorithm)
+        if run is None:
+            run, cached = storage.submit(get_jobs(), poll_id, data_version, instance, algorithm)
+        run = storage.get_run(run.id)
+    """
+
+    def __init__(self, max_runs: int = 20, cache: PollDataCache = results_cache) -> None:
+        self._max_runs = max_runs
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._runs: OrderedDict[int, AlgorithmRun] = OrderedDict()
+        self._next_run_id = 1
+
+    def find(self, poll_id: int, data_version: int, algorithm: ScenarioAlgorithm) -> AlgorithmRun | None:
+        """Return the run of the algorithm for the data version of the poll, if it can be reused."""
+        run_id = self._cache.get(poll_id, data_version, _run_cache_name(algorithm))
+        if run_id is None:
+            return None
+
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or run.job.status not in _REUSABLE_STATUSES:
+                return None
+            run.requests_count += 1
+            return run
+
+    def submit(
+        self,
+        pool: AlgorithmWorkerPool,
+        poll_id: int,
+        data_version: int,
+        instance: PreparedInstance,
+        algorithm: ScenarioAlgorithm,
+        timeout_seconds: float | None = None,
+    ) -> tuple[AlgorithmRun, bool]:
+        """
+        Return the run of the algorithm for the data of the instance,
+        and True if it is an existing run, or submit a new run to the pool and return False.
+        The timeout of a new run defaults to the timeout of the pool.
+        """
+        fingerprint = instance.fingerprint()
+
+        with self._lock:
+            for run in reversed(self._runs.values()):
+                if (
+                    run.poll_id == poll_id
+                    and run.fingerprint == fingerprint
+                    and run.algorithm == algorithm
+                    and run.job.status in _REUSABLE_STATUSES
+                ):
+                    run.requests_count += 1
+                    self._cache.put(poll_id, data_version, _run_cache_name(algorithm), run.id)
+                    return run, True
+
+            job = pool.submit(instance, Scenario(algorithm.value, algorithm=algorithm), timeout_seconds=timeout_seconds)
+            run = AlgorithmRun(
+                id=self._next_run_id,
+                poll_id=poll_id,
+                data_version=data_version,
+                fingerprint=fingerprint,
+                algorithm=algorithm,
+                job=job,
+                voters_count=len(instance.voter_ids),
+                projects_count=len(instance.project_ids),
+                bids_count=len(instance.bid_amounts),
+                budget=instance.budget,
+            )
+            self._next_run_id += 1
+            self._runs[run.id] = run
+            while len(self._runs) > self._max_runs:
+                self._runs.popitem(last=False)
+
+        self._cache.put(poll_id, data_version, _run_cache_name(algorithm), run.id)
+        return run, False
+
+    def get_run(self, run_id: int) -> AlgorithmRun | None:
+        with self._lock:
+            return self._runs.get(run_id)
+
+
+def _run_cache_name(algorithm: ScenarioAlgorithm) -> str:
+    return f"algorithm_run:{algorithm.value}"
+
+
+algorithm_runs_storage = AlgorithmRunsStorage()
@@ -8,9 +8,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
 from src.config import init_config
-from src.database import init_db
+from src.database import close_async_db, close_db, init_async_db, init_db
+from src.jobs import close_jobs, init_jobs
+from src.live_bids import init_live_bids
+from src.live_results import close_live_results, init_live_results
 from src.logger import get_logger, init_loggers
+from src.migrations import init_migrations
+from src.models import init_active_poll_cache
 from src.routers.admin import router as admin_router
+from src.routers.algorithm import router as algorithm_router
 from src.routers.form import router as form_router
 from src.routers.report import router as report_router
 
@@ -23,6 +29,12 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     init_config()
     init_loggers()
     init_db()
+    await init_async_db()
+    init_migrations()
+    init_active_poll_cache()
+    init_live_bids()
+    init_jobs()
+    init_live_results()
 
     get_logger().info("The server started.")
 
@@ -30,6 +42,10 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     yield None
 
     # Finalize the server
+    close_live_results()
+    close_jobs()
+    await close_async_db()
+    close_db()
     get_logger().info("The server closed.")
 
 
@@ -67,3 +83,4 @@ def health_check() -> dict:
 app.include_router(admin_router, prefix="/admin")
 app.include_router(form_router, prefix="/form")
 app.include_router(report_router, prefix="/report")
+app.include_router(algorithm_router, prefix="/algorithm")
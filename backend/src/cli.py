@@ -4,7 +4,10 @@ import json
 import os.path
 import sys
 
-from src.algorithm.public import PublicEqualSharesInput, public_equal_shares
+from src.algorithm.columnar import convert_json_to_npz, is_npz_path, load_instance_npz
+from src.algorithm.json_stream import load_instance_json
+from src.algorithm.plotting import BidPlotRenderer
+from src.algorithm.public import public_equal_shares_prepared
 from src.config import init_config
 from src.database import close_db, get_db, init_db
 from src.logger import init_loggers
@@ -17,6 +20,10 @@ def help_command() -> None:
     print("python -m src check-database                                       - Check the database connection")
     print("python -m src run-algorithm [input-json-path]                      - Run the algorithm")
     print("python -m src run-algorithm [input-json-path] [results-json-path]  - Run the algorithm")
+    print("python -m src run-algorithm [input-json-path] [results-json-path] [plots-dir]")
+    print("                                                                   - Run the algorithm and plot the results")
+    print("python -m src convert-input [input-json-path] [output-npz-path]    - Convert an input to the columnar format")
+    print("The input of run-algorithm can be a JSON file, or a .npz file created by convert-input")
 
 
 def check_database_command() -> None:
@@ -44,6 +51,7 @@ def run_algorithm_command() -> None:
 
     input_json_path = sys.argv[2]
     results_json_path = sys.argv[3] if len(sys.argv) > 3 else None
+    plots_dir = sys.argv[4] if len(sys.argv) > 4 else None
 
     if not os.path.exists(input_json_path):
         print(f"Error: input-json-path '{input_json_path}' does not exist.")
@@ -53,11 +61,61 @@ def run_algorithm_command() -> None:
         print(f"Error: results-json-path '{results_json_path}' already exists.")
         return
 
-    with open(input_json_path, "r") as f:
-        data = json.load(f)
+    # The JSON input is streamed into the compact arrays, without loading the whole document
+    try:
+        if is_npz_path(input_json_path):
+            instance = load_instance_npz(input_json_path)
+        else:
+            instance = load_instance_json(input_json_path)
+            instance.validate()
+    except ValueError as e:
+        print(f"Error: invalid input '{input_json_path}': {e}")
+        return
+
+    res = public_equal_shares_prepared(instance)
 
-    res = public_equal_shares(PublicEqualSharesInput(**data))
+    plot_renderer = BidPlotRenderer(plots_dir) if plots_dir is not None else None
+    if plot_renderer is not None:
+        # The plot is rendered in the background while the results are saved
+        averages = dict(zip(instance.project_ids.tolist(), instance.average_bids().tolist()))
+        plot_future = plot_renderer.submit(instance.catalog(), averages, res.results)
 
     if results_json_path:
         with open(results_json_path, "w") as f:
             json.dump(res.model_dump()["results"], f, indent=2)
+
+    if plot_renderer is not None:
+        plot_renderer.close()
+        print(f"Plot saved to '{plot_future.result()}'.")
+
+
+def convert_input_command() -> None:
+    if len(sys.argv) < 4:
+        print("Error: input-json-path and output-npz-path are required.")
+        return
+
+    input_json_path = sys.argv[2]
+    output_npz_path = sys.argv[3]
+
+    if not os.path.exists(input_json_path):
+        print(f"Error: input-json-path '{input_json_path}' does not exist.")
+        return
+
+    if not is_npz_path(output_npz_path):
+        print(f"Error: output-npz-path '{output_npz_path}' must end with '.npz'.")
+        return
+
+    if os.path.exists(output_npz_path):
+        print(f"Error: output-npz-path '{output_npz_path}' already exists.")
+        return
+
+    try:
+        instance = convert_json_to_npz(input_json_path, output_npz_path)
+    except ValueError as e:
+        print(f"Error: invalid input '{input_json_path}': {e}")
+        return
+
+    print(
+        f"Converted {len(instance.voter_ids)} voters, {len(instance.project_ids)} projects "
+        f"and {len(instance.bid_amounts)} bids to '{output_npz_path}'."
+    )
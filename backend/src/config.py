@@ -22,6 +22,31 @@ class Config:
 
     without_auth_mode: bool = False
 
+    # The database connection pools, the async pool is used by the routes of the voting form
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_async_pool_max_size: int = 20
+    db_pool_timeout_seconds: float = 30  # How long a request waits for a connection
+    db_pool_max_idle_seconds: float = 600  # Idle connections above the min size are closed after this time
+    db_pool_max_lifetime_seconds: float = 3600  # Connections are replaced after this time
+    db_statement_timeout_seconds: float = 0  # 0 means no limit
+
+    # How long the active poll is cached, it is also invalidated when it changes
+    active_poll_cache_seconds: float = 60
+
+    # The algorithm worker pool, a limit of 0 means no limit
+    algorithm_workers: int = 1
+    algorithm_timeout_seconds: float = 600
+    algorithm_max_rss_mb: int = 4096
+    algorithm_max_payload_mb: int = 64  # The limit of the input of the /algorithm endpoint
+
+    # The live results of the active poll, recomputed at most once per interval, an interval of 0 disables them
+    live_results_interval_seconds: float = 30
+    live_results_timeout_seconds: float = 60
+
+    # The names of the optional migrations of the schema to apply, see `src/migrations.py`
+    optional_migrations: list[str] = []
+
     logger_level: str = "DEBUG"  # Level for logging
 
 
@@ -61,4 +86,64 @@ def init_config() -> None:
     if without_auth_mode is not None:
         config.without_auth_mode = without_auth_mode.lower() == "true"
 
+    db_pool_min_size = os.environ.get("DB_POOL_MIN_SIZE")
+    if db_pool_min_size is not None:
+        config.db_pool_min_size = int(db_pool_min_size)
+
+    db_pool_max_size = os.environ.get("DB_POOL_MAX_SIZE")
+    if db_pool_max_size is not None:
+        config.db_pool_max_size = int(db_pool_max_size)
+
+    db_async_pool_max_size = os.environ.get("DB_ASYNC_POOL_MAX_SIZE")
+    if db_async_pool_max_size is not None:
+        config.db_async_pool_max_size = int(db_async_pool_max_size)
+
+    db_pool_timeout_seconds = os.environ.get("DB_POOL_TIMEOUT_SECONDS")
+    if db_pool_timeout_seconds is not None:
+        config.db_pool_timeout_seconds = float(db_pool_timeout_seconds)
+
+    db_pool_max_idle_seconds = os.environ.get("DB_POOL_MAX_IDLE_SECONDS")
+    if db_pool_max_idle_seconds is not None:
+        config.db_pool_max_idle_seconds = float(db_pool_max_idle_seconds)
+
+    db_pool_max_lifetime_seconds = os.environ.get("DB_POOL_MAX_LIFETIME_SECONDS")
+    if db_pool_max_lifetime_seconds is not None:
+        config.db_pool_max_lifetime_seconds = float(db_pool_max_lifetime_seconds)
+
+    db_statement_timeout_seconds = os.environ.get("DB_STATEMENT_TIMEOUT_SECONDS")
+    if db_statement_timeout_seconds is not None:
+        config.db_statement_timeout_seconds = float(db_statement_timeout_seconds)
+
+    active_poll_cache_seconds = os.environ.get("ACTIVE_POLL_CACHE_SECONDS")
+    if active_poll_cache_seconds is not None:
+        config.active_poll_cache_seconds = float(active_poll_cache_seconds)
+
+    algorithm_workers = os.environ.get("ALGORITHM_WORKERS")
+    if algorithm_workers is not None:
+        config.algorithm_workers = int(algorithm_workers)
+
+    algorithm_timeout_seconds = os.environ.get("ALGORITHM_TIMEOUT_SECONDS")
+    if algorithm_timeout_seconds is not None:
+        config.algorithm_timeout_seconds = float(algorithm_timeout_seconds)
+
+    algorithm_max_rss_mb = os.environ.get("ALGORITHM_MAX_RSS_MB")
+    if algorithm_max_rss_mb is not None:
+        config.algorithm_max_rss_mb = int(algorithm_max_rss_mb)
+
+    algorithm_max_payload_mb = os.environ.get("ALGORITHM_MAX_PAYLOAD_MB")
+    if algorithm_max_payload_mb is not None:
+        config.algorithm_max_payload_mb = int(algorithm_max_payload_mb)
+
+    live_results_interval_seconds = os.environ.get("LIVE_RESULTS_INTERVAL_SECONDS")
+    if live_results_interval_seconds is not None:
+        config.live_results_interval_seconds = float(live_results_interval_seconds)
+
+    live_results_timeout_seconds = os.environ.get("LIVE_RESULTS_TIMEOUT_SECONDS")
+    if live_results_timeout_seconds is not None:
+        config.live_results_timeout_seconds = float(live_results_timeout_seconds)
+
+    optional_migrations = os.environ.get("OPTIONAL_MIGRATIONS")
+    if optional_migrations is not None:
+        config.optional_migrations = [name.strip() for name in optional_migrations.split(",") if name.strip()]
+
     print("config.without_auth_mode", config.without_auth_mode)
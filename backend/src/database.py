@@ -1,8 +1,11 @@
 # This module contains the database connection pool and the database dependency for FastAPI.
 
+import bisect
 import functools
+import threading
+import time
 from contextlib import contextmanager
-from typing import Any, Callable, Generator, TypeVar
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generator, TypeVar
 
 import psycopg
 import psycopg_pool
@@ -13,6 +16,9 @@ from src.exceptions import CriticalException
 from src.logger import get_logger
 
 g_pool: None | psycopg_pool.ConnectionPool = None
+# The pool of the async routes, they wait for a connection on the event loop instead of holding a thread
+g_async_pool: None | psycopg_pool.AsyncConnectionPool = None
+g_listeners: list["DatabaseListener"] = []
 
 
 def _get_pool() -> psycopg_pool.ConnectionPool:
@@ -30,18 +36,15 @@ def init_db() -> None:
 
     try:
         g_pool = psycopg_pool.ConnectionPool(
-            conninfo=make_conninfo(
-                "",
-                host=config.pg_host,
-                port=config.pg_port,
-                dbname=config.pg_database,
-                user=config.pg_user,
-                password=config.pg_password,
-            ),
+            conninfo=_conninfo(),
             # sslmode="require",
-            min_size=1,
-            max_size=10,
-            timeout=30,
+            kwargs=_connection_kwargs(),
+            min_size=config.db_pool_min_size,
+            max_size=config.db_pool_max_size,
+            timeout=config.db_pool_timeout_seconds,
+            max_idle=config.db_pool_max_idle_seconds,
+            max_lifetime=config.db_pool_max_lifetime_seconds,
+            name="sync",
         )
         g_pool.wait()
     except psycopg.errors.Error as e:
@@ -49,10 +52,186 @@ def init_db() -> None:
         raise CriticalException("Database connection failed") from e
 
 
+def _get_async_pool() -> psycopg_pool.AsyncConnectionPool:
+    if g_async_pool is None:
+        raise CriticalException("Database not initialized")
+    return g_async_pool
+
+
+async def init_async_db() -> None:
+    """Initialize the async database connection pool"""
+
+    global g_async_pool
+    if g_async_pool is not None:
+        return
+
+    try:
+        g_async_pool = psycopg_pool.AsyncConnectionPool(
+            conninfo=_conninfo(),
+            kwargs=_connection_kwargs(),
+            min_size=config.db_pool_min_size,
+            max_size=config.db_async_pool_max_size,
+            timeout=config.db_pool_timeout_seconds,
+            max_idle=config.db_pool_max_idle_seconds,
+            max_lifetime=config.db_pool_max_lifetime_seconds,
+            name="async",
+            open=False,
+        )
+        await g_async_pool.open(wait=True)
+    except psycopg.errors.Error as e:
+        get_logger().exception(e)
+        raise CriticalException("Database connection failed") from e
+
+
+async def close_async_db() -> None:
+    """Close the async database connection pool"""
+    global g_async_pool
+
+    if g_async_pool is None:
+        return
+
+    await g_async_pool.close()
+    g_async_pool = None
+
+
+def _connection_kwargs() -> dict[str, Any]:
+    """The options of the connections of the pools."""
+    if config.db_statement_timeout_seconds <= 0:
+        return {}
+    return {"options": f"-c statement_timeout={int(config.db_statement_timeout_seconds * 1000)}"}
+
+
+class PoolMetrics:
+    """
+    The time requests waited for a connection of a pool, as a cumulative histogram (like Prometheus),
+    and the number of requests that got no connection in time.
+    """
+
+    # The upper bounds of the buckets of the histogram, in seconds
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self._sum = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            self._sum += seconds
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            timeouts = self.timeouts
+
+        cumulative = 0
+        buckets: dict[str, int] = {}
+        for bound, count in zip([str(bound) for bound in self.BUCKETS] + ["+Inf"], counts):
+            cumulative += count
+            buckets[bound] = cumulative
+
+        return {"wait_seconds_buckets": buckets, "wait_seconds_sum": total, "waits": cumulative, "timeouts": timeouts}
+
+
+g_pool_metrics = PoolMetrics()
+g_async_pool_metrics = PoolMetrics()
+
+
+def get_pools_stats() -> dict[str, dict[str, Any]]:
+    """
+    The statistics of the connection pools: the counters of psycopg_pool (see its documentation, e.g.
+    `requests_waiting`, `requests_errors`, `connections_errors`), the connections in use,
+    and the wait times of the requests of the API.
+    """
+    stats: dict[str, dict[str, Any]] = {}
+    for name, pool, metrics in (
+        ("sync", g_pool, g_pool_metrics),
+        ("async", g_async_pool, g_async_pool_metrics),
+    ):
+        if pool is None:
+            continue
+
+        pool_stats: dict[str, Any] = dict(pool.get_stats())
+        pool_stats["connections_in_use"] = pool_stats.get("pool_size", 0) - pool_stats.get("pool_available", 0)
+        pool_stats.update(metrics.snapshot())
+        stats[name] = pool_stats
+    return stats
+
+
+def _conninfo() -> str:
+    return make_conninfo(
+        "",
+        host=config.pg_host,
+        port=config.pg_port,
+        dbname=config.pg_database,
+        user=config.pg_user,
+        password=config.pg_password,
+    )
+
+
+class DatabaseListener:
+    """
+    Calls the callback, in a background thread, for every notification on a channel (Postgres LISTEN/NOTIFY).
+    The listener has its own connection, outside of the pool. When the connection is lost the listener
+    reconnects, and calls the callback once since notifications may have been missed in between.
+    """
+
+    def __init__(self, channel: str, callback: Callable[[], None], reconnect_seconds: float = 5) -> None:
+        self.channel = channel
+        self._callback = callback
+        self._reconnect_seconds = reconnect_seconds
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"listen-{channel}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _loop(self) -> None:
+        first_connection = True
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(_conninfo(), autocommit=True) as connection:
+                    connection.execute(f"LISTEN {self.channel};")
+                    if not first_connection:
+                        self._callback()
+                    first_connection = False
+
+                    while not self._stopped.is_set():
+                        for _ in connection.notifies(timeout=1.0):
+                            self._callback()
+            except psycopg.errors.Error as e:
+                get_logger().warning(f"Listening on channel {self.channel} failed: {e}")
+                first_connection = False
+                self._stopped.wait(self._reconnect_seconds)
+
+
+def start_listener(channel: str, callback: Callable[[], None]) -> None:
+    """Start listening on a channel until the database is closed"""
+
+    listener = DatabaseListener(channel, callback)
+    listener.start()
+    g_listeners.append(listener)
+
+
 def close_db() -> None:
     """Close database connection pool"""
     global g_pool
 
+    while g_listeners:
+        g_listeners.pop().stop()
+
     if g_pool is None:
         return
 
@@ -63,13 +242,37 @@ def close_db() -> None:
 def db_dependency() -> Generator[psycopg.Connection, None, None]:
     """FastAPI dependency for database connection, used in the endpoints of the API"""
 
-    db = _get_pool().getconn()
+    started_at = time.perf_counter()
+    try:
+        db = _get_pool().getconn()
+    except psycopg_pool.PoolTimeout:
+        g_pool_metrics.observe_timeout()
+        raise
+    g_pool_metrics.observe_wait(time.perf_counter() - started_at)
+
     try:
         yield db
     finally:
         _get_pool().putconn(db)
 
 
+async def async_db_dependency() -> AsyncGenerator[psycopg.AsyncConnection, None]:
+    """FastAPI dependency for async database connection, used in the async endpoints of the API"""
+
+    started_at = time.perf_counter()
+    try:
+        db = await _get_async_pool().getconn()
+    except psycopg_pool.PoolTimeout:
+        g_async_pool_metrics.observe_timeout()
+        raise
+    g_async_pool_metrics.observe_wait(time.perf_counter() - started_at)
+
+    try:
+        yield db
+    finally:
+        await _get_async_pool().putconn(db)
+
+
 @contextmanager
 def get_db() -> Generator[psycopg.Connection, None, None]:
     """Return database connection"""
@@ -94,3 +297,19 @@ def db_named_query(func: Callable[..., ReturnT]) -> Callable[..., ReturnT]:
             raise e
 
     return wrapper
+
+
+def db_async_named_query(func: Callable[..., Awaitable[ReturnT]]) -> Callable[..., Awaitable[ReturnT]]:
+    """Decorator for async database named queries in the models."""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> ReturnT:
+        try:
+            return await func(*args, **kwargs)
+        except psycopg.errors.Error as e:
+            error_msg = str(e)
+            get_logger().error(f"Database error: {error_msg}")
+            get_logger().exception(e)
+            raise e
+
+    return wrapper
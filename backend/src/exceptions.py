@@ -3,3 +3,9 @@
 
 class CriticalException(Exception):
     pass
+
+
+class JobFailedException(Exception):
+    """An algorithm job did not finish, the status of the job tells why"""
+
+    pass
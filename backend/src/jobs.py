@@ -0,0 +1,456 @@
+# The algorithm execution service: runs the algorithm in a pool of persistent worker processes,
+# so heavy runs do not compete with the requests of the voters for the GIL and the memory of the server.
+#
+# The instance of a job is passed to its worker through shared memory. Every job has a wall-clock
+# timeout and a limit on the resident memory of its worker, a worker that exceeds a limit is killed
+# and replaced by a new one.
+
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from enum import StrEnum
+from multiprocessing.connection import Connection, wait
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.scenarios import Scenario, ScenarioResult, run_scenario
+from src.algorithm.shared_instance import (
+    SharedInstance,
+    SharedInstanceSpec,
+    attach_instance,
+    detach_instance,
+    share_instance,
+)
+from src.config import config
+from src.exceptions import CriticalException, JobFailedException
+from src.logger import get_logger
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
+    MEMORY_EXCEEDED = "memory_exceeded"
+
+
+FINAL_STATUSES = frozenset(
+    {JobStatus.FINISHED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.TIMED_OUT, JobStatus.MEMORY_EXCEEDED}
+)
+
+
+@dataclass
+class Job:
+    """
+    An algorithm run submitted to the worker pool.
+
+    `future` is resolved with the ScenarioResult, or with a JobFailedException when the job
+    fails, times out or exceeds the memory limit. It is cancelled when the job is cancelled.
+    """
+
+    id: int
+    scenario: Scenario
+    timeout_seconds: float | None
+    max_rss_bytes: int | None
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: ScenarioResult | None = None
+    error: str | None = None
+    future: Future = field(default_factory=Future, repr=False)
+    # The input of the job, released when the job is sent to a worker
+    instance: PreparedInstance | None = field(default=None, repr=False)
+
+
+def _run_job(spec: SharedInstanceSpec, scenario: Scenario) -> tuple[ScenarioResult | None, str | None]:
+    """Run a job in the worker process, returns the result or the formatted exception."""
+    instance, segment = attach_instance(spec)
+    try:
+        return run_scenario(instance, scenario), None
+    except Exception:
+        return None, traceback.format_exc()
+    finally:
+        del instance
+        detach_instance(segment)
+
+
+def _worker_main(connection: Connection) -> None:
+    """The loop of a worker process: receive a job, run it, send back the result."""
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        job_id, spec, scenario = message
+        result, error = _run_job(spec, scenario)
+        connection.send((job_id, result, error))
+
+
+def _process_rss_bytes(pid: int) -> int | None:
+    """The resident memory of a process, None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    def __init__(self, context: multiprocessing.context.SpawnContext) -> None:
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_connection,), name="algorithm-worker", daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+
+        self.job: Job | None = None
+        # The instance of the running job, unlinked when the job finishes or the worker is stopped
+        self.shared: SharedInstance | None = None
+
+    def release_instance(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except OSError:
+                self.process.kill()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+        self.release_instance()
+
+
+class AlgorithmWorkerPool:
+    """
+    Runs algorithm jobs in persistent worker processes, one job per worker at a time.
+    The jobs wait in a queue until a worker is free.
+
+    Args:
+        workers: the number of worker processes
+        timeout_seconds: the default wall-clock timeout of a job, None for no timeout
+        max_rss_bytes: the default limit of the resident memory of the worker running a job, None for no limit
+        max_finished_jobs: how many finished jobs are kept for `get_job`
+        poll_interval: how often (in seconds) the limits of the running jobs are checked
+
+    Usage:
+        pool = AlgorithmWorkerPool(workers=2, timeout_seconds=600)
+        job = pool.submit(instance, Scenario("mes"))
+        result = job.future.result()
+        pool.close()
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        timeout_seconds: float | None = None,
+        max_rss_bytes: int | None = None,
+        max_finished_jobs: int = 100,
+        poll_interval: float = 0.1,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("The pool must have at least one worker")
+
+        self.timeout_seconds = timeout_seconds
+        self.max_rss_bytes = max_rss_bytes
+        self._max_finished_jobs = max_finished_jobs
+        self._poll_interval = poll_interval
+
+        # Spawned workers do not inherit the threads and the connections of the server
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._jobs: dict[int, Job] = {}
+        self._queue: deque[Job] = deque()
+        self._finished: deque[int] = deque()
+        # The finished jobs whose futures are not resolved yet, they may already be dropped from `_jobs`
+        self._unresolved: list[Job] = []
+        self._next_job_id = 1
+        self._closed = False
+
+        # Killed workers are removed from `_workers`, and replaced by the dispatcher outside of the lock
+        self._workers_count = workers
+        self._workers = [_Worker(self._context) for _ in range(workers)]
+        self._wakeup_reader, self._wakeup_writer = self._context.Pipe(duplex=False)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="algorithm-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(
+        self,
+        instance: PreparedInstance,
+        scenario: Scenario,
+        timeout_seconds: float | None = None,
+        max_rss_bytes: int | None = None,
+    ) -> Job:
+        """Queue a job, the limits default to the limits of the pool."""
+        with self._lock:
+            if self._closed:
+                raise CriticalException("The algorithm worker pool is closed")
+
+            job = Job(
+                id=self._next_job_id,
+                scenario=scenario,
+                timeout_seconds=timeout_seconds if timeout_seconds is not None else self.timeout_seconds,
+                max_rss_bytes=max_rss_bytes if max_rss_bytes is not None else self.max_rss_bytes,
+                instance=instance,
+            )
+            self._next_job_id += 1
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._wakeup_writer.send(None)
+        return job
+
+    def get_job(self, job_id: int) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job, returns False if the job is unknown or already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINAL_STATUSES:
+                return False
+
+            if job.status == JobStatus.QUEUED:
+                self._queue.remove(job)
+                self._finish(job, JobStatus.CANCELLED)
+            else:
+                worker = next(worker for worker in self._workers if worker.job is job)
+                self._replace_worker(worker, JobStatus.CANCELLED, None)
+
+        job.future.cancel()
+        return True
+
+    def queued_jobs_count(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def running_jobs_count(self) -> int:
+        with self._lock:
+            return sum(1 for worker in self._workers if worker.job is not None)
+
+    def close(self) -> None:
+        """Cancel the queued and running jobs, and stop the worker processes."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup_writer.send(None)
+        self._dispatcher.join()
+
+        while self._queue:
+            self._finish(self._queue.popleft(), JobStatus.CANCELLED)
+        for worker in self._workers:
+            if worker.job is not None:
+                self._finish(worker.job, JobStatus.CANCELLED)
+                worker.job = None
+                worker.stop(kill=True)
+            else:
+                worker.stop()
+        self._resolve_futures()
+
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+    def __enter__(self) -> "AlgorithmWorkerPool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _spawn_workers(self) -> None:
+        """Start the replacements of the killed workers, outside of the lock since starting a process is slow."""
+        with self._lock:
+            missing = self._workers_count - len(self._workers)
+        if missing <= 0:
+            return
+
+        workers = [_Worker(self._context) for _ in range(missing)]
+        with self._lock:
+            if not self._closed:
+                self._workers.extend(workers)
+                return
+        for worker in workers:
+            worker.stop()
+
+    # The methods below are called by the dispatcher thread, with the lock held
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            self._spawn_workers()
+            with self._lock:
+                if self._closed:
+                    return
+                self._start_queued_jobs()
+                waitables: list = [self._wakeup_reader]
+                for worker in self._workers:
+                    waitables.extend((worker.connection, worker.process.sentinel))
+
+            wait(waitables, timeout=self._poll_interval)
+
+            with self._lock:
+                if self._closed:
+                    return
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv()
+
+                for worker in list(self._workers):
+                    if worker.job is not None and worker.connection.poll():
+                        self._collect_result(worker)
+                    if not worker.process.is_alive():
+                        self._replace_worker(worker, JobStatus.FAILED, "The worker process exited unexpectedly")
+                self._enforce_limits()
+
+            self._resolve_futures()
+
+    def _start_queued_jobs(self) -> None:
+        for worker in list(self._workers):
+            if worker.job is not None or not self._queue:
+                continue
+
+            job = self._queue.popleft()
+            assert job.instance is not None
+            worker.job = job
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            try:
+                # Fails when the shared memory is full, or when the worker died
+                worker.shared = share_instance(job.instance)
+                job.instance = None
+                worker.connection.send((job.id, worker.shared.spec, job.scenario))
+            except OSError as e:
+                self._replace_worker(worker, JobStatus.FAILED, f"The job could not be sent to a worker: {e}")
+
+    def _collect_result(self, worker: _Worker) -> None:
+        job = worker.job
+        assert job is not None
+        try:
+            job_id, result, error = worker.connection.recv()
+        except (EOFError, OSError):
+            # The worker died, it is replaced by the caller
+            return
+
+        assert job_id == job.id
+        worker.job = None
+        worker.release_instance()
+        if error is None:
+            job.result = result
+            self._finish(job, JobStatus.FINISHED)
+        else:
+            self._finish(job, JobStatus.FAILED, error)
+
+    def _enforce_limits(self) -> None:
+        now = time.time()
+        for worker in list(self._workers):
+            job = worker.job
+            if job is None:
+                continue
+
+            assert job.started_at is not None
+            if job.timeout_seconds is not None and now - job.started_at > job.timeout_seconds:
+                self._replace_worker(worker, JobStatus.TIMED_OUT, f"The job timed out after {job.timeout_seconds}s")
+                continue
+
+            if job.max_rss_bytes is not None:
+                rss_bytes = _process_rss_bytes(worker.process.pid)  # type: ignore[arg-type]
+                if rss_bytes is not None and rss_bytes > job.max_rss_bytes:
+                    self._replace_worker(
+                        worker,
+                        JobStatus.MEMORY_EXCEEDED,
+                        f"The job used {rss_bytes} bytes of memory, the limit is {job.max_rss_bytes} bytes",
+                    )
+
+    def _replace_worker(self, worker: _Worker, status: JobStatus, error: str | None) -> None:
+        """
+        Kill the worker and finish its job with the status.
+        The dispatcher starts a new worker in its place, outside of the lock.
+        """
+        job = worker.job
+        worker.job = None
+        worker.stop(kill=True)
+        if job is not None:
+            if error is not None:
+                get_logger().warning(f"Algorithm job {job.id} {status}: {error}")
+            self._finish(job, status, error)
+
+        self._workers.remove(worker)
+        self._wakeup_writer.send(None)
+
+    def _finish(self, job: Job, status: JobStatus, error: str | None = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.instance = None
+        self._unresolved.append(job)
+
+        self._finished.append(job.id)
+        while len(self._finished) > self._max_finished_jobs:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _resolve_futures(self) -> None:
+        """Resolve the futures of the finished jobs, outside of the lock since they run callbacks."""
+        with self._lock:
+            jobs, self._unresolved = self._unresolved, []
+
+        for job in jobs:
+            try:
+                if job.status == JobStatus.FINISHED:
+                    job.future.set_result(job.result)
+                elif job.status == JobStatus.CANCELLED:
+                    job.future.cancel()
+                else:
+                    job.future.set_exception(JobFailedException(f"Algorithm job {job.id} {job.status}: {job.error}"))
+            except InvalidStateError:
+                # The caller cancelled the future
+                pass
+
+
+g_jobs: None | AlgorithmWorkerPool = None
+
+
+def get_jobs() -> AlgorithmWorkerPool:
+    if g_jobs is None:
+        raise CriticalException("Algorithm worker pool not initialized")
+    return g_jobs
+
+
+def init_jobs() -> None:
+    """Initialize the algorithm worker pool"""
+
+    global g_jobs
+    if g_jobs is not None:
+        return
+
+    g_jobs = AlgorithmWorkerPool(
+        workers=config.algorithm_workers,
+        timeout_seconds=config.algorithm_timeout_seconds if config.algorithm_timeout_seconds > 0 else None,
+        max_rss_bytes=config.algorithm_max_rss_mb * 1024 * 1024 if config.algorithm_max_rss_mb > 0 else None,
+    )
+
+
+def close_jobs() -> None:
+    """Close the algorithm worker pool"""
+    global g_jobs
+
+    if g_jobs is None:
+        return
+
+    g_jobs.close()
+    g_jobs = None
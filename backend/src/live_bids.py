@@ -0,0 +1,154 @@
+# The live bid matrix: the bids of the active poll, kept in the memory of the server process.
+#
+# The matrix is loaded once at startup and updated in place when a voter of this process saves
+# their votes, so the input of the algorithm is not rebuilt from all the votes for every request.
+# Every read checks the data version of the poll (see `get_data_version` in the models), so when
+# the data is changed by another process, or by anything other than a vote, the matrix is reloaded.
+
+import threading
+from dataclasses import dataclass
+
+import psycopg
+
+from src.algorithm.instance import PreparedInstance
+from src.database import get_db
+from src.logger import get_logger
+from src.models import (
+    Project,
+    Settings,
+    VoteColumns,
+    VoteData,
+    get_data_version,
+    get_projects,
+    get_settings,
+    stream_votes,
+)
+
+
+@dataclass(frozen=True)
+class LiveSnapshot:
+    """The input of the algorithm for a version of the data of a poll."""
+
+    poll_id: int
+    data_version: int
+    instance: PreparedInstance
+
+
+class LiveBidMatrix:
+    """
+    The bids of the voters of a poll, by voter in the order the voters first voted.
+    The prepared instance is built on the first read after a change, and shared by the reads until the next one.
+
+    Usage:
+        snapshot = live_bids.snapshot(db)
+        ...
+        voter, data_version = await models_async.save_voter_votes(db, email, note, projects, poll)
+        live_bids.apply(poll.poll_id, data_version, voter.voter_id, points_by_project)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._poll_id: int | None = None
+        self._data_version = -1
+        self._budget = 0
+        self._cost_min_max: list[dict[int, tuple[int, int]]] = []
+        self._project_ids: list[int] = []
+        # voter_id -> project_id -> points
+        self._voters: dict[int, dict[int, int]] = {}
+        self._instance: PreparedInstance | None = None
+
+    def reset(
+        self,
+        poll_id: int,
+        data_version: int,
+        settings: Settings,
+        projects: list[Project],
+        votes: VoteColumns | list[VoteData],
+    ) -> None:
+        """Replace the matrix with the data of a poll, ignored if the matrix already has a newer version of it."""
+        voters = VoteColumns.of(votes).points_by_voter()
+
+        with self._lock:
+            if self._poll_id == poll_id and self._data_version > data_version:
+                return
+
+            self._poll_id = poll_id
+            self._data_version = data_version
+            self._budget = settings.max_total_points
+            self._cost_min_max = [
+                {project.project_id: (project.min_points, project.max_points)} for project in projects
+            ]
+            self._project_ids = [project.project_id for project in projects]
+            self._voters = voters
+            self._instance = None
+
+    def apply(self, poll_id: int, data_version: int, voter_id: int, points: dict[int, int]) -> bool:
+        """
+        Replace the bids of a voter, the change must be the only change since the version of the matrix.
+        Returns False, and changes nothing, if the matrix is of another poll or version.
+        """
+        with self._lock:
+            if self._poll_id != poll_id or self._data_version != data_version - 1:
+                return False
+
+            if points:
+                self._voters[voter_id] = dict(points)
+            else:
+                self._voters.pop(voter_id, None)
+            self._data_version = data_version
+            self._instance = None
+            return True
+
+    def current(self, poll_id: int, data_version: int) -> LiveSnapshot | None:
+        """The snapshot of the matrix, or None if the matrix is not of this version of the poll."""
+        with self._lock:
+            if self._poll_id != poll_id or self._data_version != data_version:
+                return None
+            return self._snapshot()
+
+    def _snapshot(self) -> LiveSnapshot:
+        """Called with the lock held."""
+        assert self._poll_id is not None
+        if self._instance is None:
+            bids: dict[int, dict[int, int]] = {project_id: {} for project_id in self._project_ids}
+            for voter_id, points in self._voters.items():
+                for project_id, amount in points.items():
+                    if project_id in bids:
+                        bids[project_id][voter_id] = amount
+            self._instance = PreparedInstance.from_input(list(self._voters), self._cost_min_max, self._budget, bids)
+
+        return LiveSnapshot(poll_id=self._poll_id, data_version=self._data_version, instance=self._instance)
+
+    def load(self, db: psycopg.Connection) -> None:
+        """Load the matrix of the active poll from the database."""
+        # The version is read before the data, so the matrix is never labeled with a version newer than its data
+        poll_id, data_version = get_data_version(db)
+        self.reset(poll_id, data_version, get_settings(db), get_projects(db), stream_votes(db))
+
+    def snapshot(self, db: psycopg.Connection) -> LiveSnapshot:
+        """The snapshot of the current data of the active poll, the matrix is reloaded if the data changed."""
+        poll_id, data_version = get_data_version(db)
+        snapshot = self.current(poll_id, data_version)
+        if snapshot is not None:
+            return snapshot
+
+        get_logger().info(f"Loading the bid matrix of poll {poll_id}, data version {data_version}")
+        self.load(db)
+        # The loaded version is the version that was read above, or a newer one
+        with self._lock:
+            return self._snapshot()
+
+
+live_bids = LiveBidMatrix()
+
+
+def init_live_bids() -> None:
+    """Load the bid matrix of the active poll, if the database is ready"""
+
+    with get_db() as db:
+        try:
+            live_bids.load(db)
+        except Exception as e:
+            # The tables or the active poll may not exist yet, the matrix is loaded on the first read
+            db.rollback()
+            get_logger().warning(f"The bid matrix was not loaded: {e}")
@@ -0,0 +1,181 @@
+# The live results: a preview of the results of the active poll while it is open for voting.
+#
+# A background thread checks the data version of the active poll, and recomputes the results in the
+# algorithm worker pool when the version changed and at least the configured interval has passed
+# since the last recomputation, so a burst of votes is coalesced into one run.
+
+import threading
+import time
+from concurrent.futures import CancelledError, wait
+from dataclasses import dataclass
+
+import psycopg
+
+from src.algorithm.scenarios import ScenarioAlgorithm
+from src.algorithm_runs import algorithm_runs_storage
+from src.config import config
+from src.database import get_db
+from src.exceptions import CriticalException, JobFailedException
+from src.jobs import get_jobs
+from src.live_bids import LiveSnapshot, live_bids
+from src.logger import get_logger
+from src.models import get_settings
+
+
+@dataclass(frozen=True)
+class LiveResults:
+    """The results of the algorithm for a version of the data of a poll."""
+
+    poll_id: int
+    data_version: int
+    allocations: dict[int, float]
+    voters_count: int
+    computed_at: float
+    elapsed_seconds: float
+
+
+class LiveResultsScheduler:
+    """
+    Recomputes the live results in a background thread.
+
+    Args:
+        interval_seconds: the minimum time between two recomputations, the results are at most this stale
+                          (plus the time of the run) while the votes keep changing
+        timeout_seconds: the CPU budget of a recomputation, the wall-clock timeout of its job
+        check_interval: how often (in seconds) the data version is checked
+    """
+
+    def __init__(self, interval_seconds: float, timeout_seconds: float | None, check_interval: float = 1) -> None:
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self._check_interval = min(check_interval, interval_seconds)
+        self._lock = threading.Lock()
+        self._results: LiveResults | None = None
+        self._last_started_at = 0.0
+        # The data version of the last recomputation, also if it failed, so a failing version is not retried
+        self._last_version: tuple[int, int] | None = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="live-results", daemon=True)
+
+    @property
+    def results(self) -> LiveResults | None:
+        with self._lock:
+            return self._results
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def is_due(self, poll_id: int, data_version: int, now: float) -> bool:
+        """If the results of this version should be computed now."""
+        return self._last_version != (poll_id, data_version) and now - self._last_started_at >= self.interval_seconds
+
+    def _loop(self) -> None:
+        while not self._stopped.wait(self._check_interval):
+            try:
+                self.tick()
+            except Exception as e:
+                get_logger().exception(e)
+
+    def tick(self) -> None:
+        """Recompute the results if they are due."""
+        with get_db() as db:
+            # Before the tables are created there is nothing to compute, and nothing to log every second
+            if not _has_active_poll(db) or not get_settings(db).open_for_voting:
+                return
+            snapshot = live_bids.snapshot(db)
+
+        if not self.is_due(snapshot.poll_id, snapshot.data_version, time.time()):
+            return
+        if len(snapshot.instance.voter_ids) == 0 or len(snapshot.instance.project_ids) == 0:
+            return
+
+        self._recompute(snapshot)
+
+    def _recompute(self, snapshot: LiveSnapshot) -> None:
+        self._last_started_at = time.time()
+        self._last_version = (snapshot.poll_id, snapshot.data_version)
+
+        run, _ = algorithm_runs_storage.submit(
+            get_jobs(),
+            snapshot.poll_id,
+            snapshot.data_version,
+            snapshot.instance,
+            ScenarioAlgorithm.EQUAL_SHARES,
+            timeout_seconds=self.timeout_seconds,
+        )
+
+        # Wait for the run in steps, so stopping the scheduler does not wait for the run
+        while not run.job.future.done():
+            if self._stopped.is_set():
+                return
+            wait([run.job.future], timeout=self._check_interval)
+
+        try:
+            result = run.job.future.result()
+        except (JobFailedException, CancelledError) as e:
+            get_logger().warning(f"The live results of data version {snapshot.data_version} were not computed: {e}")
+            return
+
+        with self._lock:
+            self._results = LiveResults(
+                poll_id=snapshot.poll_id,
+                data_version=snapshot.data_version,
+                allocations=result.allocations,
+                voters_count=len(snapshot.instance.voter_ids),
+                computed_at=time.time(),
+                elapsed_seconds=result.elapsed_time,
+            )
+
+
+def _has_active_poll(db: psycopg.Connection) -> bool:
+    """If the tables exist and there is an active poll, queried without logging errors."""
+    with db.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('public.polls') IS NOT NULL AND to_regclass('public.settings') IS NOT NULL;")
+        row = cursor.fetchone()
+        if row is None or not row[0]:
+            db.commit()
+            return False
+
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM public.polls WHERE active = TRUE);")
+        row = cursor.fetchone()
+    db.commit()
+    return row is not None and bool(row[0])
+
+
+g_live_results: None | LiveResultsScheduler = None
+
+
+def get_live_results() -> LiveResultsScheduler:
+    if g_live_results is None:
+        raise CriticalException("Live results are disabled")
+    return g_live_results
+
+
+def init_live_results() -> None:
+    """Start the live results scheduler, unless it is disabled"""
+
+    global g_live_results
+    if g_live_results is not None or config.live_results_interval_seconds <= 0:
+        return
+
+    g_live_results = LiveResultsScheduler(
+        interval_seconds=config.live_results_interval_seconds,
+        timeout_seconds=config.live_results_timeout_seconds if config.live_results_timeout_seconds > 0 else None,
+    )
+    g_live_results.start()
+
+
+def close_live_results() -> None:
+    """Stop the live results scheduler"""
+    global g_live_results
+
+    if g_live_results is None:
+        return
+
+    g_live_results.stop()
+    g_live_results = None
@@ -0,0 +1,249 @@
+# Versioned migrations of the database schema.
+#
+# `create_tables` creates the original schema, and every later change of the schema is a migration.
+# The applied migrations are recorded in the `schema_migrations` table, so every migration runs once,
+# in the order of the versions, also on databases that were created before it was added.
+# Optional migrations are applied only when they are enabled in the configuration.
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import psycopg
+
+from src.config import config
+from src.database import db_named_query, get_db
+from src.logger import get_logger
+
+# The key of the advisory lock held while migrating, so concurrent servers do not apply a migration twice
+_MIGRATIONS_LOCK_KEY = 7_316_001
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A change of the schema, the statements run in one transaction."""
+
+    version: int
+    name: str
+    statements: tuple[str, ...]
+    optional: bool = False
+
+    def enabled(self) -> bool:
+        return not self.optional or self.name in config.optional_migrations
+
+
+# The votes of projects or voters that were deleted are not copied,
+# since the foreign keys of a partitioned table are always validated
+_PARTITION_VOTES_STATEMENTS = (
+    """
+    CREATE TABLE public.projects_votes_partitioned (
+        poll_id INTEGER NOT NULL,
+        voter_id INTEGER NOT NULL,
+        project_id INTEGER NOT NULL,
+        points INTEGER NOT NULL CHECK (points >= 0),
+        rank INTEGER NOT NULL,
+        UNIQUE(poll_id, voter_id, project_id),
+        UNIQUE(poll_id, voter_id, rank)
+    ) PARTITION BY LIST (poll_id);
+    """,
+    "CREATE TABLE public.projects_votes_default PARTITION OF public.projects_votes_partitioned DEFAULT;",
+    """
+    DO $$
+    DECLARE
+        poll RECORD;
+    BEGIN
+        FOR poll IN SELECT poll_id FROM public.polls LOOP
+            EXECUTE format(
+                'CREATE TABLE public.projects_votes_%s '
+                'PARTITION OF public.projects_votes_partitioned FOR VALUES IN (%s)',
+                poll.poll_id,
+                poll.poll_id
+            );
+        END LOOP;
+    END $$;
+    """,
+    """
+    INSERT INTO public.projects_votes_partitioned (poll_id, voter_id, project_id, points, rank)
+    SELECT pv.poll_id, pv.voter_id, pv.project_id, pv.points, pv.rank
+    FROM public.projects_votes AS pv
+    WHERE EXISTS (SELECT 1 FROM public.voters AS v WHERE v.id = pv.voter_id)
+        AND EXISTS (SELECT 1 FROM public.projects AS p WHERE p.id = pv.project_id);
+    """,
+    "DROP TABLE public.projects_votes;",
+    "ALTER TABLE public.projects_votes_partitioned RENAME TO projects_votes;",
+    """
+    CREATE INDEX projects_votes_poll_voter_idx
+    ON public.projects_votes (poll_id, voter_id) INCLUDE (project_id, points, rank);
+    """,
+    "CREATE INDEX projects_votes_project_idx ON public.projects_votes (project_id) INCLUDE (voter_id, points);",
+    """
+    ALTER TABLE public.projects_votes
+    ADD CONSTRAINT projects_votes_voter_fk FOREIGN KEY (voter_id) REFERENCES public.voters (id) ON DELETE CASCADE;
+    """,
+    """
+    ALTER TABLE public.projects_votes
+    ADD CONSTRAINT projects_votes_project_fk
+    FOREIGN KEY (project_id) REFERENCES public.projects (id) ON DELETE CASCADE;
+    """,
+)
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        name="settings_data_version",
+        statements=("ALTER TABLE public.settings ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0;",),
+    ),
+    Migration(
+        version=2,
+        name="hot_path_indexes",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS settings_poll_idx ON public.settings (poll_id);",
+            """
+            CREATE INDEX IF NOT EXISTS projects_poll_order_idx
+            ON public.projects (poll_id, order_number, created_at);
+            """,
+            "CREATE INDEX IF NOT EXISTS voters_poll_created_idx ON public.voters (poll_id, created_at, id);",
+            """
+            CREATE INDEX IF NOT EXISTS projects_votes_poll_voter_idx
+            ON public.projects_votes (poll_id, voter_id) INCLUDE (project_id, points, rank);
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS projects_votes_project_idx
+            ON public.projects_votes (project_id) INCLUDE (voter_id, points);
+            """,
+        ),
+    ),
+    Migration(
+        version=3,
+        name="foreign_keys",
+        # NOT VALID: the existing rows are not checked, so a database with orphan rows can still be migrated
+        statements=(
+            """
+            ALTER TABLE public.projects
+            ADD CONSTRAINT projects_poll_fk FOREIGN KEY (poll_id) REFERENCES public.polls (poll_id) NOT VALID;
+            """,
+            """
+            ALTER TABLE public.voters
+            ADD CONSTRAINT voters_poll_fk FOREIGN KEY (poll_id) REFERENCES public.polls (poll_id) NOT VALID;
+            """,
+            """
+            ALTER TABLE public.projects_votes
+            ADD CONSTRAINT projects_votes_voter_fk
+            FOREIGN KEY (voter_id) REFERENCES public.voters (id) ON DELETE CASCADE NOT VALID;
+            """,
+            """
+            ALTER TABLE public.projects_votes
+            ADD CONSTRAINT projects_votes_project_fk
+            FOREIGN KEY (project_id) REFERENCES public.projects (id) ON DELETE CASCADE NOT VALID;
+            """,
+        ),
+    ),
+    Migration(
+        version=4,
+        name="partition_votes",
+        # The votes of every poll in their own partition, so the votes of old polls do not slow down the active one
+        statements=_PARTITION_VOTES_STATEMENTS,
+        optional=True,
+    ),
+]
+
+
+def create_migrations_table(cursor: psycopg.Cursor) -> None:
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        );
+        """
+    )
+
+
+def create_votes_partition(cursor: psycopg.Cursor, poll_id: int) -> None:
+    """Create the partition of the votes of a new poll, if the votes are partitioned."""
+    cursor.execute(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'public.projects_votes'::REGCLASS
+        );
+        """
+    )
+    row = cursor.fetchone()
+    if row is None or not row[0]:
+        return
+
+    poll_id = int(poll_id)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS public.projects_votes_{poll_id} "
+        f"PARTITION OF public.projects_votes FOR VALUES IN ({poll_id});"
+    )
+
+
+@db_named_query
+def get_applied_migrations(db: psycopg.Connection) -> dict[int, datetime]:
+    """Return the time every applied migration was applied at, by version."""
+    with db.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('public.schema_migrations') IS NOT NULL;")
+        row = cursor.fetchone()
+        if row is None or not row[0]:
+            return {}
+
+        cursor.execute("SELECT version, applied_at FROM public.schema_migrations;")
+        rows = cursor.fetchall()
+
+    return {int(row[0]): row[1] for row in rows}
+
+
+@db_named_query
+def apply_migrations(db: psycopg.Connection) -> list[Migration]:
+    """
+    Apply the enabled migrations that were not applied yet, in the order of their versions.
+    Every migration is applied and recorded in one transaction. Returns the applied migrations.
+    """
+    with db.cursor() as cursor:
+        create_migrations_table(cursor)
+        db.commit()
+
+    applied: list[Migration] = []
+    for migration in sorted(MIGRATIONS, key=lambda migration: migration.version):
+        if not migration.enabled():
+            continue
+
+        try:
+            with db.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s);", (_MIGRATIONS_LOCK_KEY,))
+                cursor.execute("SELECT 1 FROM public.schema_migrations WHERE version = %s;", (migration.version,))
+                if cursor.fetchone() is not None:
+                    db.commit()
+                    continue
+
+                for statement in migration.statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    """
+                    INSERT INTO public.schema_migrations (version, name, applied_at)
+                    VALUES (%s, %s, %s);
+                    """,
+                    (migration.version, migration.name, datetime.now()),
+                )
+                db.commit()
+        except psycopg.errors.Error:
+            db.rollback()
+            raise
+
+        get_logger().info(f"Applied the migration {migration.version} ({migration.name})")
+        applied.append(migration)
+
+    return applied
+
+
+def init_migrations() -> None:
+    """Apply the pending migrations, if the tables were created"""
+    with get_db() as db:
+        with db.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('public.polls') IS NOT NULL;")
+            row = cursor.fetchone()
+        db.commit()
+
+        if row is not None and row[0]:
+            apply_migrations(db)
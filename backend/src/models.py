@@ -2,20 +2,29 @@
 # model - a class that represents a table in the database
 # query - or "named query" is a function that performs a query on the database
 
+import threading
+import time
+from array import array
 from datetime import datetime
+from typing import IO, Any, Iterable, Sequence
 
 import psycopg
 from fastapi import HTTPException, status
 from psycopg.types.json import Json
 from pydantic import BaseModel, field_serializer
 
-from src.database import db_named_query
+from src.config import config
+from src.database import db_named_query, start_listener
+from src.migrations import create_migrations_table, create_votes_partition
 
 # Deprecated tables, if table removed it should be here!
 _DEPRECATED_TABLES_NAMES: list[str] = []
 
 # All tables that used in the project should be here!
-_TABLES_NAMES = ["polls", "settings", "projects", "voters", "projects_votes"]
+_TABLES_NAMES = ["polls", "settings", "projects", "voters", "projects_votes", "schema_migrations"]
+
+# The channel of the notifications that the active poll changed, the notification is sent when the change is committed
+_ACTIVE_POLL_CHANNEL = "active_poll_changed"
 
 
 @db_named_query
@@ -46,9 +55,13 @@ def delete_tables(db: psycopg.Connection) -> None:
     """Delete the tables in the database."""
     with db.cursor() as cursor:
         for table_name in _DEPRECATED_TABLES_NAMES + _TABLES_NAMES:
-            cursor.execute(f"DROP TABLE IF EXISTS public.{table_name};")
+            # CASCADE drops the foreign keys of the other tables, and the partitions of the table
+            cursor.execute(f"DROP TABLE IF EXISTS public.{table_name} CASCADE;")
+        cursor.execute(f"NOTIFY {_ACTIVE_POLL_CHANNEL};")
         db.commit()
 
+    active_poll_cache.invalidate()
+
 
 @db_named_query
 def create_tables(db: psycopg.Connection) -> None:
@@ -71,7 +84,8 @@ def create_tables(db: psycopg.Connection) -> None:
                 max_total_points INTEGER NOT NULL,
                 points_step INTEGER NOT NULL,
                 open_for_voting BOOLEAN NOT NULL,
-                results JSON
+                results JSON,
+                data_version BIGINT NOT NULL DEFAULT 0
             );
             """
         )
@@ -120,6 +134,8 @@ def create_tables(db: psycopg.Connection) -> None:
             );
             """
         )
+
+        create_migrations_table(cursor)
         db.commit()
 
 
@@ -156,6 +172,7 @@ def create_poll(db: psycopg.Connection, name: str) -> Poll:
             """,
             (poll_id,),
         )
+        create_votes_partition(cursor, poll_id)
         db.commit()
 
     return Poll(poll_id=poll_id, name=name, active=False)
@@ -230,11 +247,69 @@ def set_poll_active(db: psycopg.Connection, poll_id: int) -> None:
             """,
             (poll_id,),
         )
+        cursor.execute(f"NOTIFY {_ACTIVE_POLL_CHANNEL};")
         db.commit()
 
+    active_poll_cache.invalidate()
+
+
+class ActivePollCache:
+    """
+    The active poll, cached in the process, since nearly every request needs it.
+
+    The cache is invalidated by `set_poll_active`, and in the other processes by the notification
+    it sends. The cached poll also expires after `max_age_seconds`, in case a notification was missed.
+    """
+
+    def __init__(self, max_age_seconds: float) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._poll: Poll | None = None
+        self._cached_at = 0.0
+
+    def get(self) -> Poll | None:
+        with self._lock:
+            if self._poll is None or time.monotonic() - self._cached_at > self.max_age_seconds:
+                return None
+            return self._poll
+
+    def set(self, poll: Poll) -> None:
+        with self._lock:
+            self._poll = poll
+            self._cached_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._poll = None
+
+
+active_poll_cache = ActivePollCache(max_age_seconds=config.active_poll_cache_seconds)
+
+
+def init_active_poll_cache() -> None:
+    """Keep the active poll cache coherent with the other processes, called after the database is initialized"""
+    active_poll_cache.max_age_seconds = config.active_poll_cache_seconds
+    start_listener(_ACTIVE_POLL_CHANNEL, active_poll_cache.invalidate)
+
 
-@db_named_query
 def get_active_poll(db: psycopg.Connection) -> Poll:
+    """The active poll, from the cache if it is there."""
+    poll = active_poll_cache.get()
+    if poll is None:
+        poll = _query_active_poll(db)
+        active_poll_cache.set(poll)
+    return poll
+
+
+def _poll_id(db: psycopg.Connection, poll: Poll | None) -> int:
+    """The id of the given poll context, or of the active poll."""
+    if poll is not None:
+        return poll.poll_id
+    return get_active_poll(db).poll_id
+
+
+@db_named_query
+def _query_active_poll(db: psycopg.Connection) -> Poll:
     with db.cursor() as cursor:
         cursor.execute(
             """
@@ -263,8 +338,8 @@ class Settings(BaseModel):
 
 
 @db_named_query
-def update_settings(db: psycopg.Connection, settings: Settings) -> None:
-    poll_id = get_active_poll(db).poll_id
+def update_settings(db: psycopg.Connection, settings: Settings, poll: Poll | None = None) -> None:
+    poll_id = _poll_id(db, poll)
 
     results = Json(settings.results) if settings.results is not None else None
 
@@ -277,13 +352,14 @@ def update_settings(db: psycopg.Connection, settings: Settings) -> None:
             """,
             (settings.max_total_points, settings.points_step, settings.open_for_voting, results, poll_id),
         )
+        _bump_data_version(cursor, poll_id)
 
         db.commit()
 
 
 @db_named_query
-def get_settings(db: psycopg.Connection) -> Settings:
-    poll_id = get_active_poll(db).poll_id
+def get_settings(db: psycopg.Connection, poll: Poll | None = None) -> Settings:
+    poll_id = _poll_id(db, poll)
 
     with db.cursor() as cursor:
         cursor.execute(
@@ -309,24 +385,62 @@ def get_settings(db: psycopg.Connection) -> Settings:
     )
 
 
+def _bump_data_version(cursor: psycopg.Cursor, poll_id: int) -> None:
+    """Mark that the data of the poll changed, in the transaction of the change."""
+    cursor.execute(
+        """
+        UPDATE public.settings
+        SET data_version = data_version + 1
+        WHERE poll_id = %s;
+        """,
+        (poll_id,),
+    )
+
+
+@db_named_query
+def get_data_version(db: psycopg.Connection, poll: Poll | None = None) -> tuple[int, int]:
+    """
+    Return the id of the active poll and the version of its data.
+    The version is bumped by every change of the settings, the projects or the votes of the poll.
+    """
+    poll_id = _poll_id(db, poll)
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT data_version
+            FROM public.settings
+            WHERE poll_id = %s;
+            """,
+            (poll_id,),
+        )
+        row = cursor.fetchone()
+
+        assert row is not None
+
+    return poll_id, int(row[0])
+
+
 @db_named_query
-def delete_projects_and_votes(db: psycopg.Connection) -> None:
-    poll_id = get_active_poll(db).poll_id
+def delete_projects_and_votes(db: psycopg.Connection, poll: Poll | None = None) -> None:
+    poll_id = _poll_id(db, poll)
 
     with db.cursor() as cursor:
         cursor.execute("DELETE FROM public.projects WHERE poll_id = %s;", (poll_id,))
         cursor.execute("DELETE FROM public.projects_votes WHERE poll_id = %s;", (poll_id,))
         cursor.execute("DELETE FROM public.voters WHERE poll_id = %s;", (poll_id,))
+        _bump_data_version(cursor, poll_id)
         db.commit()
 
 
 @db_named_query
-def delete_votes(db: psycopg.Connection) -> None:
-    poll_id = get_active_poll(db).poll_id
+def delete_votes(db: psycopg.Connection, poll: Poll | None = None) -> None:
+    poll_id = _poll_id(db, poll)
 
     with db.cursor() as cursor:
         cursor.execute("DELETE FROM public.projects_votes WHERE poll_id = %s;", (poll_id,))
         cursor.execute("DELETE FROM public.voters WHERE poll_id = %s;", (poll_id,))
+        _bump_data_version(cursor, poll_id)
         db.commit()
 
 
@@ -359,8 +473,9 @@ def create_project(
     description_2: str,
     fixed: bool,
     order_number: int,
+    poll: Poll | None = None,
 ) -> Project:
-    poll_id = get_active_poll(db).poll_id
+    poll_id = _poll_id(db, poll)
 
     project = Project(
         poll_id=poll_id,
@@ -395,19 +510,20 @@ def create_project(
                 project.created_at,
             ),
         )
-        db.commit()
-
         row = cursor.fetchone()
         assert row is not None
 
         project.project_id = int(row[0])
 
+        _bump_data_version(cursor, poll_id)
+        db.commit()
+
     return project
 
 
 @db_named_query
-def check_project_exists(db: psycopg.Connection, name: str) -> bool:
-    poll_id = get_active_poll(db).poll_id
+def check_project_exists(db: psycopg.Connection, name: str, poll: Poll | None = None) -> bool:
+    poll_id = _poll_id(db, poll)
 
     with db.cursor() as cursor:
         cursor.execute(
@@ -424,8 +540,8 @@ def check_project_exists(db: psycopg.Connection, name: str) -> bool:
 
 
 @db_named_query
-def get_projects(db: psycopg.Connection) -> list[Project]:
-    poll_id = get_active_poll(db).poll_id
+def get_projects(db: psycopg.Connection, poll: Poll | None = None) -> list[Project]:
+    poll_id = _poll_id(db, poll)
 
     with db.cursor() as cursor:
         cursor.execute(
@@ -495,157 +611,434 @@ class VoteData(BaseModel):
     projects: list[ProjectVote]
 
 
-@db_named_query
-def get_voter(db: psycopg.Connection, email: str) -> Voter | None:
-    poll_id = get_active_poll(db).poll_id
+class VoteColumns:
+    """
+    The votes of a poll in columns, with one row for every vote of a voter for a project.
+    The rows of a voter are consecutive, and the voters are in the order they voted.
+    The rows come from the database, so they are not validated and no model is created for them,
+    the models are created only by `votes`.
+    """
 
-    with db.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT id, email, note, created_at
-            FROM public.voters
-            WHERE poll_id = %s AND email = %s;
-            """,
-            (poll_id, email),
-        )
-        row = cursor.fetchone()
+    def __init__(self, poll_id: int) -> None:
+        self.poll_id = poll_id
+        # By voter
+        self.voter_ids = array("q")
+        self.emails: list[str] = []
+        self.notes: list[str] = []
+        self.created_at: list[datetime] = []
+        # By row, `row_voters` is the position of the voter of the row in `voter_ids`
+        self.row_voters = array("q")
+        self.project_ids = array("q")
+        self.points = array("q")
+        self.ranks = array("q")
+
+    @classmethod
+    def of(cls, votes: "VoteColumns | list[VoteData]") -> "VoteColumns":
+        """The columns of the votes, they are returned as is if they are already columns."""
+        if isinstance(votes, VoteColumns):
+            return votes
+
+        columns = cls(votes[0].poll_id if votes else 0)
+        for vote in votes:
+            voter = vote.voter
+            columns.append_rows(
+                (voter.voter_id, voter.email, voter.note, voter.created_at, item.project_id, item.points, item.rank)
+                for item in vote.projects
+            )
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.voter_ids)
+
+    def append_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        """Append rows of (voter_id, email, note, created_at, project_id, points, rank), grouped by voter."""
+        for voter_id, email, note, created_at, project_id, points, rank in rows:
+            if not self.voter_ids or self.voter_ids[-1] != voter_id:
+                self.voter_ids.append(voter_id)
+                self.emails.append(email)
+                self.notes.append(note)
+                self.created_at.append(created_at)
+
+            self.row_voters.append(len(self.voter_ids) - 1)
+            self.project_ids.append(project_id)
+            self.points.append(points)
+            self.ranks.append(rank)
+
+    def points_by_voter(self) -> dict[int, dict[int, int]]:
+        """voter_id -> project_id -> points"""
+        result: dict[int, dict[int, int]] = {voter_id: {} for voter_id in self.voter_ids}
+        for position, project_id, points in zip(self.row_voters, self.project_ids, self.points):
+            result[self.voter_ids[position]][project_id] = points
+        return result
+
+    def votes(self) -> list[VoteData]:
+        """The votes as models, built without validation."""
+        votes = [
+            VoteData.model_construct(
+                poll_id=self.poll_id,
+                voter=Voter.model_construct(
+                    poll_id=self.poll_id, voter_id=voter_id, email=email, note=note, created_at=created_at
+                ),
+                projects=[],
+            )
+            for voter_id, email, note, created_at in zip(self.voter_ids, self.emails, self.notes, self.created_at)
+        ]
+        for position, project_id, points, rank in zip(self.row_voters, self.project_ids, self.points, self.ranks):
+            votes[position].projects.append(
+                ProjectVote.model_construct(
+                    poll_id=self.poll_id,
+                    voter_id=self.voter_ids[position],
+                    project_id=project_id,
+                    points=points,
+                    rank=rank,
+                )
+            )
+        return votes
 
-    if row is None:
-        return None
 
-    return Voter(poll_id=poll_id, voter_id=row[0], email=row[1], note=row[2], created_at=row[3])
+@db_named_query
+def get_votes(db: psycopg.Connection, poll: Poll | None = None) -> list[VoteData]:
+    """get all votes from the database."""
+    return stream_votes(db, poll).votes()
 
 
 @db_named_query
-def save_voter_votes(db: psycopg.Connection, email: str, note: str, projects: list[VoteProjectInput]) -> Voter:
+def stream_votes(db: psycopg.Connection, poll: Poll | None = None, batch_size: int = 10_000) -> VoteColumns:
     """
-    Save the votes of a voter.
-    If the voter does not exist, it will be created.
-    Will delete all previous votes of the voter.
+    Get all votes from the database as columns.
+    The rows are read in batches from a server-side cursor, so they are never all in memory as tuples.
     """
 
-    poll_id = get_active_poll(db).poll_id
+    poll_id = _poll_id(db, poll)
+    columns = VoteColumns(poll_id)
 
-    voter = Voter(poll_id=poll_id, email=email, note=note, created_at=datetime.now())
-
-    with db.cursor() as cursor:
+    with db.cursor(name="stream_votes") as cursor:
+        cursor.itersize = batch_size
         cursor.execute(
             """
-            SELECT poll_id, email FROM public.voters WHERE poll_id = %s AND email = %s;
+            SELECT v.id, v.email, v.note, v.created_at, pv.project_id, pv.points, pv.rank
+            FROM public.voters AS v
+            JOIN public.projects_votes AS pv ON pv.poll_id = v.poll_id AND pv.voter_id = v.id
+            WHERE v.poll_id = %s
+            ORDER BY v.created_at, v.id, pv.rank;
             """,
-            (poll_id, voter.email),
+            (poll_id,),
         )
-        voter_exists = cursor.fetchone() is not None
+        while rows := cursor.fetchmany(batch_size):
+            columns.append_rows(rows)
+
+    return columns
+
+
+class ProjectBids(BaseModel):
+    """The positive bids for a project, and their summary."""
+
+    project_id: int
+    min_points: int
+    max_points: int
+    # The positions of the voters of the bids in `PollBids.voter_ids`, in the order of the voters
+    voters: list[int]
+    points: list[int]
+    max_bid: int
+    supporters_count: int
+    total_points: int
 
-    if not voter_exists:
-        with db.cursor() as cursor:
-            cursor.execute(
-                """
-                INSERT INTO public.voters (poll_id, email, note, created_at)
-                VALUES (%s, %s, %s, %s);
-                """,
-                (poll_id, voter.email, voter.note, voter.created_at),
-            )
-            db.commit()
+
+class PollBids(BaseModel):
+    """The input of the algorithm for a poll, aggregated by the database."""
+
+    poll_id: int
+    budget: int
+    # The voters that voted, in the order they voted
+    voter_ids: list[int]
+    projects: list[ProjectBids]
+
+
+@db_named_query
+def get_poll_bids(db: psycopg.Connection, poll: Poll | None = None) -> PollBids:
+    """
+    Get the bids for every project of the poll, grouped by project in the database, in one query.
+    The projects are in the order of `get_projects` and the voters in the order of `get_votes`.
+    """
+
+    poll_id = _poll_id(db, poll)
 
     with db.cursor() as cursor:
         cursor.execute(
             """
-            SELECT id FROM public.voters WHERE poll_id = %s AND email = %s;
+            WITH poll_voters AS (
+                SELECT v.id, ROW_NUMBER() OVER (ORDER BY v.created_at, v.id) - 1 AS position
+                FROM public.voters AS v
+                WHERE v.poll_id = %(poll_id)s
+                    AND EXISTS (
+                        SELECT 1 FROM public.projects_votes AS pv WHERE pv.poll_id = v.poll_id AND pv.voter_id = v.id
+                    )
+            ),
+            project_bids AS (
+                SELECT
+                    p.id,
+                    p.order_number,
+                    p.created_at,
+                    p.min_points,
+                    p.max_points,
+                    COALESCE(
+                        ARRAY_AGG(pvo.position ORDER BY pvo.position) FILTER (WHERE pv.points > 0), '{}'::BIGINT[]
+                    ) AS voters,
+                    COALESCE(
+                        ARRAY_AGG(pv.points ORDER BY pvo.position) FILTER (WHERE pv.points > 0), '{}'::INTEGER[]
+                    ) AS points,
+                    COALESCE(MAX(pv.points), 0) AS max_bid,
+                    COUNT(*) FILTER (WHERE pv.points > 0) AS supporters_count,
+                    COALESCE(SUM(pv.points), 0) AS total_points
+                FROM public.projects AS p
+                LEFT JOIN public.projects_votes AS pv ON pv.poll_id = p.poll_id AND pv.project_id = p.id
+                LEFT JOIN poll_voters AS pvo ON pvo.id = pv.voter_id
+                WHERE p.poll_id = %(poll_id)s
+                GROUP BY p.id
+            )
+            SELECT
+                (SELECT max_total_points FROM public.settings WHERE poll_id = %(poll_id)s),
+                (SELECT COALESCE(ARRAY_AGG(id ORDER BY position), '{}'::INTEGER[]) FROM poll_voters),
+                (
+                    SELECT COALESCE(
+                        JSONB_AGG(
+                            JSONB_BUILD_OBJECT(
+                                'project_id', id,
+                                'min_points', min_points,
+                                'max_points', max_points,
+                                'voters', voters,
+                                'points', points,
+                                'max_bid', max_bid,
+                                'supporters_count', supporters_count,
+                                'total_points', total_points
+                            )
+                            ORDER BY order_number, created_at, id
+                        ),
+                        '[]'::JSONB
+                    )
+                    FROM project_bids
+                );
             """,
-            (poll_id, email),
+            {"poll_id": poll_id},
         )
-        db.commit()
         row = cursor.fetchone()
-        assert row is not None
 
-        voter.voter_id = int(row[0])
+        assert row is not None and row[0] is not None
 
-    with db.cursor() as cursor:
-        cursor.execute(
-            """
-            DELETE FROM public.projects_votes WHERE poll_id = %s AND voter_id = %s;
-            """,
-            (poll_id, voter.voter_id),
-        )
-        db.commit()
+    # The rows come from the database, so they are not validated
+    return PollBids.model_construct(
+        poll_id=poll_id,
+        budget=row[0],
+        voter_ids=row[1],
+        projects=[ProjectBids.model_construct(**project) for project in row[2]],
+    )
 
-    with db.cursor() as cursor:
-        for project in projects:
-            cursor.execute(
-                """
-                INSERT INTO public.projects_votes (poll_id, voter_id, project_id, points, rank)
-                VALUES (%s, %s, %s, %s, %s);
-                """,
-                (poll_id, voter.voter_id, project.project_id, project.points, project.rank),
-            )
 
-        db.commit()
+class ImportVotesResult(BaseModel):
+    """The result of a bulk import of votes, nothing is imported if there are errors."""
 
-    return voter
+    voters_count: int = 0
+    votes_count: int = 0
+    errors: list[str] = []
 
 
-@db_named_query
-def get_votes(db: psycopg.Connection) -> list[VoteData]:
-    """get all votes from the database."""
+# The columns of a bulk import of votes, `project` is the name or the id of the project
+IMPORT_VOTES_COLUMNS = ("email", "project", "points", "rank")
+
+# The number of errors reported by each validation of a bulk import
+_IMPORT_ERRORS_LIMIT = 10
 
-    poll_id = get_active_poll(db).poll_id
+
+@db_named_query
+def import_votes_csv(db: psycopg.Connection, file: IO[bytes], poll: Poll | None = None) -> ImportVotesResult:
+    """
+    Import votes from a CSV file with the header `email,project,points,rank`, in one transaction.
+    The file is streamed to the database with COPY.
+    The votes of every voter in the file replace their previous votes, voters that do not exist are created.
+    The rows are validated like the votes of the form: the points of each voter must be in the ranges of
+    the projects, divisible by the points step and sum up to the total, and the ranks of each voter must be 1..n.
+    """
+    if poll is None:
+        poll = get_active_poll(db)
+    poll_id = poll.poll_id
+    settings = get_settings(db, poll)
 
     with db.cursor() as cursor:
+        # The staging table is dropped at the end of the transaction, also when it is rolled back
         cursor.execute(
             """
-            SELECT v.id, v.email, v.note, v.created_at, pv.project_id, pv.points, pv.rank
-            FROM public.voters AS v
-            JOIN public.projects_votes AS pv ON pv.voter_id = v.id
-            WHERE v.poll_id = %s
-            ORDER BY v.created_at, pv.rank;
+            CREATE TEMP TABLE import_votes (
+                line BIGSERIAL,
+                email TEXT,
+                project TEXT,
+                points INTEGER,
+                rank INTEGER,
+                project_id INTEGER
+            ) ON COMMIT DROP;
+            """
+        )
+
+        try:
+            with cursor.copy(
+                f"COPY import_votes ({', '.join(IMPORT_VOTES_COLUMNS)}) FROM STDIN WITH (FORMAT csv, HEADER MATCH);"
+            ) as copy:
+                while chunk := file.read(1024 * 1024):
+                    copy.write(chunk)
+        except psycopg.errors.DataError as e:
+            db.rollback()
+            return ImportVotesResult(errors=[f"Invalid file: {e}"])
+
+        cursor.execute(
+            """
+            UPDATE import_votes AS i
+            SET project_id = p.id
+            FROM public.projects AS p
+            WHERE p.poll_id = %s AND (p.name = i.project OR p.id::TEXT = i.project);
             """,
             (poll_id,),
         )
-        rows = cursor.fetchall()
 
-    votes: dict[int, VoteData] = {}
-    for row in rows:
-        voter_id = row[0]
-        if voter_id not in votes:
-            votes[voter_id] = VoteData(
-                poll_id=poll_id,
-                voter=Voter(poll_id=poll_id, voter_id=voter_id, email=row[1], note=row[2], created_at=row[3]),
-                projects=[],
-            )
+        errors = _validate_import_votes(cursor, poll_id, settings)
+        if errors:
+            db.rollback()
+            return ImportVotesResult(errors=errors)
 
-        votes[voter_id].projects.append(
-            ProjectVote(
-                poll_id=poll_id,
-                voter_id=voter_id,
-                project_id=row[4],
-                points=row[5],
-                rank=row[6],
-            )
+        # The new voters are ordered by their first row, as if they voted in this order
+        cursor.execute(
+            """
+            INSERT INTO public.voters (poll_id, email, note, created_at)
+            SELECT %s, email, '', %s::TIMESTAMP + first_line * INTERVAL '1 microsecond'
+            FROM (SELECT email, MIN(line) AS first_line FROM import_votes GROUP BY email) AS emails
+            ORDER BY first_line
+            ON CONFLICT (poll_id, email) DO NOTHING;
+            """,
+            (poll_id, datetime.now()),
         )
+        cursor.execute(
+            """
+            DELETE FROM public.projects_votes AS pv
+            USING public.voters AS v
+            WHERE pv.poll_id = %s AND pv.voter_id = v.id AND v.poll_id = %s
+                AND v.email IN (SELECT email FROM import_votes);
+            """,
+            (poll_id, poll_id),
+        )
+        cursor.execute(
+            """
+            INSERT INTO public.projects_votes (poll_id, voter_id, project_id, points, rank)
+            SELECT %s, v.id, i.project_id, i.points, i.rank
+            FROM import_votes AS i
+            JOIN public.voters AS v ON v.poll_id = %s AND v.email = i.email;
+            """,
+            (poll_id, poll_id),
+        )
+        votes_count = cursor.rowcount
 
-    return list(votes.values())
-
+        cursor.execute("SELECT COUNT(DISTINCT email) FROM import_votes;")
+        row = cursor.fetchone()
+        assert row is not None
+        voters_count = int(row[0])
 
-@db_named_query
-def get_voter_votes(db: psycopg.Connection, email: str) -> list[ProjectVote]:
-    poll_id = get_active_poll(db).poll_id
+        _bump_data_version(cursor, poll_id)
+        db.commit()
 
-    with db.cursor() as cursor:
-        cursor.execute(
+    return ImportVotesResult(voters_count=voters_count, votes_count=votes_count)
+
+
+def _validate_import_votes(cursor: psycopg.Cursor, poll_id: int, settings: Settings) -> list[str]:
+    """Validate the staged votes with set-based queries, returns the errors."""
+    cursor.execute(
+        """
+        SELECT
+            max_total_points - COALESCE((
+                SELECT SUM(min_points) FROM public.projects WHERE poll_id = %s AND fixed
+            ), 0),
+            (SELECT COUNT(*) FROM public.projects WHERE poll_id = %s)
+        FROM public.settings
+        WHERE poll_id = %s;
+        """,
+        (poll_id, poll_id, poll_id),
+    )
+    row = cursor.fetchone()
+    assert row is not None
+    total_points = int(row[0])
+    projects_count = int(row[1])
+
+    checks: list[tuple[str, str, tuple]] = [
+        (
+            "Line {}: missing values",
             """
-            SELECT v.id, pv.project_id, pv.points, pv.rank
-            FROM public.voters AS v
-            JOIN public.projects_votes AS pv ON v.id = pv.voter_id
-            WHERE v.poll_id = %s AND v.email = %s
-            ORDER BY pv.project_id;
+            SELECT line FROM import_votes
+            WHERE email IS NULL OR project IS NULL OR points IS NULL OR rank IS NULL
+            ORDER BY line
             """,
-            (poll_id, email),
-        )
-        rows = cursor.fetchall()
+            (),
+        ),
+        (
+            "Line {}: unknown project '{}'",
+            "SELECT line, project FROM import_votes WHERE project IS NOT NULL AND project_id IS NULL ORDER BY line",
+            (),
+        ),
+        (
+            "Line {}: invalid points {}",
+            """
+            SELECT i.line, i.points
+            FROM import_votes AS i
+            JOIN public.projects AS p ON p.id = i.project_id
+            WHERE i.points < 0
+                OR i.points %% %s <> 0
+                OR (i.points > 0 AND (i.points < p.min_points OR i.points > p.max_points))
+            ORDER BY i.line
+            """,
+            (settings.points_step,),
+        ),
+        (
+            "Voter {}: more than one row for project '{}'",
+            """
+            SELECT email, MIN(project) FROM import_votes
+            WHERE project_id IS NOT NULL
+            GROUP BY email, project_id
+            HAVING COUNT(*) > 1
+            ORDER BY email
+            """,
+            (),
+        ),
+        (
+            # Like the form, every voter must have a row for every project of the poll
+            "Voter {}: votes for {} projects instead of " + str(projects_count),
+            """
+            SELECT email, COUNT(DISTINCT project_id) FROM import_votes
+            GROUP BY email
+            HAVING COUNT(DISTINCT project_id) <> %s
+            ORDER BY email
+            """,
+            (projects_count,),
+        ),
+        (
+            "Voter {}: total points {} instead of " + str(total_points),
+            """
+            SELECT email, SUM(points) FROM import_votes
+            GROUP BY email
+            HAVING SUM(points) <> %s
+            ORDER BY email
+            """,
+            (total_points,),
+        ),
+        (
+            "Voter {}: the ranks are not 1 to {}",
+            """
+            SELECT email, COUNT(*) FROM import_votes
+            GROUP BY email
+            HAVING MIN(rank) <> 1 OR MAX(rank) <> COUNT(*) OR COUNT(DISTINCT rank) <> COUNT(*)
+            ORDER BY email
+            """,
+            (),
+        ),
+    ]
 
-    votes: list[ProjectVote] = []
-    for row in rows:
-        votes.append(ProjectVote(poll_id=poll_id, voter_id=row[0], project_id=row[1], points=row[2], rank=row[3]))
+    errors: list[str] = []
+    for message, query, params in checks:
+        cursor.execute(f"{query} LIMIT {_IMPORT_ERRORS_LIMIT};", params)
+        errors.extend(message.format(*row) for row in cursor.fetchall())
 
-    return votes
+    return errors
@@ -0,0 +1,193 @@
+# Async named queries for the routes of the voting form, on the async connection pool.
+# The models, and the queries of the other routes, are in `src/models.py`.
+
+from datetime import datetime
+
+import psycopg
+from fastapi import HTTPException, status
+
+from src.database import db_async_named_query
+from src.models import Poll, Project, ProjectVote, Settings, Voter, VoteProjectInput, active_poll_cache
+
+
+async def get_active_poll(db: psycopg.AsyncConnection) -> Poll:
+    """The active poll, from the cache if it is there."""
+    poll = active_poll_cache.get()
+    if poll is None:
+        poll = await _query_active_poll(db)
+        active_poll_cache.set(poll)
+    return poll
+
+
+@db_async_named_query
+async def _query_active_poll(db: psycopg.AsyncConnection) -> Poll:
+    async with db.cursor() as cursor:
+        await cursor.execute(
+            """
+            SELECT poll_id, name, active
+            FROM public.polls
+            WHERE active = TRUE;
+            """,
+        )
+        row = await cursor.fetchone()
+
+    if row is None:
+        # This should never happen
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No active poll found")
+
+    return Poll(poll_id=row[0], name=row[1], active=row[2])
+
+
+@db_async_named_query
+async def get_settings(db: psycopg.AsyncConnection, poll: Poll) -> Settings:
+    async with db.cursor() as cursor:
+        await cursor.execute(
+            """
+            SELECT max_total_points, points_step, open_for_voting, results
+            FROM public.settings
+            WHERE poll_id = %s;
+            """,
+            (poll.poll_id,),
+        )
+        row = await cursor.fetchone()
+
+        assert row is not None
+
+    return Settings(
+        poll_id=poll.poll_id,
+        max_total_points=row[0],
+        points_step=row[1],
+        open_for_voting=row[2],
+        results=row[3],
+    )
+
+
+@db_async_named_query
+async def get_projects(db: psycopg.AsyncConnection, poll: Poll) -> list[Project]:
+    async with db.cursor() as cursor:
+        await cursor.execute(
+            """
+            SELECT id, name, min_points, max_points, description_1, description_2, fixed, order_number, created_at
+            FROM public.projects
+            WHERE poll_id = %s
+            ORDER BY order_number, created_at;
+            """,
+            (poll.poll_id,),
+        )
+        rows = await cursor.fetchall()
+
+    return [
+        Project(
+            poll_id=poll.poll_id,
+            project_id=row[0],
+            name=row[1],
+            min_points=row[2],
+            max_points=row[3],
+            description_1=row[4],
+            description_2=row[5],
+            fixed=bool(row[6]),
+            order_number=row[7],
+            created_at=row[8],
+        )
+        for row in rows
+    ]
+
+
+@db_async_named_query
+async def get_voter(db: psycopg.AsyncConnection, email: str, poll: Poll) -> Voter | None:
+    async with db.cursor() as cursor:
+        await cursor.execute(
+            """
+            SELECT id, email, note, created_at
+            FROM public.voters
+            WHERE poll_id = %s AND email = %s;
+            """,
+            (poll.poll_id, email),
+        )
+        row = await cursor.fetchone()
+
+    if row is None:
+        return None
+
+    return Voter(poll_id=poll.poll_id, voter_id=row[0], email=row[1], note=row[2], created_at=row[3])
+
+
+@db_async_named_query
+async def get_voter_votes(db: psycopg.AsyncConnection, email: str, poll: Poll) -> list[ProjectVote]:
+    async with db.cursor() as cursor:
+        await cursor.execute(
+            """
+            SELECT v.id, pv.project_id, pv.points, pv.rank
+            FROM public.voters AS v
+            JOIN public.projects_votes AS pv ON pv.poll_id = v.poll_id AND pv.voter_id = v.id
+            WHERE v.poll_id = %s AND v.email = %s
+            ORDER BY pv.project_id;
+            """,
+            (poll.poll_id, email),
+        )
+        rows = await cursor.fetchall()
+
+    return [
+        ProjectVote(poll_id=poll.poll_id, voter_id=row[0], project_id=row[1], points=row[2], rank=row[3])
+        for row in rows
+    ]
+
+
+@db_async_named_query
+async def save_voter_votes(
+    db: psycopg.AsyncConnection, email: str, note: str, projects: list[VoteProjectInput], poll: Poll
+) -> tuple[Voter, int]:
+    """
+    Save the votes of a voter, in one transaction.
+    If the voter does not exist, it will be created, otherwise its note is updated.
+    Will delete all previous votes of the voter.
+    Returns the voter and the data version of the poll after the change.
+    """
+
+    voter = Voter(poll_id=poll.poll_id, email=email, note=note, created_at=datetime.now())
+
+    async with db.cursor() as cursor:
+        # The created_at of an existing voter is kept, the voters are ordered by their first vote
+        await cursor.execute(
+            """
+            INSERT INTO public.voters (poll_id, email, note, created_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (poll_id, email) DO UPDATE SET note = EXCLUDED.note
+            RETURNING id, created_at;
+            """,
+            (poll.poll_id, voter.email, voter.note, voter.created_at),
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+
+        voter.voter_id = int(row[0])
+        voter.created_at = row[1]
+
+        await cursor.execute(
+            """
+            DELETE FROM public.projects_votes WHERE poll_id = %s AND voter_id = %s;
+            """,
+            (poll.poll_id, voter.voter_id),
+        )
+        await cursor.executemany(
+            """
+            INSERT INTO public.projects_votes (poll_id, voter_id, project_id, points, rank)
+            VALUES (%s, %s, %s, %s, %s);
+            """,
+            [(poll.poll_id, voter.voter_id, project.project_id, project.points, project.rank) for project in projects],
+        )
+        await cursor.execute(
+            """
+            UPDATE public.settings
+            SET data_version = data_version + 1
+            WHERE poll_id = %s
+            RETURNING data_version;
+            """,
+            (poll.poll_id,),
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+
+        await db.commit()
+
+    return voter, int(row[0])
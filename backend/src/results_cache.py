@@ -0,0 +1,72 @@
+# Cache of the results and the derived artifacts of the data of the polls.
+#
+# Every result of a poll (the output of the algorithm, the CSV files of a report, the visualization)
+# is a pure function of its settings, projects and votes. The writes to these tables bump the
+# data version of the poll (see `get_data_version` in the models), so the entries are keyed by
+# (poll_id, data_version) and an entry of an older version is never served again.
+
+import threading
+from typing import Any, Callable, TypeVar
+
+ValueT = TypeVar("ValueT")
+
+
+class PollDataCache:
+    """
+    The cached values of the latest data version of every poll, by name.
+    Storing a value for a newer version of a poll drops the values of its older versions.
+
+    Usage:
+        files = results_cache.get(poll_id, data_version, "report_files")
+        if files is None:
+            files = create_files()
+            results_cache.put(poll_id, data_version, "report_files", files)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # poll_id -> (data_version, name -> value)
+        self._polls: dict[int, tuple[int, dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, poll_id: int, data_version: int, name: str) -> Any | None:
+        with self._lock:
+            entry = self._polls.get(poll_id)
+            if entry is None or entry[0] != data_version or name not in entry[1]:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return entry[1][name]
+
+    def put(self, poll_id: int, data_version: int, name: str, value: Any) -> None:
+        """Store the value, ignored if a newer version of the poll is already cached."""
+        with self._lock:
+            entry = self._polls.get(poll_id)
+            if entry is None or entry[0] < data_version:
+                entry = (data_version, {})
+                self._polls[poll_id] = entry
+            elif entry[0] > data_version:
+                return
+
+            entry[1][name] = value
+
+    def get_or_create(self, poll_id: int, data_version: int, name: str, create: Callable[[], ValueT]) -> ValueT:
+        """Return the cached value, or create and store it. `create` runs outside of the lock."""
+        value = self.get(poll_id, data_version, name)
+        if value is None:
+            value = create()
+            self.put(poll_id, data_version, name, value)
+        return value
+
+    def invalidate(self, poll_id: int) -> None:
+        with self._lock:
+            self._polls.pop(poll_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._polls.clear()
+
+
+results_cache = PollDataCache()
@@ -1,5 +1,6 @@
 # Router for management endpoints by admin
 
+import time
 import urllib.parse
 from io import BytesIO
 from uuid import UUID
@@ -9,7 +10,10 @@ import psycopg
 from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile, status
 
 from src.config import config
-from src.database import db_dependency
+from src.database import db_dependency, get_pools_stats
+from src.exceptions import CriticalException
+from src.live_results import get_live_results
+from src.migrations import MIGRATIONS, apply_migrations, get_applied_migrations
 from src.models import (
     check_project_exists,
     create_poll,
@@ -19,12 +23,14 @@ from src.models import (
     delete_tables,
     delete_votes,
     get_active_poll,
+    get_data_version,
     get_poll_by_id,
     get_poll_by_name,
     get_polls,
     get_projects,
     get_settings,
     get_tables_exists,
+    import_votes_csv,
     set_poll_active,
     update_settings,
 )
@@ -71,10 +77,75 @@ def route_create_tables(
         }
 
     create_tables(db)
+    apply_migrations(db)
 
     return {"status": "ok", "message": "Tables have been created"}
 
 
+@router.get("/db-pool")
+def route_get_db_pool(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+) -> dict:
+    """
+    Get the statistics of the database connection pools, for sizing them against the load. \\
+    For every pool: its size, the connections in use, the waiting requests, the errors,
+    and a cumulative histogram of the time the requests waited for a connection.
+    """
+
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    return {"status": "ok", "pools": get_pools_stats()}
+
+
+@router.get("/migrations")
+def route_get_migrations(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    db: psycopg.Connection = Depends(db_dependency),
+) -> dict:
+    """Get the migrations of the schema, and when they were applied"""
+
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    applied = get_applied_migrations(db)
+
+    return {
+        "status": "ok",
+        "migrations": [
+            {
+                "version": migration.version,
+                "name": migration.name,
+                "optional": migration.optional,
+                "enabled": migration.enabled(),
+                "applied_at": applied[migration.version].isoformat() if migration.version in applied else None,
+            }
+            for migration in MIGRATIONS
+        ],
+    }
+
+
+@router.post("/migrate")
+def route_migrate(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    db: psycopg.Connection = Depends(db_dependency),
+) -> dict:
+    """
+    Apply the migrations of the schema that were not applied yet. \\
+    The migrations are also applied when the server starts.
+    """
+
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    if not get_tables_exists(db)["polls"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tables do not exist")
+
+    applied = apply_migrations(db)
+
+    return {"status": "ok", "applied": [migration.name for migration in applied]}
+
+
 @router.get("/polls/list")
 def route_get_polls_list(
     admin_key: UUID = Query(description="key for authentication of admin"),
@@ -408,6 +479,31 @@ async def route_add_projects(
     }
 
 
+@router.post("/import-votes")
+def route_import_votes(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    file: UploadFile = File(description="CSV file with the votes"),
+    db: psycopg.Connection = Depends(db_dependency),
+) -> dict:
+    """
+    Import the votes of many voters to the active poll, in one transaction. \\
+    The CSV file must have the header `email,project,points,rank` (`project` is the name or the id of the project),
+    and one row for every project of every voter.
+    The votes of every voter in the file replace their previous votes, and voters that do not exist are created.
+    Nothing is imported if any row is invalid.
+    """
+
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    result = import_votes_csv(db, file.file)
+
+    if result.errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result.errors)
+
+    return {"status": "ok", "voters_count": result.voters_count, "votes_count": result.votes_count}
+
+
 @router.get("/projects")
 def route_get_projects(
     admin_key: UUID = Query(description="key for authentication of admin"),
@@ -427,6 +523,43 @@ def route_get_projects(
     }
 
 
+@router.get("/live-results")
+def route_get_live_results(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    db: psycopg.Connection = Depends(db_dependency),
+) -> dict:
+    """
+    Get the live results of the active poll, a preview of the results while the poll is open for voting.
+    The results are recomputed in the background when the votes change, at most once per
+    `LIVE_RESULTS_INTERVAL_SECONDS`. `is_stale` tells if the votes changed since they were computed.
+    """
+
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    try:
+        scheduler = get_live_results()
+    except CriticalException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live results are disabled")
+
+    poll_id, data_version = get_data_version(db)
+    results = scheduler.results
+
+    if results is None or results.poll_id != poll_id:
+        return {"status": "not_computed", "data_version": data_version, "results": None}
+
+    return {
+        "status": "ok",
+        "data_version": data_version,
+        "results_data_version": results.data_version,
+        "is_stale": results.data_version != data_version,
+        "age_seconds": time.time() - results.computed_at,
+        "elapsed_seconds": results.elapsed_seconds,
+        "voters_count": results.voters_count,
+        "results": {project_id: int(allocation) for project_id, allocation in results.allocations.items()},
+    }
+
+
 @router.get("/create-token")
 def route_create_token(
     admin_key: UUID = Query(description="key for authentication of admin"),
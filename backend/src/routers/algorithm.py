@@ -0,0 +1,139 @@
+# Router for running the algorithm on an input given in the request, as a service for other systems.
+
+import asyncio
+import time
+from http import HTTPStatus
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+
+from src.algorithm.columnar import load_instance_npz_bytes
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.public import PublicEqualSharesInput, PublicEqualSharesResponse
+from src.algorithm.scenarios import Scenario, ScenarioAlgorithm, ScenarioResult
+from src.config import config
+from src.exceptions import JobFailedException
+from src.jobs import Job, JobStatus, get_jobs
+
+router = APIRouter()
+
+# The content types of the columnar (.npz) input, any other content type is parsed as JSON
+NPZ_CONTENT_TYPES = ("application/x-npz", "application/octet-stream")
+
+
+class InFlightJobs:
+    """
+    The jobs that are running for the inputs of requests, by the fingerprint of the input.
+    Concurrent requests with the same input wait for the same job instead of running the algorithm again.
+
+    Used only from the event loop, so it needs no lock.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, tuple[Job, asyncio.Future]] = {}
+
+    def submit(self, instance: PreparedInstance) -> tuple[Job, asyncio.Future, bool]:
+        """Return the job of the input and a future of its result, and True if the job was already running."""
+        fingerprint = instance.fingerprint()
+        in_flight = self._jobs.get(fingerprint)
+        if in_flight is not None:
+            return in_flight[0], in_flight[1], True
+
+        job = get_jobs().submit(instance, Scenario("public", algorithm=ScenarioAlgorithm.EQUAL_SHARES))
+        future = asyncio.wrap_future(job.future)
+        self._jobs[fingerprint] = (job, future)
+        future.add_done_callback(lambda _: self._jobs.pop(fingerprint, None))
+        return job, future, False
+
+
+in_flight_jobs = InFlightJobs()
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Read the body of the request, stops reading as soon as it is larger than the limit."""
+    # The 413 and 422 constants of starlette were renamed after the locked version, and the old names are deprecated
+    too_large = HTTPException(
+        status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE, detail=f"The input is larger than {max_bytes} bytes"
+    )
+
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _parse_input(body: bytes, content_type: str) -> PreparedInstance:
+    if content_type.split(";")[0].strip().lower() in NPZ_CONTENT_TYPES:
+        return load_instance_npz_bytes(body)
+
+    instance = PublicEqualSharesInput.model_validate_json(body).prepared_instance()
+    instance.validate()
+    return instance
+
+
+@router.post("")
+async def run_algorithm_route(
+    request: Request,
+    response: Response,
+    admin_key: UUID = Query(description="key for authentication of admin"),
+) -> PublicEqualSharesResponse:
+    """
+    Run the algorithm of equal shares on the input in the body, and return the allocations.
+
+    The body is a `PublicEqualSharesInput` as JSON, or the columnar `.npz` format of
+    `python -m src convert-input` with the content type `application/x-npz`.
+
+    The algorithm runs in the algorithm worker pool. Identical inputs that are running at the same time
+    share one run. The timings are returned in the `Server-Timing` header, and `X-Deduplicated` tells
+    whether the request waited for the run of an identical request.
+    """
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    start_time = time.time()
+    body = await _read_body(request, config.algorithm_max_payload_mb * 1024 * 1024)
+
+    # Parsing a large input takes a while, it is done in a thread to keep the event loop free
+    try:
+        instance = await run_in_threadpool(_parse_input, body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e))
+    del body
+    parse_time = time.time() - start_time
+
+    job, future, deduplicated = in_flight_jobs.submit(instance)
+    del instance
+
+    try:
+        result: ScenarioResult = await asyncio.shield(future)
+    except JobFailedException as e:
+        if job.status == JobStatus.TIMED_OUT:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    except asyncio.CancelledError:
+        if future.cancelled():
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="The run was cancelled")
+        raise
+
+    assert job.started_at is not None and job.finished_at is not None
+    timings = {
+        "parse": parse_time,
+        "queue": job.started_at - job.created_at,
+        "compute": job.finished_at - job.started_at,
+        "total": time.time() - start_time,
+    }
+    response.headers["Server-Timing"] = ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()
+    )
+    response.headers["X-Deduplicated"] = "true" if deduplicated else "false"
+
+    return PublicEqualSharesResponse(results={int(k): int(v) for k, v in result.allocations.items()})
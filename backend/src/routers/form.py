@@ -1,14 +1,15 @@
 # Router for the voting form page.
+# The routes are async and use the async connection pool, so a request waiting for the database does not hold
+# a thread of the threadpool, and the number of concurrent requests is limited by the pool instead of the threads.
 
 import psycopg
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
 
-from src.database import db_dependency
-from src.models import (
-    Project,
-    ProjectVote,
-    Settings,
-    VoteProjectInput,
+from src.database import async_db_dependency
+from src.live_bids import live_bids
+from src.models import Project, ProjectVote, Settings, VoteProjectInput
+from src.models_async import (
     get_active_poll,
     get_projects,
     get_settings,
@@ -67,55 +68,57 @@ def _create_data_response_schema(
 
 
 @router.post("/data")
-def route_data(
+async def route_data(
     email: str = Query(description="voter email"),
     token: str = Query(description="voter email as token using RSA"),
-    db: psycopg.Connection = Depends(db_dependency),
+    db: psycopg.AsyncConnection = Depends(async_db_dependency),
 ) -> DataResponseSchema:
     """Get the data for the voting form page"""
 
     if not verify_valid_email(email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid email")
 
-    if not verify_valid_token(email, token):
+    # The token is decrypted with RSA, in a thread so it does not block the event loop
+    if not await run_in_threadpool(verify_valid_token, email, token):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized, the token is invalid")
 
-    settings = get_settings(db)
-    projects = get_projects(db)
-    votes = get_voter_votes(db, email)
+    poll = await get_active_poll(db)
+    settings = await get_settings(db, poll)
+    projects = await get_projects(db, poll)
+    votes = await get_voter_votes(db, email, poll)
 
-    voter = get_voter(db, email)
+    voter = await get_voter(db, email, poll)
     note = voter.note if voter is not None else ""
 
     return _create_data_response_schema(settings, projects, votes, note)
 
 
 @router.post("/vote")
-def route_vote(
+async def route_vote(
     email: str = Query(description="voter email"),
     token: str = Query(description="voter email as token using RSA"),
     body: VoteRequestBodySchema = Body(description="the vote data"),
-    db: psycopg.Connection = Depends(db_dependency),
+    db: psycopg.AsyncConnection = Depends(async_db_dependency),
 ) -> DataResponseSchema:
     """Save vote of voter"""
     try:
         logger.info(f"Received vote request - email: {email}")
         logger.info(f"Vote data: {body}")
 
-        poll = get_active_poll(db)
+        poll = await get_active_poll(db)
 
         if not verify_valid_email(email):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid email")
 
-        if not verify_valid_token(email, token):
+        if not await run_in_threadpool(verify_valid_token, email, token):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized, the token is invalid")
 
-        settings = get_settings(db)
+        settings = await get_settings(db, poll)
 
         if not settings.open_for_voting:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Voting is not open for the public")
 
-        projects = get_projects(db)
+        projects = await get_projects(db, poll)
 
         max_total_points = settings.max_total_points
         max_total_points -= sum([project.min_points for project in projects if project.fixed])
@@ -175,10 +178,14 @@ def route_vote(
             )
             for vote in body.projects
         ]
-        save_voter_votes(db, email, body.note, vote_input)
+        voter, data_version = await save_voter_votes(db, email, body.note, vote_input, poll)
+        # If other changes were committed in between, the bid matrix is reloaded by its next snapshot
+        live_bids.apply(
+            poll.poll_id, data_version, voter.voter_id, {project.project_id: project.points for project in vote_input}
+        )
 
         # get the updated votes
-        votes = get_voter_votes(db, email)
+        votes = await get_voter_votes(db, email, poll)
 
         return _create_data_response_schema(settings, projects, votes, body.note)
     
@@ -17,10 +17,25 @@ from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response,
 from pydantic import BaseModel
 
 from src.algorithm.public import PublicEqualSharesInput
+from src.algorithm.scenarios import ScenarioAlgorithm
+from src.algorithm_runs import AlgorithmRun, algorithm_runs_storage, build_bids_instance
 from src.config import config
 from src.database import get_db
+from src.jobs import JobStatus, get_jobs
+from src.live_bids import live_bids
 from src.logger import get_logger
-from src.models import Project, Settings, VoteData, get_projects, get_settings, get_votes
+from src.models import (
+    PollBids,
+    Project,
+    Settings,
+    VoteData,
+    get_data_version,
+    get_poll_bids,
+    get_projects,
+    get_settings,
+    get_votes,
+)
+from src.results_cache import results_cache
 from src.algorithm.mes_visualization.mes_visualizer import MESImplementation, run_mes_visualization
 
 
@@ -54,12 +69,14 @@ class Report:
     status: ReportStatus
     text_files: dict[str, str]
     binary_files: dict[str, bytes]
+    errors_count: int
     _last_exeption_id: int
 
     def __init__(self) -> None:
         self.status = ReportStatus.CREATED
         self.text_files = {}
         self.binary_files = {}
+        self.errors_count = 0
         self._last_exeption_id = 0
 
     def generate_exeption_id(self) -> int:
@@ -222,9 +239,28 @@ def create_report_task(report_id: int) -> None:
         report.status = ReportStatus.FINISHED
 
 
+# The files of the report that depend only on the data of the poll, the logs are created for every report
+_REPORT_LOG_FILES = ("log.txt", "full-log.txt")
+
+
 def _create_report(report: Report, db: psycopg.Connection) -> None:
     _report_log_info(report, "Starting report creation")
 
+    # The version is read before the data, so the files are never cached with a version newer than their data
+    try:
+        poll_id, data_version = get_data_version(db)
+    except Exception:
+        _report_log_error(report, "Error while getting the data version from the database")
+        return
+
+    cached_files = results_cache.get(poll_id, data_version, "report_files")
+    if cached_files is not None:
+        _report_log_info(report, f"The data did not change since the last report (version {data_version})")
+        for file_name, file_contents in cached_files.items():
+            report.append_text_to_file(file_name, file_contents)
+        _report_log_info(report, "Report creation finished")
+        return
+
     _report_log_info(report, "Getting the data from the database")
 
     try:
@@ -253,11 +289,21 @@ def _create_report(report: Report, db: psycopg.Connection) -> None:
 
     _report_log_info(report, "Save the input for the algorithm")
     try:
-        _report_save_input_for_algorithm(report, settings, projects, votes)
+        poll_bids = get_poll_bids(db)
+        _report_save_input_for_algorithm(report, poll_bids)
+        _report_save_projects_summary(report, projects, poll_bids)
         _report_log_info(report, "Input for the algorithm saved")
     except Exception:
         _report_log_error(report, "Error while saving input for the algorithm")
 
+    if report.errors_count == 0:
+        results_cache.put(
+            poll_id,
+            data_version,
+            "report_files",
+            {name: text for name, text in report.text_files.items() if name not in _REPORT_LOG_FILES},
+        )
+
     _report_log_info(report, "Report creation finished")
 
 
@@ -283,6 +329,7 @@ def _report_log(report: Report, level: str, log: str, only_in_full: bool = False
         logger.info(log)
     elif level == "ERROR":
         logger.error(log)
+        report.errors_count += 1
 
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     if not only_in_full:
@@ -370,24 +417,14 @@ def _report_save_data_as_csv(report: Report, projects: dict[int, Project], votes
     report.append_text_to_file("votes.csv", votes_df.to_csv(index=False))
 
 
-def _report_save_input_for_algorithm(
-    report: Report, settings: Settings, projects: dict[int, Project], votes: list[VoteData]
-) -> None:
-    bids: dict[int, dict[int, int]] = {}
-    for project_id in projects.keys():
-        bids[project_id] = {}
-        for vote in votes:
-            found_project_voute = [item for item in vote.projects if item.project_id == project_id]
-            if len(found_project_voute) == 0:
-                bids[project_id][vote.voter.voter_id] = 0
-            else:
-                bids[project_id][vote.voter.voter_id] = found_project_voute[0].points
+def _report_save_input_for_algorithm(report: Report, poll_bids: PollBids) -> None:
+    instance = build_bids_instance(poll_bids)
 
     input_for_algorithm = PublicEqualSharesInput(
-        voters=[vote.voter.voter_id for vote in votes],
-        cost_min_max=[{project.project_id: (project.min_points, project.max_points)} for project in projects.values()],
-        budget=settings.max_total_points,
-        bids=bids,
+        voters=instance.voters(),
+        cost_min_max=instance.cost_min_max(),
+        budget=poll_bids.budget,
+        bids=instance.bids(),
     )
 
     report.append_text_to_file(
@@ -395,6 +432,152 @@ def _report_save_input_for_algorithm(
     )
 
 
+def _report_save_projects_summary(report: Report, projects: dict[int, Project], poll_bids: PollBids) -> None:
+    voters_count = len(poll_bids.voter_ids)
+
+    summary_df = pd.DataFrame(
+        [
+            {
+                "project_id": project.project_id,
+                "name": projects[project.project_id].name if project.project_id in projects else "",
+                "min_points": project.min_points,
+                "max_points": project.max_points,
+                "supporters_count": project.supporters_count,
+                "max_bid": project.max_bid,
+                "total_points": project.total_points,
+                "average_points": project.total_points / voters_count if voters_count > 0 else 0,
+            }
+            for project in poll_bids.projects
+        ]
+    )
+
+    report.append_text_to_file("projects_summary.csv", summary_df.to_csv(index=False))
+
+
+class AlgorithmRunResponse(BaseModel):
+    run_id: int
+    poll_id: int
+    data_version: int
+    algorithm: ScenarioAlgorithm
+    status: JobStatus
+    is_finished: bool
+    cached: bool
+    voters_count: int
+    projects_count: int
+    bids_count: int
+    budget: float
+    elapsed_seconds: float | None
+    requests_count: int
+    error: str | None
+
+
+def _algorithm_run_response(run: AlgorithmRun, cached: bool) -> AlgorithmRunResponse:
+    return AlgorithmRunResponse(
+        run_id=run.id,
+        poll_id=run.poll_id,
+        data_version=run.data_version,
+        algorithm=run.algorithm,
+        status=run.job.status,
+        is_finished=run.job.status == JobStatus.FINISHED,
+        cached=cached,
+        voters_count=run.voters_count,
+        projects_count=run.projects_count,
+        bids_count=run.bids_count,
+        budget=run.budget,
+        elapsed_seconds=run.elapsed_seconds(),
+        requests_count=run.requests_count,
+        error=run.job.error,
+    )
+
+
+@router.post("/run")
+def start_algorithm_run_route(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    algorithm: ScenarioAlgorithm = Query(description="the algorithm to run", default=ScenarioAlgorithm.EQUAL_SHARES),
+) -> AlgorithmRunResponse:
+    """
+    Run the algorithm on the current data of the active poll, in the background.
+    If the data did not change since an earlier run of the same algorithm, the earlier run is returned.
+    Use `/report/run/status` for the progress and `/report/run/result` for the allocations.
+    """
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    with get_db() as db:
+        snapshot = live_bids.snapshot(db)
+
+    poll_id, data_version, instance = snapshot.poll_id, snapshot.data_version, snapshot.instance
+    run = algorithm_runs_storage.find(poll_id, data_version, algorithm)
+    if run is not None:
+        return _algorithm_run_response(run, cached=True)
+
+    if len(instance.project_ids) == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No projects found")
+
+    if len(instance.voter_ids) == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No votes found")
+
+    run, cached = algorithm_runs_storage.submit(get_jobs(), poll_id, data_version, instance, algorithm)
+
+    return _algorithm_run_response(run, cached)
+
+
+@router.get("/run/status")
+def status_algorithm_run_route(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    run_id: int = Query(description="id of the run"),
+) -> AlgorithmRunResponse:
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    run = algorithm_runs_storage.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+
+    return _algorithm_run_response(run, cached=False)
+
+
+class AlgorithmRunResultResponse(BaseModel):
+    run_id: int
+    poll_id: int
+    data_version: int
+    algorithm: ScenarioAlgorithm
+    elapsed_seconds: float | None
+    allocations: dict[int, int]
+
+
+@router.get("/run/result")
+def get_algorithm_run_result_route(
+    admin_key: UUID = Query(description="key for authentication of admin"),
+    run_id: int = Query(description="id of the run"),
+) -> AlgorithmRunResultResponse:
+    """The allocations of a finished run, by project id."""
+    if config.admin_key != admin_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    run = algorithm_runs_storage.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+
+    allocations = run.allocations()
+    if allocations is None:
+        if run.job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not finished")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Run {run.job.status}: {run.job.error}"
+        )
+
+    return AlgorithmRunResultResponse(
+        run_id=run.id,
+        poll_id=run.poll_id,
+        data_version=run.data_version,
+        algorithm=run.algorithm,
+        elapsed_seconds=run.elapsed_seconds(),
+        # Integers like the other results, so they can be set with /admin/set-results
+        allocations={project_id: int(allocation) for project_id, allocation in allocations.items()},
+    )
+
+
 @router.get("/visualization")
 def get_visualization_route(
     admin_key: UUID = Query(description="key for authentication of admin"),
@@ -410,6 +593,12 @@ def get_visualization_route(
     # Get current data using existing helper function
     with get_db() as db:
         try:
+            # The version is read before the data, see _create_report
+            poll_id, data_version = get_data_version(db)
+            cached_content = results_cache.get(poll_id, data_version, "visualization")
+            if cached_content is not None:
+                return _visualization_response(cached_content)
+
             settings, projects, votes = _report_load_data(Report(), db)
         except Exception:
             raise HTTPException(
@@ -442,8 +631,15 @@ def get_visualization_route(
             with open(file_path, 'rb') as f:
                 zip_file.add_file(file_path.name, f.read())
 
+    content = zip_file.get_content()
+    results_cache.put(poll_id, data_version, "visualization", content)
+
+    return _visualization_response(content)
+
+
+def _visualization_response(content: bytes) -> Response:
     return Response(
-        content=zip_file.get_content(),
+        content=content,
         media_type="application/zip",
         headers={
             "Content-Disposition": "attachment; filename=visualization.zip"
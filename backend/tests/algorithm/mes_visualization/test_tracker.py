@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+from src.algorithm.equal_shares import equal_shares
+from src.algorithm.mes_visualization.tracker import MESTracker, StreamingMESTracker
+
+
+def _run_with_tracker(tracker: MESTracker | StreamingMESTracker) -> dict[int, int]:
+    voters = [1, 2, 3, 4, 5]
+    projects_costs = {11: 100, 12: 150, 13: 200, 14: 250, 15: 300}
+    bids = {
+        11: {1: 100, 2: 130, 4: 150},
+        12: {2: 160, 5: 190},
+        13: {1: 200, 5: 240},
+        14: {3: 270, 4: 280},
+        15: {2: 310, 3: 320, 5: 340},
+    }
+    winners_allocations, _ = equal_shares(voters, projects_costs, 900, bids, tracker_callback=tracker)
+    return winners_allocations
+
+
+def test_streaming_tracker_matches_memory_tracker() -> None:
+    memory_tracker = MESTracker()
+    expected_winners = _run_with_tracker(memory_tracker)
+
+    with StreamingMESTracker() as streaming_tracker:
+        assert _run_with_tracker(streaming_tracker) == expected_winners
+        assert len(streaming_tracker) == len(memory_tracker)
+
+        rounds = list(streaming_tracker.iter_rounds())
+        path = streaming_tracker.path
+
+    assert not os.path.exists(path)
+
+    for expected, actual in zip(memory_tracker.rounds, rounds):
+        assert actual.selected_project == expected.selected_project
+        assert actual.cost == expected.cost
+        assert actual.effective_votes == expected.effective_votes
+        assert actual.payments_per_voter == expected.payments_per_voter
+        for voter_id, budget in expected.voter_budgets.items():
+            assert np.isclose(actual.voter_budgets[voter_id], budget)
+        for voter_id, budget in expected.previous_allocations.items():
+            assert np.isclose(actual.previous_allocations[voter_id], budget)
+
+
+def test_streaming_tracker_keeps_given_file(tmp_path) -> None:  # type: ignore[no-untyped-def]
+    path = str(tmp_path / "rounds.ndjson")
+
+    with StreamingMESTracker(path) as tracker:
+        _run_with_tracker(tracker)
+
+    with open(path, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == len(tracker)
+
+
+def test_memory_tracker_rounds_share_layout() -> None:
+    tracker = MESTracker()
+    _run_with_tracker(tracker)
+
+    layout = tracker.rounds[0].layout
+    assert layout.voter_ids == [1, 2, 3, 4, 5]
+    for round_info in tracker.rounds:
+        assert round_info.layout is layout
+        assert not hasattr(round_info, "__dict__")
+        assert round_info.voter_budgets_array.shape == (len(layout.voter_ids),)
+        assert list(round_info.voter_budgets.keys()) == layout.voter_ids
@@ -1,6 +1,7 @@
 import numpy as np
 
-from src.algorithm.average_first import average_first
+from src.algorithm.average_first import average_first, average_first_prepared, average_first_residual
+from src.algorithm.instance import PreparedInstance
 from src.algorithm.utils import calculate_average_bids
 
 
@@ -13,3 +14,20 @@ def test_average_first() -> None:
 
     winners_allocations, _ = average_first(voters, cost_min_max, 900, bids, use_plt=False)
     assert {k: np.round(v) for k, v in winners_allocations.items()} == {11: 500.0, 12: 300, 13: 100}
+
+
+def test_average_first_prepared_residual() -> None:
+    voters = [1, 2, 3]
+    cost_min_max = [{11: (100, 300)}, {12: (200, 400)}, {13: (50, 100)}]
+    bids = {11: {1: 300, 2: 150, 3: 0}, 12: {1: 200, 3: 250}, 13: {2: 100, 3: 60}}
+    instance = PreparedInstance.from_input(voters, cost_min_max, 600, bids)
+
+    allocations, residual = average_first_residual(instance)
+
+    assert allocations.tolist() == [150, 0, 53]
+    assert residual.bids() == {11: {1: 150}, 12: {1: 200, 3: 250}, 13: {2: 47, 3: 7}}
+    assert residual.projects_min_costs() == {11: 1, 12: 200, 13: 1}
+    assert residual.budget == 397
+
+    assert average_first_prepared(instance) == average_first(voters, cost_min_max, 600, bids, use_plt=False)
+    assert bids[11] == {1: 300, 2: 150, 3: 0}
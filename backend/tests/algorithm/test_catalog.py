@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from src.algorithm.catalog import ProjectCatalog
+from src.algorithm.public import PublicEqualSharesInput
+from src.algorithm.utils import check_allocations, get_project_max_costs, get_project_min_costs
+
+COST_MIN_MAX = [{11: (200, 300)}, {12: (300, 400)}, {13: (100, 150)}]
+
+
+def test_project_catalog_lookups() -> None:
+    catalog = PublicEqualSharesInput(voters=[1], cost_min_max=COST_MIN_MAX, budget=500, bids={}).project_catalog()
+
+    assert list(catalog) == [11, 12, 13]
+    assert 12 in catalog and 14 not in catalog
+    assert catalog.position(13) == 2
+    assert catalog.positions(np.array([13, 14, 11])).tolist() == [2, -1, 0]
+    assert (catalog.min_cost(11), catalog.max_cost(11)) == (200, 300)
+    assert catalog.min_costs.tolist() == [200, 300, 100]
+    assert catalog.cost_min_max() == COST_MIN_MAX
+    assert ProjectCatalog.of(catalog) is catalog
+
+    assert get_project_min_costs(catalog) == get_project_min_costs(COST_MIN_MAX) == {11: 200, 12: 300, 13: 100}
+    assert get_project_max_costs(catalog) == {11: 300, 12: 400, 13: 150}
+
+    with pytest.raises(ValueError):
+        ProjectCatalog.from_cost_min_max([{11: (200, 300)}, {11: (100, 200)}])
+
+
+def test_check_allocations_uses_project_ranges() -> None:
+    assert check_allocations(COST_MIN_MAX, {11: 300, 12: 0, 13: 100})
+    assert not check_allocations(COST_MIN_MAX, {11: 301, 12: 0, 13: 100})
+    assert not check_allocations(COST_MIN_MAX, {11: 200, 12: 0, 13: 99})
+    # The range is looked up by the project id, not by the allocated cost
+    assert not check_allocations([{11: (200, 300)}, {200: (1, 1000)}], {11: 150})
@@ -0,0 +1,81 @@
+import io
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.algorithm.columnar import convert_json_to_npz, load_instance_npz, load_instance_npz_bytes, save_instance_npz
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.public import PublicEqualSharesInput, public_equal_shares, public_equal_shares_prepared
+
+INPUT = {
+    "voters": [1, 2, 3],
+    "cost_min_max": [{"11": [100, 200]}, {"12": [150, 250]}, {"13": [200, 300]}],
+    "budget": 500,
+    "bids": {"11": {"1": 100, "2": 200, "3": 0}, "12": {"2": 150, "3": 250}, "13": {"1": 300, "3": 200}},
+}
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_npz_round_trip(tmp_path: Path, mmap: bool) -> None:
+    data = PublicEqualSharesInput.model_validate(INPUT)
+    instance = PreparedInstance.from_input(data.voters, data.project_catalog(), data.budget, data.bids)
+    path = str(tmp_path / "input.npz")
+    save_instance_npz(instance, path)
+
+    loaded = load_instance_npz(path, mmap=mmap)
+
+    assert loaded.budget == 500
+    assert loaded.bids() == instance.bids()
+    assert loaded.cost_min_max() == instance.cost_min_max()
+    assert isinstance(loaded.bid_amounts, np.memmap) == mmap
+
+
+def test_load_npz_bytes(tmp_path: Path) -> None:
+    data = PublicEqualSharesInput.model_validate(INPUT)
+    instance = data.prepared_instance()
+    path = tmp_path / "input.npz"
+    save_instance_npz(instance, str(path))
+
+    loaded = load_instance_npz_bytes(path.read_bytes())
+
+    assert loaded.fingerprint() == instance.fingerprint()
+    with pytest.raises(ValueError):
+        load_instance_npz_bytes(b"not an npz file")
+
+    # A compressed archive could expand to much more than its size
+    compressed = io.BytesIO()
+    np.savez_compressed(compressed, **dict(np.load(path)))
+    with pytest.raises(ValueError, match="Compressed arrays"):
+        load_instance_npz_bytes(compressed.getvalue())
+
+
+def test_convert_json_to_npz_gives_same_results(tmp_path: Path) -> None:
+    json_path = tmp_path / "input.json"
+    json_path.write_text(json.dumps(INPUT))
+
+    convert_json_to_npz(str(json_path), str(tmp_path / "input.npz"))
+    loaded = load_instance_npz(str(tmp_path / "input.npz"))
+
+    assert public_equal_shares_prepared(loaded) == public_equal_shares(PublicEqualSharesInput.model_validate(INPUT))
+
+
+def test_validate_rejects_invalid_arrays() -> None:
+    instance = PreparedInstance.from_input([1, 2], [{11: (100, 200)}, {12: (150, 250)}], 500, {11: {1: 100, 2: 150}})
+    instance.validate()
+
+    invalid_instances = [
+        replace(instance, voter_ids=np.array([1, 1])),
+        replace(instance, max_costs=np.array([200, 100])),
+        replace(instance, bid_offsets=np.array([0, 2, 1])),
+        replace(instance, bid_voters=np.array([0, 2])),
+        replace(instance, bid_voters=np.array([1, 1])),
+        replace(instance, bid_amounts=np.array([100, 0])),
+        replace(instance, bid_amounts=np.array([100.0, 150.0])),
+        replace(instance, budget=0),
+    ]
+    for invalid in invalid_instances:
+        with pytest.raises(ValueError):
+            invalid.validate()
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from src.algorithm.dynamic_equal_shares import DynamicEqualShares
+from src.algorithm.equal_shares import equal_shares
+
+
+def random_instance(rng: random.Random) -> tuple[list[int], dict[int, int], int, dict[int, dict[int, int]]]:
+    voters = list(range(1, rng.randint(5, 15)))
+    projects_costs = {project_id: rng.choice([1, 50, 100, 200]) for project_id in range(101, rng.randint(105, 115))}
+    budget = rng.randint(300, 1500)
+    bids = {
+        project_id: {voter: rng.randint(cost, 3 * cost) for voter in voters if rng.random() < 0.4}
+        for project_id, cost in projects_costs.items()
+    }
+    return voters, projects_costs, budget, bids
+
+
+def test_dynamic_equal_shares_matches_equal_shares() -> None:
+    rng = random.Random(7)
+    replayed_purchases = 0
+
+    for _ in range(15):
+        voters, projects_costs, budget, bids = random_instance(rng)
+        engine = DynamicEqualShares(voters, projects_costs, budget, bids)
+        assert engine.solve() == equal_shares(voters, projects_costs, budget, engine.bids)
+
+        for _ in range(5):
+            voter = rng.choice(voters)
+            voter_bids = {
+                project_id: rng.randint(cost, 3 * cost)
+                for project_id, cost in projects_costs.items()
+                if rng.random() < 0.3
+            }
+            engine.update_voter_bids(voter, voter_bids)
+
+            assert engine.solve() == equal_shares(voters, projects_costs, budget, engine.bids)
+            replayed_purchases += engine.last_replayed_purchases
+
+    assert replayed_purchases > 0
+
+
+def test_dynamic_equal_shares_add_and_remove_voter() -> None:
+    voters = [1, 2, 3]
+    projects_costs = {101: 100, 102: 150}
+    bids = {101: {1: 100, 2: 100}, 102: {2: 150, 3: 150}}
+    engine = DynamicEqualShares(voters, projects_costs, 300, bids)
+    engine.solve()
+
+    engine.update_voter_bids(4, {102: 200})
+    assert engine.voters == [1, 2, 3, 4]
+    assert engine.solve() == equal_shares([1, 2, 3, 4], projects_costs, 300, engine.bids)
+    assert engine.last_replayed_purchases == 0
+
+    engine.remove_voter(2)
+    assert engine.solve() == equal_shares([1, 3, 4], projects_costs, 300, engine.bids)
+
+    with pytest.raises(ValueError):
+        engine.update_voter_bids(1, {999: 100})
@@ -1,4 +1,5 @@
 from src.algorithm.equal_shares import equal_shares, equal_shares_fixed_budget
+from src.algorithm.mes_visualization.tracker import MESTracker
 from src.algorithm.utils import find_max
 import numpy as np
 
@@ -223,6 +224,28 @@ def test_equal_shares_fixed_budget_passed_4() -> None:
     compare_dicts(candidates_payments_per_voter, expected_candidates_payments_per_voter)
 
 
+def test_equal_shares_tracker_applies_payments() -> None:
+    """
+    the tracker rebuilds the voter budgets from the payments of each round
+    """
+
+    voters = [1, 2, 3]
+    projects_costs = {101: 100, 102: 150}
+    bids = {101: {1: 100, 2: 100, 3: 0}, 102: {2: 150, 3: 150, 1: 0}}
+
+    tracker = MESTracker()
+    winners_allocations, _ = equal_shares(voters, projects_costs, 300, bids, tracker_callback=tracker)
+
+    assert winners_allocations == {101: 100, 102: 150}
+    assert len(tracker) > 0
+
+    for round_info in tracker.rounds:
+        assert round_info.effective_votes == {"101": 2.0, "102": 2.0}
+        for voter in voters:
+            payment = round_info.payments_per_voter.get(voter, 0)
+            assert np.isclose(round_info.previous_allocations[voter] - payment, round_info.voter_budgets[voter])
+
+
 def compare_dicts(outcome: dict, expected: dict) -> None:
     assert outcome.keys() == expected.keys()
     for candidate, payments in outcome.items():
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.json_stream import load_instance_json
+from src.algorithm.public import PublicEqualSharesInput
+
+INPUT = {
+    "voters": [3, 1, 2],
+    "cost_min_max": [{"11": [100, 200]}, {"12": [150, 250]}, {"13": [200, 300]}],
+    "budget": 500,
+    "bids": {
+        "13": {"1": 300, "3": 200},
+        "11": {"1": 100, "2": 200, "3": 0, "9": 100},
+        "12": {"2": 150, "3": 250},
+        "99": {"1": 100},
+    },
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+@pytest.mark.parametrize("keys", [list(INPUT.keys()), ["bids", "budget", "voters", "cost_min_max"]])
+def test_load_instance_json_matches_from_input(tmp_path: Path, chunk_size: int, keys: list[str]) -> None:
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps({key: INPUT[key] for key in keys}, indent=2))
+    data = PublicEqualSharesInput.model_validate(INPUT)
+    expected = PreparedInstance.from_input(data.voters, data.project_catalog(), data.budget, data.bids)
+
+    instance = load_instance_json(str(path), chunk_size=chunk_size)
+    instance.validate()
+
+    assert instance.voters() == [3, 1, 2]
+    assert instance.budget == 500
+    assert instance.cost_min_max() == expected.cost_min_max()
+    assert instance.bids() == expected.bids() == {11: {1: 100, 2: 200}, 12: {2: 150, 3: 250}, 13: {1: 300, 3: 200}}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"voters": [1], "budget": 100, "bids": {}}',
+        '{"voters": [1], "cost_min_max": [], "budget": 100, "bids": {"11": {"1": 1.5}}}',
+        '{"voters": [1], "cost_min_max": [{"11": [100.5, 200]}], "budget": 100, "bids": {}}',
+        '{"voters": [1], "cost_min_max": [], "budget": "100", "bids": {}}',
+        '{"voters": [1], "cost_min_max": [], "budget": 99.9, "bids": {}}',
+        '{"voters": [1], "cost_min_max": [], "budget": 100, "bids": {} ',
+        '{"voters": [1], "cost_min_max": [], "budget": 100, "bids": {}} []',
+    ],
+)
+def test_load_instance_json_rejects_invalid_input(tmp_path: Path, text: str) -> None:
+    path = tmp_path / "input.json"
+    path.write_text(text)
+
+    with pytest.raises(ValueError):
+        load_instance_json(str(path), chunk_size=4)
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.algorithm.plotting import BidPlotRenderer
+
+COST_MIN_MAX = [{11: (200, 500)}, {12: (300, 300)}, {13: (100, 150)}]
+BIDS = {11: {1: 500, 2: 200}, 12: {1: 300, 2: 300}, 13: {2: 100}}
+AVERAGES = {11: 350.0, 12: 300.0, 13: 50.0}
+ALLOCATIONS = {11: 500, 12: 300, 13: 100}
+
+
+def test_bid_plot_renderer_caches_by_results(tmp_path: Path) -> None:
+    with BidPlotRenderer(str(tmp_path)) as renderer:
+        path = renderer.submit(COST_MIN_MAX, AVERAGES, ALLOCATIONS).result()
+        assert os.path.getsize(path) > 0
+
+        cached = renderer.submit(COST_MIN_MAX, AVERAGES, ALLOCATIONS)
+        assert cached.done() and cached.result() == path
+
+        other = renderer.submit(COST_MIN_MAX, AVERAGES, {11: 500, 12: 300, 13: 0}).result()
+        svg = renderer.submit(COST_MIN_MAX, AVERAGES, ALLOCATIONS, plot_format="svg").result()
+
+    assert len({path, other, svg}) == 3
+    assert svg.endswith(".svg")
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in (path, other, svg))
+
+
+def test_algorithm_does_not_import_matplotlib() -> None:
+    code = (
+        "import sys\n"
+        "from src.algorithm.computation import min_max_equal_shares\n"
+        "from src.algorithm.average_first import average_first\n"
+        f"min_max_equal_shares([1, 2], {COST_MIN_MAX}, 900, {BIDS})\n"
+        f"average_first([1, 2], {COST_MIN_MAX}, 900, {BIDS})\n"
+        "assert 'matplotlib' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
@@ -0,0 +1,39 @@
+from src.algorithm.equal_shares import equal_shares
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.scenarios import Scenario, ScenarioAlgorithm, compare_scenarios, run_scenarios
+from tests.conftest import BIDS, COST_MIN_MAX
+
+SCENARIOS = [
+    Scenario("averages", algorithm=ScenarioAlgorithm.AVERAGES),
+    Scenario("mes"),
+    Scenario("average_first", algorithm=ScenarioAlgorithm.AVERAGE_FIRST),
+    Scenario("mes_0%", min_cost_factor=0),
+    Scenario("mes_80%", min_cost_factor=0.8),
+    Scenario("mes_budget_600", budget=600),
+]
+
+
+def test_prepared_instance_round_trip(instance: PreparedInstance) -> None:
+    assert instance.bids() == BIDS
+    assert instance.cost_min_max() == COST_MIN_MAX
+    assert instance.supporters_count().tolist() == [3, 2, 2, 2, 3]
+
+
+def test_scenarios_in_processes_match_sequential_run(instance: PreparedInstance) -> None:
+    sequential = run_scenarios(instance, SCENARIOS, max_workers=1)
+    parallel = run_scenarios(instance, SCENARIOS, max_workers=2)
+
+    assert [result.name for result in parallel] == [scenario.name for scenario in SCENARIOS]
+    assert [result.allocations for result in parallel] == [result.allocations for result in sequential]
+
+    expected_mes, _ = equal_shares(instance.voters(), instance.projects_min_costs(), instance.budget, instance.bids())
+    assert sequential[1].allocations == expected_mes
+
+
+def test_compare_scenarios_table(instance: PreparedInstance) -> None:
+    table = compare_scenarios(instance, SCENARIOS, max_workers=1)
+
+    assert table.index.tolist() == [11, 12, 13, 14, 15]
+    assert table.columns.tolist() == ["min_cost", "max_cost", "supporters"] + [s.name for s in SCENARIOS]
+    assert table["supporters"].tolist() == [3, 2, 2, 2, 3]
+    assert set(table.attrs["elapsed_time"].keys()) == {s.name for s in SCENARIOS}
@@ -0,0 +1,56 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.scenarios import Scenario, run_scenario
+from src.algorithm.shared_instance import SharedInstanceSpec, attach_instance, detach_instance, share_instance
+from tests.conftest import BIDS, COST_MIN_MAX
+
+def _allocations_in_child(spec: SharedInstanceSpec) -> dict[int, float]:
+    instance, segment = attach_instance(spec)
+    allocations = run_scenario(instance, Scenario("mes")).allocations
+    del instance
+    detach_instance(segment)
+    return allocations
+
+
+def test_attached_instance_is_a_read_only_view(instance: PreparedInstance) -> None:
+    with share_instance(instance) as shared:
+        attached, segment = attach_instance(shared.spec)
+
+        assert attached.bids() == BIDS
+        assert attached.cost_min_max() == COST_MIN_MAX
+        assert attached.budget == 900
+        with pytest.raises(ValueError):
+            attached.bid_amounts[0] = 1
+
+        # The segment stays mapped while the arrays are referenced
+        detach_instance(segment)
+        assert attached.bids() == BIDS
+        del attached
+        detach_instance(segment)
+
+    assert shared.closed
+    with pytest.raises(FileNotFoundError):
+        attach_instance(shared.spec)
+
+
+def test_instance_without_bids() -> None:
+    instance = PreparedInstance.from_input([1, 2], COST_MIN_MAX, 900, {})
+
+    with share_instance(instance) as shared:
+        attached, segment = attach_instance(shared.spec)
+        assert attached.bids() == instance.bids()
+        assert np.array_equal(attached.project_ids, instance.project_ids)
+        del attached
+        detach_instance(segment)
+
+
+def test_worker_process_attaches_by_name(instance: PreparedInstance) -> None:
+    with share_instance(instance) as shared:
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            allocations = pool.apply(_allocations_in_child, (shared.spec,))
+
+    assert allocations == run_scenario(instance, Scenario("mes")).allocations
@@ -0,0 +1,27 @@
+import pytest
+
+from src.algorithm.instance import PreparedInstance
+
+# A small input of the algorithm, the first projects of test_min_max_equal_shares_passed_1
+VOTERS = [1, 2, 3, 4, 5]
+COST_MIN_MAX = [
+    {11: (100, 200)},
+    {12: (150, 250)},
+    {13: (200, 300)},
+    {14: (250, 350)},
+    {15: (300, 400)},
+]
+BIDS = {
+    11: {1: 100, 2: 130, 4: 150},
+    12: {2: 160, 5: 190},
+    13: {1: 200, 5: 240},
+    14: {3: 270, 4: 280},
+    15: {2: 310, 3: 320, 5: 340},
+}
+BUDGET = 900
+
+
+@pytest.fixture
+def instance() -> PreparedInstance:
+    """The small input as a prepared instance."""
+    return PreparedInstance.from_input(VOTERS, COST_MIN_MAX, BUDGET, BIDS)
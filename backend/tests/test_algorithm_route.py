@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from src.algorithm.columnar import save_instance_npz
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.public import PublicEqualSharesInput
+from src.algorithm.scenarios import Scenario, ScenarioResult
+from src.config import config
+from src.jobs import Job, JobStatus
+from src.routers import algorithm
+from src.routers.algorithm import router as algorithm_router
+
+INPUT = {
+    "voters": [1, 2, 3],
+    "cost_min_max": [{"11": [100, 200]}, {"12": [150, 250]}, {"13": [200, 300]}],
+    "budget": 500,
+    "bids": {"11": {"1": 100, "2": 200, "3": 0}, "12": {"2": 150, "3": 250}, "13": {"1": 300, "3": 200}},
+}
+ALLOCATIONS = {11: 200.0, 12: 250.0}
+
+
+class FakeJobs:
+    """A worker pool that runs nothing, the jobs are finished by the tests."""
+
+    def __init__(self) -> None:
+        self.jobs: list[Job] = []
+        self.instances: list[PreparedInstance] = []
+        self.submitted = threading.Event()
+
+    def submit(self, instance: PreparedInstance, scenario: Scenario) -> Job:
+        job = Job(id=len(self.jobs) + 1, scenario=scenario, timeout_seconds=None, max_rss_bytes=None)
+        self.jobs.append(job)
+        self.instances.append(instance)
+        self.submitted.set()
+        return job
+
+    def finish(self, job: Job) -> None:
+        job.started_at = job.created_at
+        job.finished_at = time.time()
+        job.status = JobStatus.FINISHED
+        job.future.set_result(ScenarioResult(job.scenario.name, ALLOCATIONS, 0.0))
+
+
+@pytest.fixture
+def jobs(mocker: MockerFixture) -> Iterator[FakeJobs]:
+    fake_jobs = FakeJobs()
+    mocker.patch("src.routers.algorithm.get_jobs", return_value=fake_jobs)
+    mocker.patch("src.routers.algorithm.in_flight_jobs", algorithm.InFlightJobs())
+
+    admin_key = config.admin_key
+    config.admin_key = uuid4()
+    try:
+        yield fake_jobs
+    finally:
+        config.admin_key = admin_key
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    app = FastAPI()
+    app.include_router(algorithm_router, prefix="/algorithm")
+    # One event loop for all the requests, the in-flight jobs are shared between them
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _post(client: TestClient, content: bytes, content_type: str = "application/json") -> httpx.Response:
+    return client.post(
+        "/algorithm",
+        params={"admin_key": str(config.admin_key)},
+        content=content,
+        headers={"content-type": content_type},
+    )
+
+
+def _post_and_finish(client: TestClient, jobs: FakeJobs, content: bytes, content_type: str) -> httpx.Response:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        response = executor.submit(_post, client, content, content_type)
+        assert jobs.submitted.wait(timeout=10)
+        jobs.finish(jobs.jobs[-1])
+        return response.result(timeout=10)
+
+
+def _npz_content(tmp_path: Path) -> bytes:
+    path = tmp_path / "input.npz"
+    save_instance_npz(PublicEqualSharesInput.model_validate(INPUT).prepared_instance(), str(path))
+    return path.read_bytes()
+
+
+def test_run_algorithm(client: TestClient, jobs: FakeJobs) -> None:
+    response = _post_and_finish(client, jobs, json.dumps(INPUT).encode(), "application/json")
+
+    assert response.status_code == 200
+    assert response.json() == {"results": {"11": 200, "12": 250}}
+    assert response.headers["X-Deduplicated"] == "false"
+    timings = dict(timing.split(";dur=") for timing in response.headers["Server-Timing"].split(", "))
+    assert list(timings) == ["parse", "queue", "compute", "total"]
+    assert all(float(duration) >= 0 for duration in timings.values())
+
+
+@pytest.mark.parametrize("content_type", ["application/x-npz", "application/octet-stream"])
+def test_run_algorithm_npz_input(client: TestClient, jobs: FakeJobs, tmp_path: Path, content_type: str) -> None:
+    content = _npz_content(tmp_path)
+    response = _post_and_finish(client, jobs, content, content_type)
+
+    assert response.status_code == 200
+    expected = PublicEqualSharesInput.model_validate(INPUT).prepared_instance()
+    assert jobs.instances[0].fingerprint() == expected.fingerprint()
+
+    # Without the content type of the columnar format, the body is parsed as JSON
+    assert _post(client, content, "application/json").status_code == 422
+
+
+def test_identical_inputs_share_one_job(client: TestClient, jobs: FakeJobs, mocker: MockerFixture) -> None:
+    submit = mocker.spy(algorithm.in_flight_jobs, "submit")
+    content = json.dumps(INPUT).encode()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(_post, client, content)
+        second = executor.submit(_post, client, content)
+        deadline = time.time() + 10
+        while submit.call_count < 2:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        jobs.finish(jobs.jobs[0])
+        responses = [first.result(timeout=10), second.result(timeout=10)]
+
+    assert len(jobs.jobs) == 1
+    assert [response.status_code for response in responses] == [200, 200]
+    assert sorted(response.headers["X-Deduplicated"] for response in responses) == ["false", "true"]
+    assert responses[0].json() == responses[1].json()
+
+
+def test_input_too_large(client: TestClient, jobs: FakeJobs, mocker: MockerFixture) -> None:
+    mocker.patch.object(config, "algorithm_max_payload_mb", 0)
+
+    response = _post(client, json.dumps(INPUT).encode())
+
+    assert response.status_code == 413
+    assert jobs.jobs == []
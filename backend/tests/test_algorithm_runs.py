@@ -0,0 +1,150 @@
+from collections.abc import Iterator
+from datetime import datetime
+
+import pytest
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.scenarios import ScenarioAlgorithm
+from src.algorithm_runs import AlgorithmRunsStorage, build_bids_instance, build_poll_instance
+from src.jobs import AlgorithmWorkerPool, JobStatus
+from src.models import PollBids, Project, ProjectBids, ProjectVote, Settings, VoteColumns, VoteData, Voter
+from src.results_cache import PollDataCache
+
+POLL_ID = 1
+SETTINGS = Settings(poll_id=POLL_ID, max_total_points=900, points_step=10, open_for_voting=False, results=None)
+PROJECTS = [
+    Project(
+        poll_id=POLL_ID,
+        project_id=project_id,
+        name=f"project {project_id}",
+        min_points=min_points,
+        max_points=max_points,
+        description_1="",
+        description_2="",
+        fixed=False,
+        order_number=project_id,
+        created_at=datetime(2024, 1, 1),
+    )
+    for project_id, min_points, max_points in [(11, 100, 200), (12, 150, 250), (13, 200, 300)]
+]
+
+
+def vote(voter_id: int, points: dict[int, int]) -> VoteData:
+    return VoteData(
+        poll_id=POLL_ID,
+        voter=Voter(
+            poll_id=POLL_ID,
+            voter_id=voter_id,
+            email=f"{voter_id}@example.com",
+            note="",
+            created_at=datetime(2024, 1, 1),
+        ),
+        projects=[
+            ProjectVote(poll_id=POLL_ID, voter_id=voter_id, project_id=project_id, points=amount, rank=rank)
+            for rank, (project_id, amount) in enumerate(points.items(), start=1)
+        ],
+    )
+
+
+VOTES = [vote(1, {11: 500, 12: 400}), vote(2, {12: 300, 13: 600, 99: 100}), vote(3, {11: 900, 13: 0})]
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[AlgorithmWorkerPool]:
+    with AlgorithmWorkerPool(workers=1, poll_interval=0.01) as pool:
+        yield pool
+
+
+def test_build_poll_instance() -> None:
+    instance = build_poll_instance(SETTINGS, PROJECTS, VOTES)
+
+    assert instance.voters() == [1, 2, 3]
+    assert instance.cost_min_max() == [{11: (100, 200)}, {12: (150, 250)}, {13: (200, 300)}]
+    assert instance.budget == 900
+    # The vote for the unknown project and the zero bid are dropped
+    assert instance.bids() == {11: {1: 500, 3: 900}, 12: {1: 400, 2: 300}, 13: {2: 600}}
+
+    # The columns of the votes build the same instance as the nested bids
+    nested = PreparedInstance.from_input(instance.voters(), instance.cost_min_max(), 900, instance.bids())
+    assert build_poll_instance(SETTINGS, PROJECTS, VoteColumns.of(VOTES)).fingerprint() == nested.fingerprint()
+
+
+def test_build_bids_instance() -> None:
+    # The bids of VOTES, as aggregated by `get_poll_bids`
+    poll_bids = PollBids(
+        poll_id=POLL_ID,
+        budget=900,
+        voter_ids=[1, 2, 3],
+        projects=[
+            ProjectBids(
+                project_id=11,
+                min_points=100,
+                max_points=200,
+                voters=[0, 2],
+                points=[500, 900],
+                max_bid=900,
+                supporters_count=2,
+                total_points=1400,
+            ),
+            ProjectBids(
+                project_id=12,
+                min_points=150,
+                max_points=250,
+                voters=[0, 1],
+                points=[400, 300],
+                max_bid=400,
+                supporters_count=2,
+                total_points=700,
+            ),
+            ProjectBids(
+                project_id=13,
+                min_points=200,
+                max_points=300,
+                voters=[1],
+                points=[600],
+                max_bid=600,
+                supporters_count=1,
+                total_points=600,
+            ),
+        ],
+    )
+
+    instance = build_bids_instance(poll_bids)
+    instance.validate()
+    assert instance.fingerprint() == build_poll_instance(SETTINGS, PROJECTS, VOTES).fingerprint()
+
+
+def test_data_version_follows_the_votes() -> None:
+    instance = build_poll_instance(SETTINGS, PROJECTS, VOTES)
+    same = build_poll_instance(SETTINGS, PROJECTS, list(VOTES))
+    changed = build_poll_instance(SETTINGS, PROJECTS, VOTES[:2] + [vote(3, {11: 800, 13: 100})])
+
+    assert instance.fingerprint() == same.fingerprint()
+    assert instance.fingerprint() != changed.fingerprint()
+
+
+def test_runs_are_reused_for_the_same_data(pool: AlgorithmWorkerPool) -> None:
+    storage = AlgorithmRunsStorage(cache=PollDataCache())
+    instance = build_poll_instance(SETTINGS, PROJECTS, VOTES)
+
+    assert storage.find(POLL_ID, 1, ScenarioAlgorithm.EQUAL_SHARES) is None
+    run, cached = storage.submit(pool, POLL_ID, 1, instance, ScenarioAlgorithm.EQUAL_SHARES)
+    assert not cached
+    run.job.future.result(timeout=60)
+    assert run.job.status == JobStatus.FINISHED
+    assert run.allocations() is not None
+
+    # The same data version is found without the instance
+    assert storage.find(POLL_ID, 1, ScenarioAlgorithm.EQUAL_SHARES) is run
+    assert storage.find(POLL_ID, 2, ScenarioAlgorithm.EQUAL_SHARES) is None
+
+    # A newer version with the same data is matched by the fingerprint
+    same_data = build_poll_instance(SETTINGS, PROJECTS, VOTES)
+    again, cached = storage.submit(pool, POLL_ID, 2, same_data, ScenarioAlgorithm.EQUAL_SHARES)
+    assert cached and again is run
+    assert storage.find(POLL_ID, 2, ScenarioAlgorithm.EQUAL_SHARES) is run
+    assert run.requests_count == 4
+    assert storage.get_run(run.id) is run
+
+    other, cached = storage.submit(pool, POLL_ID, 2, instance, ScenarioAlgorithm.AVERAGES)
+    assert not cached and other.id != run.id
@@ -0,0 +1,17 @@
+from src.database import PoolMetrics
+
+
+def test_pool_metrics() -> None:
+    metrics = PoolMetrics()
+    for seconds in (0.0005, 0.001, 0.02, 100):
+        metrics.observe_wait(seconds)
+    metrics.observe_timeout()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["waits"] == 4
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_seconds_buckets"]["0.001"] == 2
+    assert snapshot["wait_seconds_buckets"]["0.025"] == 3
+    assert snapshot["wait_seconds_buckets"]["30"] == 3
+    assert snapshot["wait_seconds_buckets"]["+Inf"] == 4
+    assert abs(snapshot["wait_seconds_sum"] - 100.0215) < 1e-9
@@ -0,0 +1,137 @@
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from src.config import config
+from src.database import async_db_dependency
+from src.models import Poll, active_poll_cache
+from src.routers.form import router as form_router
+from tests.test_models import FakeConnection, FakeCursor
+
+POLL = Poll(poll_id=1, name="poll", active=True)
+CREATED_AT = datetime(2025, 1, 1)
+EMAIL = "voter@example.com"
+
+RESULTS: dict[str, list[tuple]] = {
+    "SELECT max_total_points": [(900, 10, True, None)],
+    "SELECT id, name, min_points": [
+        (11, "project 11", 100, 500, "", "", False, 1, CREATED_AT),
+        (12, "project 12", 100, 500, "", "", False, 2, CREATED_AT),
+    ],
+    "JOIN public.projects_votes": [(5, 11, 500, 1), (5, 12, 400, 2)],
+    "SELECT id, email, note": [(5, EMAIL, "a note", CREATED_AT)],
+    "RETURNING id, created_at": [(5, CREATED_AT)],
+    "RETURNING data_version": [(8,)],
+}
+
+
+class FakeAsyncCursor:
+    """The async version of `FakeCursor`."""
+
+    def __init__(self, connection: FakeConnection) -> None:
+        self._cursor = FakeCursor(connection)
+        self._connection = connection
+
+    async def __aenter__(self) -> "FakeAsyncCursor":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    async def execute(self, query: str, params: Any = None) -> None:
+        self._cursor.execute(query, params)
+
+    async def executemany(self, query: str, params_seq: list[Any]) -> None:
+        # The parameters are recorded like the rows of a COPY
+        self._connection.executed.append(query)
+        self._connection.copied.extend(params_seq)
+
+    async def fetchone(self) -> tuple | None:
+        return self._cursor.fetchone()
+
+    async def fetchall(self) -> list[tuple]:
+        return self._cursor.fetchall()
+
+
+class FakeAsyncConnection(FakeConnection):
+    def cursor(self, name: str | None = None) -> FakeAsyncCursor:  # type: ignore[override]
+        return FakeAsyncCursor(self)
+
+    async def commit(self) -> None:  # type: ignore[override]
+        self.commits += 1
+
+
+@pytest.fixture
+def client() -> Iterator[tuple[TestClient, FakeAsyncConnection]]:
+    db = FakeAsyncConnection(RESULTS)
+    app = FastAPI()
+    app.include_router(form_router, prefix="/form")
+    app.dependency_overrides[async_db_dependency] = lambda: db
+
+    without_auth_mode = config.without_auth_mode
+    config.without_auth_mode = True
+    active_poll_cache.set(POLL)
+    try:
+        yield TestClient(app), db
+    finally:
+        active_poll_cache.invalidate()
+        config.without_auth_mode = without_auth_mode
+
+
+def test_route_data(client: tuple[TestClient, FakeAsyncConnection]) -> None:
+    test_client, db = client
+
+    response = test_client.post("/form/data", params={"email": EMAIL, "token": "token"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["voted"] is True
+    assert data["note"] == "a note"
+    assert data["max_total_points"] == 900
+    assert [(project["id"], project["points"], project["marked"]) for project in data["projects"]] == [
+        (11, 500, True),
+        (12, 400, True),
+    ]
+    assert db.commits == 0
+
+
+def test_route_vote(client: tuple[TestClient, FakeAsyncConnection], mocker: MockerFixture) -> None:
+    test_client, db = client
+    live_bids = mocker.patch("src.routers.form.live_bids")
+    body = {
+        "note": "a note",
+        "projects": [
+            {"id": 11, "rank": 1, "points": 500, "marked": True},
+            {"id": 12, "rank": 2, "points": 400, "marked": True},
+        ],
+    }
+
+    response = test_client.post("/form/vote", params={"email": EMAIL, "token": "token"}, json=body)
+
+    assert response.status_code == 200
+    assert response.json()["voted"] is True
+    assert db.copied == [(1, 5, 11, 500, 1), (1, 5, 12, 400, 2)]
+    assert db.commits == 1
+    # The bid matrix is updated with the data version of the saved votes
+    live_bids.apply.assert_called_once_with(1, 8, 5, {11: 500, 12: 400})
+
+
+def test_route_vote_rejects_invalid_total(client: tuple[TestClient, FakeAsyncConnection]) -> None:
+    test_client, db = client
+    body = {
+        "note": "",
+        "projects": [
+            {"id": 11, "rank": 1, "points": 500, "marked": True},
+            {"id": 12, "rank": 2, "points": 100, "marked": True},
+        ],
+    }
+
+    response = test_client.post("/form/vote", params={"email": EMAIL, "token": "token"}, json=body)
+
+    assert response.status_code == 400
+    assert db.commits == 0
@@ -0,0 +1,104 @@
+from collections.abc import Iterator
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.config import config
+from src.database import db_dependency
+from src.models import Poll, active_poll_cache, import_votes_csv
+from src.routers.admin import router as admin_router
+from tests.test_models import FakeConnection
+
+POLL = Poll(poll_id=1, name="poll", active=True)
+
+# The settings of the poll, (the total points of a voter, the number of projects), and the imported voters
+RESULTS: dict[str, list[tuple]] = {
+    "SELECT max_total_points, points_step": [(900, 10, True, None)],
+    "SUM(min_points)": [(900, 3)],
+    "COUNT(DISTINCT email)": [(2,)],
+}
+ROWCOUNTS = {"INSERT INTO public.projects_votes": 6}
+
+
+def test_import_votes_validation_errors() -> None:
+    db = FakeConnection(
+        {
+            **RESULTS,
+            "project_id IS NULL": [(4, "unknown")],
+            "HAVING COUNT(DISTINCT project_id)": [("partial@example.com", 2)],
+            "HAVING SUM(points)": [("partial@example.com", 800)],
+            "HAVING MIN(rank)": [("partial@example.com", 2)],
+        }
+    )
+
+    result = import_votes_csv(db, _BytesFile(b"email,project,points,rank\n"), POLL)
+
+    assert result.errors == [
+        "Line 4: unknown project 'unknown'",
+        "Voter partial@example.com: votes for 2 projects instead of 3",
+        "Voter partial@example.com: total points 800 instead of 900",
+        "Voter partial@example.com: the ranks are not 1 to 2",
+    ]
+    # Nothing is merged
+    assert db.rollbacks == 1 and db.commits == 0
+    assert not any("INSERT INTO public.voters" in statement for statement in db.executed)
+
+
+def test_import_votes_csv_is_copied_as_is() -> None:
+    db = FakeConnection(RESULTS, ROWCOUNTS)
+    content = b"email,project,points,rank\na@example.com,project 11,900,1\n"
+
+    result = import_votes_csv(db, _BytesFile(content), POLL)
+
+    assert result.errors == []
+    assert (result.voters_count, result.votes_count) == (2, 6)
+    assert b"".join(db.copied) == content
+    assert any("FORMAT csv, HEADER MATCH" in statement for statement in db.executed)
+    assert any("INSERT INTO public.voters" in statement for statement in db.executed)
+    assert "data_version = data_version + 1" in db.executed[-1]
+    assert db.commits == 1
+
+
+class _BytesFile:
+    """A file that is read in small chunks."""
+
+    def __init__(self, content: bytes) -> None:
+        self._content = content
+
+    def read(self, size: int = -1) -> bytes:
+        chunk, self._content = self._content[:10], self._content[10:]
+        return chunk
+
+
+@pytest.fixture
+def client() -> Iterator[tuple[TestClient, FakeConnection]]:
+    db = FakeConnection(RESULTS, ROWCOUNTS)
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/admin")
+    app.dependency_overrides[db_dependency] = lambda: db
+
+    admin_key = config.admin_key
+    config.admin_key = uuid4()
+    active_poll_cache.set(POLL)
+    try:
+        yield TestClient(app), db
+    finally:
+        active_poll_cache.invalidate()
+        config.admin_key = admin_key
+
+
+def test_route_import_votes_csv(client: tuple[TestClient, FakeConnection]) -> None:
+    test_client, db = client
+    content = b"email,project,points,rank\na@example.com,project 11,900,1\n"
+
+    response = test_client.post(
+        "/admin/import-votes",
+        params={"admin_key": str(config.admin_key)},
+        files={"file": ("votes.csv", content, "text/csv")},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "voters_count": 2, "votes_count": 6}
+    assert b"".join(db.copied) == content
@@ -0,0 +1,112 @@
+import time
+from collections.abc import Iterator
+
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+
+from src.algorithm.instance import PreparedInstance
+from src.algorithm.scenarios import Scenario, ScenarioAlgorithm, run_scenario
+from src.algorithm.shared_instance import SharedInstance, share_instance
+from src.exceptions import JobFailedException
+from src.jobs import AlgorithmWorkerPool, JobStatus
+
+def slow_instance() -> PreparedInstance:
+    """An instance that takes the algorithm a fraction of a second."""
+    rng = np.random.default_rng(1)
+    voters = list(range(1, 301))
+    cost_min_max = [{project_id: (100, 1000)} for project_id in range(1, 21)]
+    bids = {
+        project_id: {voter: int(rng.integers(100, 1000)) for voter in voters if rng.random() < 0.5}
+        for project_id in range(1, 21)
+    }
+    return PreparedInstance.from_input(voters, cost_min_max, 30000, bids)
+
+
+def wait_for_status(pool: AlgorithmWorkerPool, job_id: int, status: JobStatus) -> None:
+    deadline = time.time() + 30
+    while pool.get_job(job_id).status != status:  # type: ignore[union-attr]
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[AlgorithmWorkerPool]:
+    with AlgorithmWorkerPool(workers=1, poll_interval=0.01) as pool:
+        yield pool
+
+
+def test_job_result_matches_run_in_process(pool: AlgorithmWorkerPool, instance: PreparedInstance) -> None:
+    for scenario in (Scenario("mes"), Scenario("average_first", algorithm=ScenarioAlgorithm.AVERAGE_FIRST)):
+        job = pool.submit(instance, scenario)
+        result = job.future.result(timeout=60)
+
+        assert result.allocations == run_scenario(instance, scenario).allocations
+        assert job.status == JobStatus.FINISHED
+        assert pool.get_job(job.id) is job
+
+
+def test_job_limits_kill_the_worker(pool: AlgorithmWorkerPool, instance: PreparedInstance) -> None:
+    slow = slow_instance()
+
+    timed_out = pool.submit(slow, Scenario("mes"), timeout_seconds=0.05)
+    with pytest.raises(JobFailedException):
+        timed_out.future.result(timeout=60)
+    assert timed_out.status == JobStatus.TIMED_OUT
+
+    too_large = pool.submit(slow, Scenario("mes"), max_rss_bytes=1)
+    with pytest.raises(JobFailedException):
+        too_large.future.result(timeout=60)
+    assert too_large.status == JobStatus.MEMORY_EXCEEDED
+
+    # The killed worker was replaced
+    assert pool.submit(instance, Scenario("mes")).future.result(timeout=60).allocations
+
+
+def test_cancel_queued_and_running_jobs(pool: AlgorithmWorkerPool) -> None:
+    instance = slow_instance()
+
+    running = pool.submit(instance, Scenario("running"))
+    queued = pool.submit(instance, Scenario("queued"))
+    wait_for_status(pool, running.id, JobStatus.RUNNING)
+
+    assert pool.cancel(queued.id)
+    assert pool.cancel(running.id)
+    assert not pool.cancel(running.id)
+
+    assert queued.status == running.status == JobStatus.CANCELLED
+    assert queued.future.cancelled() and running.future.cancelled()
+    assert pool.queued_jobs_count() == pool.running_jobs_count() == 0
+
+
+def test_job_that_cannot_be_sent_fails(mocker: MockerFixture, instance: PreparedInstance) -> None:
+    calls = []
+
+    def share_instance_once_full(instance: PreparedInstance) -> SharedInstance:
+        calls.append(instance)
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        return share_instance(instance)
+
+    mocker.patch("src.jobs.share_instance", side_effect=share_instance_once_full)
+
+    with AlgorithmWorkerPool(workers=1, poll_interval=0.01) as pool:
+        failed = pool.submit(instance, Scenario("mes"))
+        with pytest.raises(JobFailedException):
+            failed.future.result(timeout=60)
+        assert failed.status == JobStatus.FAILED
+
+        # The dispatcher is still running, with a new worker
+        assert pool.submit(instance, Scenario("mes")).future.result(timeout=60).allocations
+
+
+def test_close_resolves_the_futures_of_dropped_jobs() -> None:
+    instance = slow_instance()
+
+    with AlgorithmWorkerPool(workers=1, max_finished_jobs=2, poll_interval=0.01) as pool:
+        jobs = [pool.submit(instance, Scenario(f"job {i}")) for i in range(6)]
+
+    # More jobs were cancelled than the pool keeps, the futures of all of them are resolved
+    assert all(job.status == JobStatus.CANCELLED for job in jobs)
+    assert all(job.future.cancelled() for job in jobs)
+    assert sum(pool.get_job(job.id) is not None for job in jobs) == 2
@@ -0,0 +1,47 @@
+from src.algorithm_runs import build_poll_instance
+from src.live_bids import LiveBidMatrix
+from tests.test_algorithm_runs import POLL_ID, PROJECTS, SETTINGS, VOTES, vote
+
+
+def test_snapshot_matches_the_votes() -> None:
+    matrix = LiveBidMatrix()
+    assert matrix.current(POLL_ID, 5) is None
+
+    matrix.reset(POLL_ID, 5, SETTINGS, PROJECTS, VOTES)
+    snapshot = matrix.current(POLL_ID, 5)
+
+    assert snapshot is not None
+    assert snapshot.instance.fingerprint() == build_poll_instance(SETTINGS, PROJECTS, VOTES).fingerprint()
+    # The instance is shared by the reads until the next change
+    assert matrix.current(POLL_ID, 5).instance is snapshot.instance  # type: ignore[union-attr]
+    assert matrix.current(POLL_ID, 6) is None
+
+
+def test_apply_updates_in_place() -> None:
+    matrix = LiveBidMatrix()
+    matrix.reset(POLL_ID, 5, SETTINGS, PROJECTS, VOTES)
+
+    # A change that is not the next version is not applied
+    assert not matrix.apply(POLL_ID, 7, 2, {12: 900})
+    assert not matrix.apply(POLL_ID + 1, 6, 2, {12: 900})
+
+    assert matrix.apply(POLL_ID, 6, 2, {12: 250, 13: 650})
+    assert matrix.apply(POLL_ID, 7, 4, {11: 200, 13: 700})
+
+    expected_votes = [VOTES[0], vote(2, {12: 250, 13: 650}), VOTES[2], vote(4, {11: 200, 13: 700})]
+    snapshot = matrix.current(POLL_ID, 7)
+    assert snapshot is not None
+    assert snapshot.instance.fingerprint() == build_poll_instance(SETTINGS, PROJECTS, expected_votes).fingerprint()
+
+
+def test_reset_keeps_a_newer_version() -> None:
+    matrix = LiveBidMatrix()
+    matrix.reset(POLL_ID, 5, SETTINGS, PROJECTS, VOTES)
+
+    matrix.reset(POLL_ID, 4, SETTINGS, PROJECTS, VOTES[:1])
+    assert matrix.current(POLL_ID, 5) is not None
+
+    # A reset to another poll always replaces the matrix
+    matrix.reset(POLL_ID + 1, 0, SETTINGS, PROJECTS, VOTES[:1])
+    assert matrix.current(POLL_ID, 5) is None
+    assert matrix.current(POLL_ID + 1, 0) is not None
@@ -0,0 +1,44 @@
+from contextlib import nullcontext
+
+from pytest_mock import MockerFixture
+
+from src.live_results import LiveResultsScheduler
+from tests.test_models import FakeConnection
+
+
+def test_recomputations_are_coalesced() -> None:
+    scheduler = LiveResultsScheduler(interval_seconds=30, timeout_seconds=60)
+    assert scheduler.is_due(1, 5, now=1000)
+
+    # What _recompute records when it starts a run
+    scheduler._last_started_at = 1000
+    scheduler._last_version = (1, 5)
+
+    # The same version is never recomputed, a newer version waits for the interval
+    assert not scheduler.is_due(1, 5, now=2000)
+    assert not scheduler.is_due(1, 9, now=1010)
+    assert scheduler.is_due(1, 9, now=1030)
+    assert scheduler.is_due(2, 5, now=1030)
+    assert scheduler.results is None
+
+
+def test_tick_without_tables_is_quiet(mocker: MockerFixture) -> None:
+    db = FakeConnection({"to_regclass": [(False,)]})
+    mocker.patch("src.live_results.get_db", return_value=nullcontext(db))
+    get_settings = mocker.patch("src.live_results.get_settings")
+
+    LiveResultsScheduler(interval_seconds=30, timeout_seconds=60).tick()
+
+    # The settings are not queried, so no error is logged before the tables are created
+    get_settings.assert_not_called()
+    assert len(db.executed) == 1
+
+
+def test_tick_without_active_poll_is_quiet(mocker: MockerFixture) -> None:
+    db = FakeConnection({"to_regclass": [(True,)], "WHERE active = TRUE": [(False,)]})
+    mocker.patch("src.live_results.get_db", return_value=nullcontext(db))
+    get_settings = mocker.patch("src.live_results.get_settings")
+
+    LiveResultsScheduler(interval_seconds=30, timeout_seconds=60).tick()
+
+    get_settings.assert_not_called()
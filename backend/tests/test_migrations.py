@@ -0,0 +1,20 @@
+from src.config import config
+from src.migrations import MIGRATIONS
+
+
+def test_migrations_versions() -> None:
+    versions = [migration.version for migration in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert len({migration.name for migration in MIGRATIONS}) == len(MIGRATIONS)
+
+
+def test_optional_migrations_are_enabled_by_config() -> None:
+    partition_votes = next(migration for migration in MIGRATIONS if migration.name == "partition_votes")
+    assert partition_votes.optional and not partition_votes.enabled()
+    assert all(migration.enabled() for migration in MIGRATIONS if not migration.optional)
+
+    config.optional_migrations = ["partition_votes"]
+    try:
+        assert partition_votes.enabled()
+    finally:
+        config.optional_migrations = []
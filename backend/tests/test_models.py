@@ -0,0 +1,135 @@
+import time
+from typing import Any
+
+import psycopg
+
+from src.models import ActivePollCache, Poll, VoteColumns, create_project
+from tests.test_algorithm_runs import POLL_ID, VOTES
+
+
+class FakeCursor:
+    """A cursor that returns the rows of the first result whose key is in the query, like a psycopg cursor
+    it raises if the last statement returned no result."""
+
+    def __init__(self, connection: "FakeConnection") -> None:
+        self._connection = connection
+        self._rows: list[tuple] | None = None
+        self.rowcount = -1
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def execute(self, query: str, params: Any = None) -> None:
+        self._connection.executed.append(query)
+        self._rows = None
+        self.rowcount = next((count for key, count in self._connection.rowcounts.items() if key in query), -1)
+        if "RETURNING" in query or query.strip().upper().startswith(("SELECT", "WITH")):
+            self._rows = next((rows for key, rows in self._connection.results.items() if key in query), [])
+
+    def copy(self, statement: str) -> "FakeCopy":
+        self._connection.executed.append(statement)
+        return FakeCopy(self._connection)
+
+    def fetchone(self) -> tuple | None:
+        if self._rows is None:
+            raise psycopg.ProgrammingError("the last operation didn't produce records")
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self) -> list[tuple]:
+        if self._rows is None:
+            raise psycopg.ProgrammingError("the last operation didn't produce records")
+        return self._rows
+
+
+class FakeCopy:
+    """Records the data written to a COPY."""
+
+    def __init__(self, connection: "FakeConnection") -> None:
+        self._connection = connection
+
+    def __enter__(self) -> "FakeCopy":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def write(self, data: bytes) -> None:
+        self._connection.copied.append(data)
+
+    def write_row(self, row: Any) -> None:
+        self._connection.copied.append(tuple(row))
+
+
+class FakeConnection:
+    """
+    A connection that records the executed statements, with the rows (and the row counts)
+    of the statements by a part of their text.
+    """
+
+    def __init__(
+        self, results: dict[str, list[tuple]] | None = None, rowcounts: dict[str, int] | None = None
+    ) -> None:
+        self.results = results or {}
+        self.rowcounts = rowcounts or {}
+        self.executed: list[str] = []
+        self.copied: list[Any] = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, name: str | None = None) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+def test_active_poll_cache() -> None:
+    cache = ActivePollCache(max_age_seconds=60)
+    poll = Poll(poll_id=3, name="poll", active=True)
+    assert cache.get() is None
+
+    cache.set(poll)
+    assert cache.get() is poll
+
+    cache.invalidate()
+    assert cache.get() is None
+
+
+def test_active_poll_cache_expires() -> None:
+    cache = ActivePollCache(max_age_seconds=0.01)
+    cache.set(Poll(poll_id=3, name="poll", active=True))
+
+    time.sleep(0.02)
+    assert cache.get() is None
+
+
+def test_vote_columns() -> None:
+    columns = VoteColumns.of(VOTES)
+    assert VoteColumns.of(columns) is columns
+
+    assert len(columns) == len(VOTES)
+    assert list(columns.voter_ids) == [vote.voter.voter_id for vote in VOTES]
+    assert columns.points_by_voter() == {
+        vote.voter.voter_id: {item.project_id: item.points for item in vote.projects} for vote in VOTES
+    }
+    assert columns.votes() == VOTES
+    assert all(vote.poll_id == POLL_ID for vote in columns.votes())
+
+
+def test_create_project() -> None:
+    db = FakeConnection({"RETURNING id": [(42,)]})
+    poll = Poll(poll_id=POLL_ID, name="poll", active=True)
+
+    project = create_project(db, "project", 100, 200, "", "", False, 1, poll)
+
+    assert project.project_id == 42
+    assert project.poll_id == POLL_ID
+    # The data version is bumped in the transaction of the insert
+    assert "data_version = data_version + 1" in db.executed[-1]
+    assert db.commits == 1
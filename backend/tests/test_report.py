@@ -0,0 +1,37 @@
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from src.algorithm.scenarios import Scenario, ScenarioAlgorithm, ScenarioResult
+from src.algorithm_runs import AlgorithmRun
+from src.config import config
+from src.jobs import Job, JobStatus
+from src.routers.report import router as report_router
+
+
+def test_run_result_allocations_are_integers(mocker: MockerFixture) -> None:
+    job = Job(id=1, scenario=Scenario("mes"), timeout_seconds=None, max_rss_bytes=None, status=JobStatus.FINISHED)
+    job.result = ScenarioResult("mes", {11: 250.75, 12: 100.0}, 0.1)
+    run = AlgorithmRun(
+        id=3,
+        poll_id=1,
+        data_version=5,
+        fingerprint="",
+        algorithm=ScenarioAlgorithm.EQUAL_SHARES,
+        job=job,
+        voters_count=2,
+        projects_count=2,
+        bids_count=3,
+        budget=400,
+    )
+    mocker.patch("src.routers.report.algorithm_runs_storage.get_run", return_value=run)
+    mocker.patch.object(config, "admin_key", uuid4())
+    app = FastAPI()
+    app.include_router(report_router, prefix="/report")
+
+    response = TestClient(app).get("/report/run/result", params={"admin_key": str(config.admin_key), "run_id": 3})
+
+    assert response.status_code == 200
+    assert response.json()["allocations"] == {"11": 250, "12": 100}
@@ -0,0 +1,38 @@
+from src.results_cache import PollDataCache
+
+
+def test_values_are_kept_for_the_latest_version() -> None:
+    cache = PollDataCache()
+
+    assert cache.get(1, 1, "report_files") is None
+    cache.put(1, 1, "report_files", {"votes.csv": "a"})
+    cache.put(1, 1, "visualization", b"zip")
+    cache.put(2, 7, "report_files", {"votes.csv": "b"})
+
+    assert cache.get(1, 1, "report_files") == {"votes.csv": "a"}
+    assert cache.get(1, 1, "visualization") == b"zip"
+    assert cache.get(1, 2, "report_files") is None
+
+    # A newer version drops the values of the older one, and an older version does not replace it
+    cache.put(1, 2, "report_files", {"votes.csv": "c"})
+    cache.put(1, 1, "report_files", {"votes.csv": "a"})
+    assert cache.get(1, 1, "visualization") is None
+    assert cache.get(1, 2, "report_files") == {"votes.csv": "c"}
+    assert cache.get(2, 7, "report_files") == {"votes.csv": "b"}
+
+    cache.invalidate(1)
+    assert cache.get(1, 2, "report_files") is None
+
+
+def test_get_or_create_creates_once() -> None:
+    cache = PollDataCache()
+    calls = []
+
+    def create() -> str:
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_create(1, 3, "name", create) == "value"
+    assert cache.get_or_create(1, 3, "name", create) == "value"
+    assert len(calls) == 1
+    assert cache.hits == 1 and cache.misses == 1